@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Union, cast
 
 from rotkehlchen.accounting.events import TaxableEvents
 from rotkehlchen.assets.asset import Asset
@@ -32,6 +32,7 @@ from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.accounting import (
     TaxableAction,
     action_get_assets,
+    action_get_priced_assets,
     action_get_timestamp,
     action_get_type,
 )
@@ -244,6 +245,45 @@ class Accountant():
                 is_virtual=False,
             )
 
+    def prefetch_prices(
+            self,
+            actions: List[TaxableAction],
+            end_ts: Timestamp,
+            db_settings: DBSettings,
+            ignored_assets: FrozenSet[Asset],
+    ) -> None:
+        """Collects the prices that processing the given sorted actions will need and
+        makes sure they are all locally available before the processing starts.
+
+        This way all remote price queries happen concurrently in one go instead
+        of being discovered one by one while walking the actions.
+        """
+        queries: Set[Tuple[Asset, Asset, Timestamp]] = set()
+        for action in actions:
+            timestamp = action_get_timestamp(action)
+            if timestamp > end_ts:
+                break
+
+            if isinstance(action, (AssetMovement, EthereumTransaction)):
+                if timestamp < self.start_ts:
+                    continue
+                if isinstance(action, EthereumTransaction) and not db_settings.include_gas_costs:
+                    continue
+
+            try:
+                assets = action_get_priced_assets(action)
+                if any(x in ignored_assets for x in action_get_assets(action)):
+                    continue
+            except (UnknownAsset, UnsupportedAsset, DeserializationError):
+                # Will be reported when processing the action
+                continue
+
+            for asset in assets:
+                if asset != self.profit_currency:
+                    queries.add((asset, self.profit_currency, timestamp))
+
+        PriceHistorian().prefetch_historical_prices(queries)
+
     def process_history(
             self,
             start_ts: Timestamp,
@@ -275,10 +315,11 @@ class Accountant():
         # Used only in the "avoid zerorpc remote lost after 10ms problem"
         self.last_sleep_ts = 0
 
-        # Ask the DB for the settings once at the start of processing so we got the
-        # same settings through the entire task
+        # Ask the DB for the settings and the ignored assets once at the start of
+        # processing so we got the same settings through the entire task
         db_settings = self.db.get_settings()
         self._customize(db_settings)
+        ignored_assets = frozenset(self.db.get_ignored_assets())
 
         actions: List[TaxableAction] = list(trade_history)
         # If we got loans, we need to interleave them with the full history and re-sort
@@ -299,6 +340,13 @@ class Accountant():
         self.currently_processing_timestamp = first_ts
         self.started_processing_timestamp = first_ts
 
+        self.prefetch_prices(
+            actions=actions,
+            end_ts=end_ts,
+            db_settings=db_settings,
+            ignored_assets=ignored_assets,
+        )
+
         prev_time = Timestamp(0)
         count = 0
         for action in actions:
@@ -307,7 +355,14 @@ class Accountant():
                     should_continue,
                     prev_time,
                     count,
-                ) = self.process_action(action, end_ts, prev_time, count, db_settings)
+                ) = self.process_action(
+                    action=action,
+                    end_ts=end_ts,
+                    prev_time=prev_time,
+                    count=count,
+                    db_settings=db_settings,
+                    ignored_assets=ignored_assets,
+                )
             except PriceQueryUnknownFromAsset as e:
                 ts = action_get_timestamp(action)
                 self.msg_aggregator.add_error(
@@ -387,6 +442,7 @@ class Accountant():
             prev_time: Timestamp,
             count: int,
             db_settings: DBSettings,
+            ignored_assets: FrozenSet[Asset],
     ) -> Tuple[bool, Timestamp, int]:
         """Processes each individual action and returns whether we should continue
         looping through the rest of the actions or not
@@ -398,8 +454,6 @@ class Accountant():
         - RemoteError if there is a problem reaching the price oracle server
         or with reading the response returned by the server
         """
-        ignored_assets = self.db.get_ignored_assets()
-
         # Assert we are sorted in ascending time order.
         timestamp = action_get_timestamp(action)
         assert timestamp >= prev_time, (
@@ -530,7 +584,4 @@ class Accountant():
         if asset not in self.events.events:
             return None
 
-        amount = FVal(0)
-        for buy_event in self.events.events[asset].buys:
-            amount += buy_event.amount
-        return amount
+        return self.events.events[asset].buys.total_amount()
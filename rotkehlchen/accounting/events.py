@@ -6,7 +6,13 @@ from rotkehlchen.constants import BTC_BCH_FORK_TS, ETH_DAO_FORK_TS, ZERO
 from rotkehlchen.constants.assets import A_BCH, A_BTC, A_ETC, A_ETH
 from rotkehlchen.csv_exporter import CSVExporter
 from rotkehlchen.errors import NoPriceForGivenTimestamp, PriceQueryUnknownFromAsset
-from rotkehlchen.exchanges.data_structures import BuyEvent, Events, MarginPosition, SellEvent
+from rotkehlchen.exchanges.data_structures import (
+    BuyEvent,
+    BuyLotQueue,
+    Events,
+    MarginPosition,
+    SellEvent,
+)
 from rotkehlchen.fval import FVal
 from rotkehlchen.history import PriceHistorian
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -64,15 +70,14 @@ class TaxableEvents():
         """ Calculates what amount of all assets has been untouched for a year and
         is hence tax-free and also the average buy price for each asset"""
         self.details: Dict[Asset, Tuple[FVal, FVal]] = {}
-        now = ts_now()
+        taxfree_before = None
+        if self.taxfree_after_period is not None:
+            taxfree_before = Timestamp(ts_now() - self.taxfree_after_period)
         for asset, events in self.events.items():
-            tax_free_amount_left = ZERO
+            tax_free_amount_left = events.buys.taxfree_amount(taxfree_before)
             amount_sum = ZERO
             average = ZERO
             for buy_event in events.buys:
-                if self.taxfree_after_period is not None:
-                    if buy_event.timestamp + self.taxfree_after_period < now:
-                        tax_free_amount_left += buy_event.amount
                 amount_sum += buy_event.amount
                 average += buy_event.amount * buy_event.rate
 
@@ -115,28 +120,8 @@ class TaxableEvents():
         if asset not in self.events or len(self.events[asset].buys) == 0:
             return False
 
-        remaining_amount_from_last_buy = FVal('-1')
-        remaining_amount = amount
-        for idx, buy_event in enumerate(self.events[asset].buys):
-            if remaining_amount < buy_event.amount:
-                stop_index = idx
-                remaining_amount_from_last_buy = buy_event.amount - remaining_amount
-                # stop iterating since we found all buys to satisfy reduction
-                break
-            else:
-                remaining_amount -= buy_event.amount
-                if idx == len(self.events[asset].buys) - 1:
-                    stop_index = idx + 1
-
-        # Otherwise, delete all the used up buys from the list
-        del self.events[asset].buys[:stop_index]
-        # and modify the amount of the buy where we stopped if there is one
-        if remaining_amount_from_last_buy != FVal('-1'):
-            self.events[asset].buys[0].amount = remaining_amount_from_last_buy
-        elif remaining_amount != ZERO:
-            return False
-
-        return True
+        remaining_amount = self.events[asset].buys.reduce(amount)
+        return remaining_amount == ZERO
 
     def handle_prefork_asset_buys(
             self,
@@ -315,7 +300,7 @@ class TaxableEvents():
         )
 
         if bought_asset not in self.events:
-            self.events[bought_asset] = Events([], [])
+            self.events[bought_asset] = Events(BuyLotQueue(), [])
 
         gross_cost = bought_amount * buy_rate
         cost_in_profit_currency = gross_cost + fee_in_profit_currency
@@ -446,7 +431,7 @@ class TaxableEvents():
         """
 
         if selling_asset not in self.events:
-            self.events[selling_asset] = Events([], [])
+            self.events[selling_asset] = Events(BuyLotQueue(), [])
 
         self.events[selling_asset].sells.append(
             SellEvent(
@@ -603,78 +588,8 @@ class TaxableEvents():
             - `taxfree_bought_cost`: How much it cost in `profit_currency` to buy
                                      the taxfree_amount (selling_amount - taxable_amount)
         """
-        remaining_sold_amount = selling_amount
-        stop_index = -1
-        taxfree_bought_cost = FVal(0)
-        taxable_bought_cost = FVal(0)
-        taxable_amount = FVal(0)
-        taxfree_amount = FVal(0)
-        remaining_amount_from_last_buy = FVal('-1')
-        for idx, buy_event in enumerate(self.events[selling_asset].buys):
-            if self.taxfree_after_period is None:
-                at_taxfree_period = False
-            else:
-                at_taxfree_period = (
-                    buy_event.timestamp + self.taxfree_after_period < timestamp
-                )
-
-            if remaining_sold_amount < buy_event.amount:
-                stop_index = idx
-                buying_cost = remaining_sold_amount.fma(
-                    buy_event.rate,
-                    (buy_event.fee_rate * remaining_sold_amount),
-                )
-
-                if at_taxfree_period:
-                    taxfree_amount += remaining_sold_amount
-                    taxfree_bought_cost += buying_cost
-                else:
-                    taxable_amount += remaining_sold_amount
-                    taxable_bought_cost += buying_cost
-
-                remaining_amount_from_last_buy = buy_event.amount - remaining_sold_amount
-                log.debug(
-                    'Sell uses up part of historical buy',
-                    sensitive_log=True,
-                    tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
-                    used_amount=remaining_sold_amount,
-                    from_amount=buy_event.amount,
-                    asset=selling_asset,
-                    trade_buy_rate=buy_event.rate,
-                    profit_currency=self.profit_currency,
-                    trade_timestamp=buy_event.timestamp,
-                )
-                # stop iterating since we found all buys to satisfy this sell
-                break
-            else:
-                buying_cost = buy_event.amount.fma(
-                    buy_event.rate,
-                    (buy_event.fee_rate * buy_event.amount),
-                )
-                remaining_sold_amount -= buy_event.amount
-                if at_taxfree_period:
-                    taxfree_amount += buy_event.amount
-                    taxfree_bought_cost += buying_cost
-                else:
-                    taxable_amount += buy_event.amount
-                    taxable_bought_cost += buying_cost
-
-                log.debug(
-                    'Sell uses up entire historical buy',
-                    sensitive_log=True,
-                    tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
-                    bought_amount=buy_event.amount,
-                    asset=selling_asset,
-                    trade_buy_rate=buy_event.rate,
-                    profit_currency=self.profit_currency,
-                    trade_timestamp=buy_event.timestamp,
-                )
-
-                # If the sell used up the last historical buy
-                if idx == len(self.events[selling_asset].buys) - 1:
-                    stop_index = idx + 1
-
-        if len(self.events[selling_asset].buys) == 0:
+        buys = self.events[selling_asset].buys
+        if len(buys) == 0:
             log.critical(
                 'No documented buy found for "{}" before {}'.format(
                     selling_asset,
@@ -686,12 +601,27 @@ class TaxableEvents():
             # calculating the entire sell as profit which needs to be taxed
             return selling_amount, FVal(0), FVal(0)
 
-        # Otherwise, delete all the used up buys from the list
-        del self.events[selling_asset].buys[:stop_index]
-        # and modify the amount of the buy where we stopped if there is one
-        if remaining_amount_from_last_buy != FVal('-1'):
-            self.events[selling_asset].buys[0].amount = remaining_amount_from_last_buy
-        elif remaining_sold_amount != ZERO:
+        taxfree_before = None
+        if self.taxfree_after_period is not None:
+            # buys made before that are past the tax-free period at the sell's time
+            taxfree_before = Timestamp(timestamp - self.taxfree_after_period)
+        consumption = buys.consume(amount=selling_amount, taxfree_before=taxfree_before)
+        log.debug(
+            'Sell used up historical buys',
+            sensitive_log=True,
+            asset=selling_asset,
+            taxable_amount=consumption.taxable_amount,
+            taxable_bought_cost=consumption.taxable_bought_cost,
+            taxfree_amount=consumption.taxfree_amount,
+            taxfree_bought_cost=consumption.taxfree_bought_cost,
+            profit_currency=self.profit_currency,
+        )
+        taxable_amount = consumption.taxable_amount
+        taxable_bought_cost = consumption.taxable_bought_cost
+        taxfree_amount = consumption.taxfree_amount
+        taxfree_bought_cost = consumption.taxfree_bought_cost
+
+        if consumption.uncovered_amount != ZERO:
             # if we still have sold amount but no buys to satisfy it then we only
             # found buys to partially satisfy the sell
             adjusted_amount = selling_amount - taxfree_amount
@@ -730,7 +660,7 @@ class TaxableEvents():
         rate = self.get_rate_in_profit_currency(gained_asset, timestamp)
 
         if gained_asset not in self.events:
-            self.events[gained_asset] = Events([], [])
+            self.events[gained_asset] = Events(BuyLotQueue(), [])
 
         net_gain_amount = gained_amount - fee_in_asset
         gain_in_profit_currency = net_gain_amount * rate
@@ -777,9 +707,9 @@ class TaxableEvents():
         or with reading the response returned by the server
         """
         if margin.pl_currency not in self.events:
-            self.events[margin.pl_currency] = Events([], [])
+            self.events[margin.pl_currency] = Events(BuyLotQueue(), [])
         if margin.fee_currency not in self.events:
-            self.events[margin.fee_currency] = Events([], [])
+            self.events[margin.fee_currency] = Events(BuyLotQueue(), [])
 
         pl_currency_rate = self.get_rate_in_profit_currency(margin.pl_currency, margin.close_time)
         fee_currency_rate = self.get_rate_in_profit_currency(margin.pl_currency, margin.close_time)
@@ -59,6 +59,8 @@ from rotkehlchen.typing import (
     TradePair,
     TradeType,
 )
+from rotkehlchen.utils.network import get_connection_stats
+from rotkehlchen.utils.ratelimit import get_rate_limit_stats
 from rotkehlchen.utils.version_check import check_if_version_up_to_date
 
 OK_RESULT = {'result': True, 'message': ''}
@@ -1323,6 +1325,21 @@ class RestAPI():
     def ping() -> Response:
         return api_response(_wrap_in_ok_result(True), status_code=HTTPStatus.OK)
 
+    @staticmethod
+    def get_price_cache_stats() -> Response:
+        stats = Inquirer().get_price_cache_stats()
+        return api_response(_wrap_in_ok_result(stats.serialize()), status_code=HTTPStatus.OK)
+
+    @staticmethod
+    def get_rate_limit_stats() -> Response:
+        result = {service: stats.serialize() for service, stats in get_rate_limit_stats().items()}
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
+
+    @staticmethod
+    def get_connection_stats() -> Response:
+        result = {host: stats.serialize() for host, stats in get_connection_stats().items()}
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
+
     @require_loggedin_user()
     def import_data(
             self,
@@ -47,6 +47,9 @@ from rotkehlchen.api.v1.resources import (
     UsersResource,
     VersionResource,
     PingResource,
+    PriceCacheStatsResource,
+    RateLimitStatsResource,
+    ConnectionStatsResource,
     create_blueprint,
 )
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -104,6 +107,9 @@ URLS_V1: URLS = [
     ('/assets/ignored', IgnoredAssetsResource),
     ('/version', VersionResource),
     ('/ping', PingResource),
+    ('/prices/cache', PriceCacheStatsResource),
+    ('/ratelimits', RateLimitStatsResource),
+    ('/connections', ConnectionStatsResource),
     ('/import', DataImportResource),
 ]
 
@@ -720,6 +720,24 @@ class PingResource(BaseResource):
         return self.rest_api.ping()
 
 
+class PriceCacheStatsResource(BaseResource):
+
+    def get(self) -> Response:
+        return self.rest_api.get_price_cache_stats()
+
+
+class RateLimitStatsResource(BaseResource):
+
+    def get(self) -> Response:
+        return self.rest_api.get_rate_limit_stats()
+
+
+class ConnectionStatsResource(BaseResource):
+
+    def get(self) -> Response:
+        return self.rest_api.get_connection_stats()
+
+
 class DataImportResource(BaseResource):
 
     put_schema = DataImportSchema()
@@ -3,6 +3,8 @@ import sys
 from typing import Any, List, Sequence, Union
 
 from rotkehlchen.config import default_data_directory
+from rotkehlchen.constants.misc import DEFAULT_HISTORY_QUERY_CONCURRENCY
+from rotkehlchen.constants.timing import ALL_REMOTES_TIMEOUT, DEFAULT_CURRENT_PRICE_CACHE_TTL
 from rotkehlchen.utils.misc import get_system_spec
 
 
@@ -98,6 +100,33 @@ def app_args(prog: str, description: str) -> argparse.ArgumentParser:
         ),
         action='store_true',
     )
+    p.add_argument(
+        '--current-price-cache-ttl',
+        help=(
+            'The number of seconds for which a queried current price of an asset '
+            'is reused before it is queried again'
+        ),
+        default=DEFAULT_CURRENT_PRICE_CACHE_TTL,
+        type=int,
+    )
+    p.add_argument(
+        '--history-query-concurrency',
+        help=(
+            'The maximum number of exchange history endpoints that are queried '
+            'at the same time when creating the trades history'
+        ),
+        default=DEFAULT_HISTORY_QUERY_CONCURRENCY,
+        type=int,
+    )
+    p.add_argument(
+        '--http-timeout',
+        help=(
+            'The timeout in seconds of the requests to remote services that '
+            'do not set their own'
+        ),
+        default=ALL_REMOTES_TIMEOUT,
+        type=int,
+    )
     p.add_argument(
         'version',
         help='Shows the rotkehlchen version',
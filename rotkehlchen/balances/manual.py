@@ -2,7 +2,7 @@ from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.misc import ZERO
-from rotkehlchen.errors import InputError, RemoteError
+from rotkehlchen.errors import InputError
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.typing import Location, Price
@@ -33,16 +33,15 @@ class ManuallyTrackedBalanceWithValue(NamedTuple):
 def get_manually_tracked_balances(db: 'DBHandler') -> List[ManuallyTrackedBalanceWithValue]:
     """Gets the manually tracked balances"""
     balances = db.get_manually_tracked_balances()
+    usd_prices, price_errors = Inquirer().find_usd_prices(entry.asset for entry in balances)
     balances_with_value = []
     for entry in balances:
-        try:
-            price = Inquirer().find_usd_price(entry.asset)
-        except RemoteError as e:
+        if entry.asset in price_errors:
             db.msg_aggregator.add_warning(
                 f'Could not find price for {entry.asset.identifier} during '
-                f'manually tracked balance querying due to {str(e)}',
+                f'manually tracked balance querying due to {price_errors[entry.asset]}',
             )
-            price = Price(ZERO)
+        price = usd_prices.get(entry.asset, Price(ZERO))
         # https://github.com/python/mypy/issues/2582 --> for the type ignore below
         balances_with_value.append(ManuallyTrackedBalanceWithValue(  # type: ignore
             **entry._asdict(),
@@ -1,7 +1,29 @@
+import logging
 from hashlib import sha256
+from typing import Dict, List, Optional
 
 import base58check
 import bech32
+import requests
+from gevent.pool import Pool
+
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.errors import RemoteError, UnableToDecryptRemoteData
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import BTCAddress
+from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.misc import request_get, satoshis_to_btc, ts_now
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# How many addresses are queried with one call to the blockchain.info multiaddr endpoint
+BLOCKCHAININFO_MULTIADDR_MAX_ADDRESSES = 80
+# Batch calls of the free blockcypher tier are limited to 3 addresses
+BLOCKCYPHER_BATCH_MAX_ADDRESSES = 3
+# How many batches of BTC addresses are queried at the same time
+BTC_BALANCES_QUERY_CONCURRENCY = 4
 
 
 def is_valid_btc_address(value: str) -> bool:
@@ -39,3 +61,148 @@ def is_valid_base58_address(value: str) -> bool:
         return False
 
     return value == base58check.b58encode(abytes).decode()
+
+
+def _query_blockchain_info_balances(accounts: List[BTCAddress]) -> Dict[BTCAddress, FVal]:
+    """Queries blockchain.info for the balances of up to
+    BLOCKCHAININFO_MULTIADDR_MAX_ADDRESSES accounts with one call
+
+    May raise:
+    - RemoteError if there is a problem querying blockchain.info
+    """
+    addresses = '|'.join(accounts)
+    response_data = request_get(
+        url=f'https://blockchain.info/multiaddr?active={addresses}',
+        handle_429=True,
+        # If we get a 429 then their docs suggest 10 seconds
+        # https://blockchain.info/q
+        backoff_in_seconds=10,
+    )
+    if not isinstance(response_data, dict):
+        raise RemoteError(f'Unexpected blockchain.info multiaddr response: {response_data}')
+
+    try:
+        balances = {}
+        for entry in response_data['addresses']:
+            balances[entry['address']] = satoshis_to_btc(FVal(entry['final_balance']))
+    except (KeyError, TypeError, ValueError):
+        raise RemoteError(f'Unexpected blockchain.info multiaddr response: {response_data}')
+
+    return balances
+
+
+def _query_blockcypher_balances(accounts: List[BTCAddress]) -> Dict[BTCAddress, FVal]:
+    """Queries blockcypher for the balances of up to BLOCKCYPHER_BATCH_MAX_ADDRESSES
+    bech32 accounts with one batch call
+
+    May raise:
+    - RemoteError if there is a problem querying blockcypher
+    """
+    # blockcypher returns the addresses lowercased
+    lowercased_accounts = {x.lower(): x for x in accounts}
+    addresses = ';'.join(lowercased_accounts)
+    response_data = request_get(
+        url=f'https://api.blockcypher.com/v1/btc/main/addrs/{addresses}/balance',
+    )
+    # A batch of a single address returns its entry instead of a list of entries
+    entries = response_data if isinstance(response_data, list) else [response_data]
+    try:
+        balances = {}
+        for entry in entries:
+            account = lowercased_accounts[entry['address'].lower()]
+            balances[account] = satoshis_to_btc(FVal(entry['balance']))
+    except (KeyError, TypeError, ValueError):
+        raise RemoteError(f'Unexpected blockcypher balance response: {response_data}')
+
+    return balances
+
+
+def _query_btc_batch_balances(
+        accounts: List[BTCAddress],
+        database: Optional[DBHandler],
+        msg_aggregator: Optional[MessagesAggregator],
+) -> Dict[BTCAddress, FVal]:
+    """Queries the balances of a batch of BTC accounts that all use the same endpoint
+
+    The queried balances are stored in the DB. If the query fails the last stored
+    balances of the accounts are returned instead, if all of them are known.
+
+    May raise:
+    - RemoteError if there is a problem querying blockchain.info or blockcypher
+    and not all balances of the batch are stored in the DB
+    """
+    try:
+        if is_valid_bech32_address(accounts[0]):
+            queried = _query_blockcypher_balances(accounts)
+        else:
+            queried = _query_blockchain_info_balances(accounts)
+        missing_accounts = [x for x in accounts if x not in queried]
+        if len(missing_accounts) != 0:
+            raise RemoteError(
+                f'Response did not contain the balance of {",".join(missing_accounts)}',
+            )
+        balances = {x: queried[x] for x in accounts}
+    except (
+        requests.exceptions.ConnectionError,
+        UnableToDecryptRemoteData,
+        RemoteError,
+    ) as e:
+        error = RemoteError(f'bitcoin external API request failed due to {str(e)}')
+        if database is None:
+            raise error
+
+        stored = database.get_btc_address_balances(accounts)
+        if len(stored) != len(accounts):
+            raise error
+
+        log.warning(
+            'Using the last stored balances of BTC accounts since their query failed',
+            error=str(e),
+        )
+        if msg_aggregator is not None:
+            oldest = min(timestamp for _, timestamp in stored.values())
+            msg_aggregator.add_warning(
+                f'Could not query the balance of {len(accounts)} BTC accounts due to '
+                f'{str(e)}. Using their last known balances from timestamp {oldest}',
+            )
+        return {address: balance for address, (balance, _) in stored.items()}
+
+    if database is not None:
+        database.add_btc_address_balances(balances, ts_now())
+    return balances
+
+
+def get_bitcoin_addresses_balances(
+        accounts: List[BTCAddress],
+        database: Optional[DBHandler] = None,
+        msg_aggregator: Optional[MessagesAggregator] = None,
+) -> Dict[BTCAddress, FVal]:
+    """Queries the balances of the given BTC accounts
+
+    Base58 accounts are queried in batches through the blockchain.info multiaddr
+    endpoint and bech32 accounts in batches through blockcypher. The batches are
+    queried concurrently.
+
+    May raise:
+    - RemoteError if there is a problem querying blockchain.info or blockcypher
+    and the balances are not stored in the DB
+    """
+    bech32_accounts = [x for x in accounts if is_valid_bech32_address(x)]
+    base58_accounts = [x for x in accounts if not is_valid_bech32_address(x)]
+    batches = [
+        base58_accounts[x:x + BLOCKCHAININFO_MULTIADDR_MAX_ADDRESSES]
+        for x in range(0, len(base58_accounts), BLOCKCHAININFO_MULTIADDR_MAX_ADDRESSES)
+    ] + [
+        bech32_accounts[x:x + BLOCKCYPHER_BATCH_MAX_ADDRESSES]
+        for x in range(0, len(bech32_accounts), BLOCKCYPHER_BATCH_MAX_ADDRESSES)
+    ]
+    pool = Pool(BTC_BALANCES_QUERY_CONCURRENCY)
+    results = pool.map(
+        lambda batch: _query_btc_batch_balances(batch, database, msg_aggregator),
+        batches,
+    )
+    balances: Dict[BTCAddress, FVal] = {}
+    for result in results:
+        balances.update(result)
+
+    return balances
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.typing import Timestamp
+from rotkehlchen.utils.misc import ts_now
+
+# How many block timestamps are kept in memory in front of the DB
+BLOCK_TIME_CACHE_SIZE = 4096
+# Blocks mined in the last this many seconds can still be reorganized, so their
+# timestamps are not remembered. About 12 blocks of 15 seconds.
+BLOCK_TIME_CONFIRMATION_SECONDS = 180
+
+BlockTime = Tuple[int, Timestamp]
+
+
+class BlockTimeIndex():
+    """An index of ethereum block numbers to the timestamps of the blocks
+
+    Block timestamps do not change once a block is final, so each timestamp that
+    is queried from a node or etherscan, or that comes with an event, is remembered
+    in the DB. The most recently used ones are also kept in memory. Blocks that
+    are recent enough to still be reorganized are not remembered.
+
+    The index is shared by all modules through the EthereumManager. It can also
+    find the block mined at a given timestamp, starting from the closest known blocks.
+    """
+
+    def __init__(
+            self,
+            database: Optional[DBHandler] = None,
+            cache_size: int = BLOCK_TIME_CACHE_SIZE,
+    ) -> None:
+        self.database = database
+        self.cache_size = cache_size
+        self.cache: 'OrderedDict[int, Timestamp]' = OrderedDict()
+
+    def _cache(self, block_number: int, timestamp: Timestamp) -> None:
+        self.cache[block_number] = timestamp
+        self.cache.move_to_end(block_number)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def get_timestamps(self, block_numbers: List[int]) -> Dict[int, Timestamp]:
+        """Returns the known timestamps of the given block numbers"""
+        result = {}
+        missing = []
+        for block_number in block_numbers:
+            timestamp = self.cache.get(block_number)
+            if timestamp is None:
+                missing.append(block_number)
+                continue
+
+            self.cache.move_to_end(block_number)
+            result[block_number] = timestamp
+
+        if self.database is not None and len(missing) != 0:
+            for block_number, timestamp in self.database.get_block_timestamps(missing).items():
+                self._cache(block_number, timestamp)
+                result[block_number] = timestamp
+
+        return result
+
+    def add_timestamps(self, block_timestamps: Dict[int, Timestamp]) -> None:
+        """Remembers the timestamps of the given block numbers that are final"""
+        new_entries = {}
+        confirmed_before = ts_now() - BLOCK_TIME_CONFIRMATION_SECONDS
+        for block_number, timestamp in block_timestamps.items():
+            if timestamp > confirmed_before:
+                continue
+
+            if block_number not in self.cache:
+                new_entries[block_number] = timestamp
+            self._cache(block_number, timestamp)
+
+        if self.database is not None and len(new_entries) != 0:
+            self.database.add_block_timestamps(new_entries)
+
+    def get_closest_known(
+            self,
+            timestamp: Timestamp,
+    ) -> Tuple[Optional[BlockTime], Optional[BlockTime]]:
+        """Returns the known blocks closest to the given timestamp
+
+        The first is the last known block mined at or before the timestamp and
+        the second the first known block mined after it. Either can be None.
+        """
+        before: Optional[BlockTime] = None
+        after: Optional[BlockTime] = None
+        if self.database is not None:
+            before, after = self.database.get_closest_block_timestamps(timestamp)
+
+        for block_number, block_timestamp in self.cache.items():
+            if block_timestamp <= timestamp:
+                if before is None or block_number > before[0]:
+                    before = (block_number, block_timestamp)
+            elif after is None or block_number < after[0]:
+                after = (block_number, block_timestamp)
+
+        return before, after
+
+    def get_known_blocknumber(self, timestamp: Timestamp) -> Optional[int]:
+        """Returns the number of the last block mined at or before the given timestamp
+        if the known blocks are enough to tell it, otherwise None"""
+        before, after = self.get_closest_known(timestamp)
+        if before is None:
+            return None
+        if before[1] == timestamp or (after is not None and after[0] - before[0] == 1):
+            return before[0]
+        return None
+
+    def find_blocknumber(
+            self,
+            timestamp: Timestamp,
+            query_timestamp: Callable[[int], Timestamp],
+            query_latest_block: Callable[[], BlockTime],
+    ) -> int:
+        """Returns the number of the last block mined at or before the given timestamp
+
+        The search starts from the known blocks closest to the timestamp. The
+        remaining range is narrowed down by interpolating the block number from the
+        timestamps at the range edges, with a bisection step whenever an
+        interpolation does not halve the range.
+
+        `query_timestamp` should return the timestamp of a block number and add it
+        to this index, so that later searches start closer. `query_latest_block`
+        should return the number and timestamp of the latest block.
+
+        May raise whatever the query callbacks raise.
+        """
+        lower, upper = self.get_closest_known(timestamp)
+        if lower is not None:
+            if lower[1] == timestamp or (upper is not None and upper[0] - lower[0] == 1):
+                return lower[0]
+        else:
+            # The genesis block has no meaningful timestamp so start from the first one
+            lower = (1, query_timestamp(1))
+            if timestamp < lower[1]:
+                return 0
+
+        if upper is None:
+            upper = query_latest_block()
+            self.add_timestamps({upper[0]: upper[1]})
+            if timestamp >= upper[1]:
+                return upper[0]
+
+        interpolate = True
+        while upper[0] - lower[0] > 1:
+            range_size = upper[0] - lower[0]
+            if interpolate:
+                guess = lower[0] + (timestamp - lower[1]) * range_size // (upper[1] - lower[1])
+            else:
+                guess = lower[0] + range_size // 2
+            guess = min(max(guess, lower[0] + 1), upper[0] - 1)
+            guess_timestamp = query_timestamp(guess)
+            if guess_timestamp <= timestamp:
+                lower = (guess, guess_timestamp)
+            else:
+                upper = (guess, guess_timestamp)
+            interpolate = upper[0] - lower[0] <= range_size // 2
+
+        return lower[0]
@@ -1,9 +1,12 @@
 import logging
+from bisect import bisect_right
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, NamedTuple, Optional, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 from eth_utils.address import to_checksum_address
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.chain.ethereum.manager import EthereumManager, address_to_bytes32
@@ -17,23 +20,22 @@ from rotkehlchen.constants.ethereum import (
     MAKERDAO_VAT_ADDRESS,
 )
 from rotkehlchen.db.dbhandler import DBHandler
-from rotkehlchen.errors import ConversionError, DeserializationError, RemoteError
+from rotkehlchen.errors import ConversionError, RemoteError
 from rotkehlchen.fval import FVal
-from rotkehlchen.serialization.deserialize import deserialize_blocknumber
 from rotkehlchen.typing import ChecksumEthAddress, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.interfaces import EthereumModule
-from rotkehlchen.utils.misc import hex_or_bytes_to_int
+from rotkehlchen.utils.misc import hex_or_bytes_to_int, ts_now
 
 log = logging.getLogger(__name__)
 
 POT_CREATION_BLOCK = 8928160
-POT_CREATION_TIMESTAMP = 1573672721
-CHI_BLOCKS_SEARCH_DISTANCE = 50
-
-
-class ChiRetrievalError(Exception):
-    pass
+RAY = 10 ** 27
+MAX_UINT256 = 2 ** 256 - 1
+# The 'dsr' parameter name of pot.file() as bytes32
+DSR_FILE_WHAT = '0x' + b'dsr'.hex().ljust(64, '0')
+# How many accounts are checked for a DSR proxy at the same time
+MAKERDAO_PROXY_QUERY_CONCURRENCY = 8
 
 
 def hex_or_bytes_to_address(value: Union[bytes, str]) -> ChecksumEthAddress:
@@ -78,6 +80,84 @@ def _dsrdai_to_dai(value: Union[int, FVal]) -> FVal:
     return FVal(value / FVal(1e27) / FVal(1e18))
 
 
+def _rmul(x: int, y: int) -> int:
+    return x * y // RAY
+
+
+def _rpow(x: int, n: int) -> int:
+    """Raises a ray to the power of n, rounding as the pot contract does"""
+    z = x if n % 2 else RAY
+    n //= 2
+    while n:
+        x = (x * x + RAY // 2) // RAY
+        if n % 2:
+            z = (z * x + RAY // 2) // RAY
+        n //= 2
+    return z
+
+
+def _chi_at(from_ts: Timestamp, chi: int, dsr: int, timestamp: Timestamp) -> int:
+    """Returns the chi at timestamp given the chi at from_ts and the DSR since then"""
+    return _rmul(_rpow(dsr, timestamp - from_ts), chi)
+
+
+def _chi_at_time(chi_values: List[Tuple[Timestamp, int, int]], timestamp: Timestamp) -> int:
+    """Returns the chi at the given timestamp from the (timestamp, chi, dsr) values"""
+    idx = bisect_right(chi_values, (timestamp, MAX_UINT256, MAX_UINT256))
+    if idx == 0:
+        return RAY
+
+    from_ts, chi, dsr = chi_values[idx - 1]
+    return _chi_at(from_ts, chi, dsr, timestamp)
+
+
+def _dsr_gain_at(
+        movements: List[Tuple[str, int, int, int, Timestamp]],
+        chi_values: List[Tuple[Timestamp, int, int]],
+        timestamp: Timestamp,
+) -> int:
+    """Returns the DSR gain of an account up to the given timestamp
+
+    The movements are the stored (movement type, normalized balance, amount,
+    block number, timestamp) tuples of the account.
+    """
+    normalized_balance = 0
+    amount_in_dsr = 0
+    for movement_type, movement_normalized_balance, amount, _, movement_ts in movements:
+        if movement_ts >= timestamp:
+            break
+
+        if movement_type == 'deposit':
+            normalized_balance += movement_normalized_balance
+            amount_in_dsr += amount
+        else:  # withdrawal
+            normalized_balance -= movement_normalized_balance
+            amount_in_dsr -= amount
+
+    return normalized_balance * _chi_at_time(chi_values, timestamp) - amount_in_dsr
+
+
+def _dsr_account_report(movements: List[DSRMovement], chi: int) -> DSRAccountReport:
+    """Creates the DSR report of an account from its movements and the current chi"""
+    normalized_balance = 0
+    amount_in_dsr = 0
+    movements.sort(key=lambda x: x.block_number)
+
+    for m in movements:
+        current_chi = FVal(m.amount) / FVal(m.normalized_balance)
+        gain_so_far = normalized_balance * current_chi - amount_in_dsr
+        m.gain_so_far = gain_so_far.to_int(exact=False)
+        if m.movement_type == 'deposit':
+            normalized_balance += m.normalized_balance
+            amount_in_dsr += m.amount
+        else:  # withdrawal
+            amount_in_dsr -= m.amount
+            normalized_balance -= m.normalized_balance
+
+    gain = normalized_balance * chi - amount_in_dsr
+    return DSRAccountReport(movements=movements, gain_so_far=gain)
+
+
 def serialize_dsr_reports(
         reports: Dict[ChecksumEthAddress, DSRAccountReport],
 ) -> Dict[ChecksumEthAddress, Dict[str, Any]]:
@@ -118,7 +198,8 @@ class MakerDAO(EthereumModule):
         self.database = database
         self.msg_aggregator = msg_aggregator
         self.lock = Semaphore()
-        self.historical_dsr_reports: Dict[ChecksumEthAddress, DSRAccountReport] = {}
+        # Up to when the DSR movements and chi values in the DB are complete
+        self.last_sync_ts = Timestamp(0)
 
     def _get_account_proxy(self, address: ChecksumEthAddress) -> Optional[ChecksumEthAddress]:
         """Checks if a DSR proxy exists for the given address and returns it if it does
@@ -146,8 +227,10 @@ class MakerDAO(EthereumModule):
         """
         mapping = {}
         accounts = self.database.get_blockchain_accounts()
-        for account in accounts.eth:
-            proxy_result = self._get_account_proxy(account)
+        pool = Pool(MAKERDAO_PROXY_QUERY_CONCURRENCY)
+        # map returns the results in the order of the given accounts
+        proxy_results = pool.map(self._get_account_proxy, accounts.eth)
+        for account, proxy_result in zip(accounts.eth, proxy_results):
             if proxy_result:
                 mapping[account] = proxy_result
 
@@ -193,376 +276,257 @@ class MakerDAO(EthereumModule):
 
         return result
 
-    def _get_vat_move_event_value(
+    def _get_vat_move_values(
             self,
-            from_address: ChecksumEthAddress,
-            to_address: ChecksumEthAddress,
-            block_number: int,
-            transaction_index: int,
-    ) -> Optional[int]:
-        """Returns values in DAI that were moved from to address at a block number and tx index
+            proxies: List[ChecksumEthAddress],
+            deposits: bool,
+            from_block: int,
+            to_block: int,
+    ) -> Dict[Tuple[int, int, ChecksumEthAddress], int]:
+        """Returns the values in DAI that were moved between the proxies and the pot
 
-        Returns None if no value was found of if there was an error with conversion.
+        Deposits are moves from the proxies to the pot and withdrawals are moves
+        from the pot to the proxies. The values are keyed by block number,
+        transaction index and proxy.
 
         May raise:
         - RemoteError if etherscan is used and there is a problem with
         reaching it or with the returned result.
         """
-        arg1 = address_to_bytes32(from_address)
-        arg2 = address_to_bytes32(to_address)
+        pot = address_to_bytes32(MAKERDAO_POT_ADDRESS)
+        proxies_topics = [address_to_bytes32(proxy) for proxy in proxies]
         argument_filters = {
             'sig': '0xbb35783b',  # move
-            'arg1': arg1,  # src
-            'arg2': arg2,  # dst
+            'arg1': proxies_topics if deposits else pot,  # src
+            'arg2': pot if deposits else proxies_topics,  # dst
         }
         events = self.ethereum.get_logs(
             contract_address=MAKERDAO_VAT_ADDRESS,
             abi=MAKERDAO_VAT_ABI,
             event_name='LogNote',
             argument_filters=argument_filters,
-            from_block=block_number,
-            to_block=block_number,
+            from_block=from_block,
+            to_block=to_block,
         )
-        value = None
+        values = {}
         for event in events:
-            if event['transactionIndex'] == transaction_index:
-                if value is not None:
-                    log.error(  # type: ignore
-                        'Mistaken assumption: There is multiple vat.move events for '
-                        'the same transaction',
-                    )
-                try:
-                    value = hex_or_bytes_to_int(event['topics'][3])
-                    break
-                except ConversionError:
-                    value = None
-        return value
+            try:
+                proxy = hex_or_bytes_to_address(event['topics'][1 if deposits else 2])
+                value = hex_or_bytes_to_int(event['topics'][3])
+            except ConversionError:
+                continue
+
+            key = (event['blockNumber'], event['transactionIndex'], proxy)
+            if key in values:
+                log.error(
+                    'Mistaken assumption: There is multiple vat.move events for '
+                    'the same transaction',
+                )
+            values[key] = value
 
-    def _historical_dsr_for_account(
+        return values
+
+    def _historical_dsr_for_accounts(
             self,
-            account: ChecksumEthAddress,
-            proxy: ChecksumEthAddress,
-    ) -> DSRAccountReport:
-        """Creates a historical DSR report for a single account
+            proxy_mappings: Dict[ChecksumEthAddress, ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, DSRAccountReport]:
+        """Creates the historical DSR reports of the given accounts
+
+        The pot join/exit events and the vat.move events of all proxies are queried
+        together and the amount of each movement is found by matching its events
+        by block number, transaction index and proxy.
 
         May raise:
         - RemoteError if etherscan is used and there is a problem with
         reaching it or with the returned result.
         """
-        movements = []
-        join_normalized_balances = []
-        exit_normalized_balances = []
+        if len(proxy_mappings) == 0:
+            return {}
+
+        proxies = list(proxy_mappings.values())
         argument_filters = {
-            'sig': '0x049878f3',  # join
-            'usr': proxy,
+            'sig': ['0x049878f3', '0x7f8661a1'],  # join, exit
+            'usr': proxies,
         }
-        join_events = self.ethereum.get_logs(
+        events = self.ethereum.get_logs(
             contract_address=MAKERDAO_POT_ADDRESS,
             abi=MAKERDAO_POT_ABI,
             event_name='LogNote',
             argument_filters=argument_filters,
             from_block=POT_CREATION_BLOCK,
         )
-        for join_event in join_events:
+        timestamps = self.ethereum.get_events_timestamps(events)
+        deposit_values: Dict[Tuple[int, int, ChecksumEthAddress], int] = {}
+        withdrawal_values: Dict[Tuple[int, int, ChecksumEthAddress], int] = {}
+        if len(events) != 0:
+            from_block = min(event['blockNumber'] for event in events)
+            to_block = max(event['blockNumber'] for event in events)
+            deposit_values = self._get_vat_move_values(proxies, True, from_block, to_block)
+            withdrawal_values = self._get_vat_move_values(proxies, False, from_block, to_block)
+
+        proxy_movements: Dict[ChecksumEthAddress, List[DSRMovement]] = defaultdict(list)
+        account_of_proxy = {proxy: account for account, proxy in proxy_mappings.items()}
+        for event, timestamp in zip(events, timestamps):
+            is_join = event['topics'][0].startswith('0x049878f3')
+            event_name = 'join' if is_join else 'exit'
             try:
-                wad_val = hex_or_bytes_to_int(join_event['topics'][2])
+                proxy = hex_or_bytes_to_address(event['topics'][1])
+                wad_val = hex_or_bytes_to_int(event['topics'][2])
             except ConversionError as e:
-                msg = f'Error at reading DSR join event topics. {str(e)}. Skipping event...'
-                self.msg_aggregator.add_error(msg)
-                continue
-            join_normalized_balances.append(wad_val)
-
-            # and now get the deposit amount
-            try:
-                block_number = deserialize_blocknumber(join_event['blockNumber'])
-            except DeserializationError as e:
-                msg = f'Error at reading DSR join event block number. {str(e)}. Skipping event...'
-                self.msg_aggregator.add_error(msg)
-                continue
-            dai_value = self._get_vat_move_event_value(
-                from_address=proxy,
-                to_address=MAKERDAO_POT_ADDRESS,
-                block_number=block_number,
-                transaction_index=join_event['transactionIndex'],
-            )
-            if not dai_value:
                 self.msg_aggregator.add_error(
-                    'Did not find corresponding vat.move event for pot join. Skipping ...',
+                    f'Error at reading DSR {event_name} event topics. {str(e)}. '
+                    f'Skipping event...',
                 )
                 continue
 
-            movements.append(
-                DSRMovement(
-                    movement_type='deposit',
-                    address=account,
-                    normalized_balance=wad_val,
-                    amount=dai_value,
-                    block_number=deserialize_blocknumber(join_event['blockNumber']),
-                    timestamp=self.ethereum.get_event_timestamp(join_event),
-                ),
-            )
-
-        argument_filters = {
-            'sig': '0x7f8661a1',  # exit
-            'usr': proxy,
-        }
-        exit_events = self.ethereum.get_logs(
-            contract_address=MAKERDAO_POT_ADDRESS,
-            abi=MAKERDAO_POT_ABI,
-            event_name='LogNote',
-            argument_filters=argument_filters,
-            from_block=POT_CREATION_BLOCK,
-        )
-        for exit_event in exit_events:
-            try:
-                wad_val = hex_or_bytes_to_int(exit_event['topics'][2])
-            except ConversionError as e:
-                msg = f'Error at reading DSR exit event topics. {str(e)}. Skipping event...'
-                self.msg_aggregator.add_error(msg)
-                continue
-            exit_normalized_balances.append(wad_val)
-
-            try:
-                block_number = deserialize_blocknumber(exit_event['blockNumber'])
-            except DeserializationError as e:
-                msg = f'Error at reading DSR exit event block number. {str(e)}. Skipping event...'
-                self.msg_aggregator.add_error(msg)
-                continue
-
-            # and now get the withdrawal amount
-            dai_value = self._get_vat_move_event_value(
-                from_address=MAKERDAO_POT_ADDRESS,
-                to_address=proxy,
-                block_number=block_number,
-                transaction_index=exit_event['transactionIndex'],
-            )
+            key = (event['blockNumber'], event['transactionIndex'], proxy)
+            dai_value = deposit_values.get(key) if is_join else withdrawal_values.get(key)
             if not dai_value:
                 self.msg_aggregator.add_error(
-                    'Did not find corresponding vat.move event for pot exit. Skipping ...',
+                    f'Did not find corresponding vat.move event for pot {event_name}. '
+                    f'Skipping ...',
                 )
                 continue
 
-            movements.append(
+            proxy_movements[proxy].append(
                 DSRMovement(
-                    movement_type='withdrawal',
-                    address=account,
+                    movement_type='deposit' if is_join else 'withdrawal',
+                    address=account_of_proxy[proxy],
                     normalized_balance=wad_val,
                     amount=dai_value,
-                    block_number=deserialize_blocknumber(exit_event['blockNumber']),
-                    timestamp=self.ethereum.get_event_timestamp(exit_event),
+                    block_number=event['blockNumber'],
+                    timestamp=timestamp,
                 ),
             )
 
-        normalized_balance = 0
-        amount_in_dsr = 0
-        movements.sort(key=lambda x: x.block_number)
-
-        for m in movements:
-            current_chi = FVal(m.amount) / FVal(m.normalized_balance)
-            gain_so_far = normalized_balance * current_chi - amount_in_dsr
-            m.gain_so_far = gain_so_far.to_int(exact=False)
-            if m.movement_type == 'deposit':
-                normalized_balance += m.normalized_balance
-                amount_in_dsr += m.amount
-            else:  # withdrawal
-                amount_in_dsr -= m.amount
-                normalized_balance -= m.normalized_balance
-
         chi = self.ethereum.call_contract(
             contract_address=MAKERDAO_POT_ADDRESS,
             abi=MAKERDAO_POT_ABI,
             method_name='chi',
         )
-        normalized_balance = normalized_balance * chi
-        amount_in_dsr = amount_in_dsr
-        gain = normalized_balance - amount_in_dsr
+        reports = {}
+        for account, proxy in proxy_mappings.items():
+            reports[account] = _dsr_account_report(movements=proxy_movements[proxy], chi=chi)
+            self.database.set_dsr_movements(account, [
+                (m.movement_type, m.normalized_balance, m.amount, m.block_number, m.timestamp)
+                for m in reports[account].movements
+            ])
 
-        return DSRAccountReport(movements=movements, gain_so_far=gain)
+        return reports
 
-    def get_historical_dsr(self) -> Dict[ChecksumEthAddress, DSRAccountReport]:
-        with self.lock:
-            proxy_mappings = self.get_accounts_having_maker_proxy()
-            reports = {}
-            for account, proxy in proxy_mappings.items():
-                report = self._historical_dsr_for_account(account, proxy)
-                reports[account] = report
+    def _sync_dsr_history(self) -> Dict[ChecksumEthAddress, DSRAccountReport]:
+        """Updates the DSR movements and chi values in the DB and returns the
+        historical DSR reports. Must be called with the lock held.
 
+        Since the event logs are cached only the blocks after the last sync are
+        queried for events.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result.
+        """
+        sync_ts = ts_now()
+        proxy_mappings = self.get_accounts_having_maker_proxy()
+        reports = self._historical_dsr_for_accounts(proxy_mappings)
+        self._sync_chi_values()
+        self.last_sync_ts = sync_ts
         return reports
 
-    def _try_get_chi_close_to(self, time: Timestamp) -> FVal:
-        """Best effort attempt to get a chi value close to the given timestamp
+    def get_historical_dsr(self) -> Dict[ChecksumEthAddress, DSRAccountReport]:
+        with self.lock:
+            return self._sync_dsr_history()
 
-        It can't be 100% accurate since we use the logs of join() or exit()
-        in order to find the closest time chi was changed. It also may not work
-        if for some reason there is no logs in the block range we are looking for.
+    def _sync_chi_values(self) -> List[Tuple[Timestamp, int, int]]:
+        """Adds the DSR changes since the last sync to the chi values in the DB
 
-        Better solution would have been an archive node's query.
+        chi only grows with the DSR since the pot creation, so the chi at the time
+        of each DSR change is computed from the previous one. Returns all chi values.
 
         May raise:
-        - RemoteError if there are problems with querying etherscan
-        - ChiRetrievalError if we are unable to query chi at the given timestamp
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result.
         """
-        block_number = self.ethereum.etherscan.get_blocknumber_by_time(time)
-        from_block = max(POT_CREATION_BLOCK, block_number - CHI_BLOCKS_SEARCH_DISTANCE)
-        if self.ethereum.connected:
-            latest_block = self.ethereum.web3.eth.blockNumber
-        else:
-            latest_block = self.ethereum.query_eth_highest_block()
-        to_block = min(latest_block, block_number + CHI_BLOCKS_SEARCH_DISTANCE)
-        join_events = self.ethereum.get_logs(
-            contract_address=MAKERDAO_POT_ADDRESS,
-            abi=MAKERDAO_POT_ABI,
-            event_name='LogNote',
-            argument_filters={'sig': '0x049878f3'},  # join
-            from_block=from_block,
-            to_block=to_block,
-        )
-        exit_events = self.ethereum.get_logs(
+        chi_values = self.database.get_dsr_chi_values()
+        events = self.ethereum.get_logs(
             contract_address=MAKERDAO_POT_ADDRESS,
             abi=MAKERDAO_POT_ABI,
             event_name='LogNote',
-            argument_filters={'sig': '0x7f8661a1'},  # exit
-            from_block=from_block,
-            to_block=to_block,
+            argument_filters={'sig': '0x29ae8114', 'arg1': DSR_FILE_WHAT},  # file
+            from_block=POT_CREATION_BLOCK,
         )
-        events = join_events + exit_events
+        timestamps = self.ethereum.get_events_timestamps(events)
+        # Until the DSR is first set it is 0%
+        last_ts, last_chi, last_dsr = chi_values[-1] if chi_values else (Timestamp(0), RAY, RAY)
+        new_chi_values = []
+        for event, timestamp in sorted(zip(events, timestamps), key=lambda x: x[1]):
+            if timestamp <= last_ts:
+                continue
 
-        # Find the closest event to the block number
-        found_idx = -1
-        min_distance = 99999999
-        for idx, event in enumerate(events):
             try:
-                event_block_number = deserialize_blocknumber(event['blockNumber'])
-            except DeserializationError as e:
-                msg = f'Error at reading DSR drip event block number. {str(e)}'
-                raise ChiRetrievalError(msg)
-
-            this_distance = abs(event_block_number - block_number)
-            if this_distance < min_distance:
-                min_distance = this_distance
-                found_idx = idx
-
-        if found_idx == -1:
-            raise ChiRetrievalError(
-                f'Found no DSR events around timestamp {time}. Cant query chi.',
-            )
+                dsr = hex_or_bytes_to_int(event['topics'][3])
+            except ConversionError as e:
+                self.msg_aggregator.add_error(
+                    f'Error at reading DSR file event topics. {str(e)}. Skipping event...',
+                )
+                continue
 
-        found_event = events[found_idx]
-        event_block_number = deserialize_blocknumber(found_event['blockNumber'])
-        first_topic = found_event['topics'][0]
-        if isinstance(first_topic, bytes):
-            first_topic = first_topic.hex()
-
-        if first_topic.startswith('0x049878f3'):  # join
-            from_address = hex_or_bytes_to_address(found_event['topics'][1])
-            to_address = MAKERDAO_POT_ADDRESS
-        else:
-            from_address = MAKERDAO_POT_ADDRESS
-            to_address = hex_or_bytes_to_address(found_event['topics'][1])
-
-        amount = self._get_vat_move_event_value(
-            from_address=from_address,
-            to_address=to_address,
-            block_number=event_block_number,
-            transaction_index=found_event['transactionIndex'],
-        )
-        if not amount:
-            raise ChiRetrievalError(
-                f'Found no VAT.move events around timestamp {time}. Cant query chi.',
-            )
+            last_chi = _chi_at(last_ts, last_chi, last_dsr, timestamp)
+            last_ts, last_dsr = timestamp, dsr
+            new_chi_values.append((timestamp, last_chi, dsr))
 
-        wad_val = hex_or_bytes_to_int(found_event['topics'][2])
-        chi = FVal(amount) / FVal(wad_val)
-        return chi
+        if len(new_chi_values) != 0:
+            self.database.add_dsr_chi_values(new_chi_values)
 
-    def _get_dsr_account_gain_in_period(
-            self,
-            movements: List[DSRMovement],
-            from_ts: Timestamp,
-            to_ts: Timestamp,
-    ) -> FVal:
-        """Get DSR gain for the account in a given period
-
-        May raise:
-        - ChiRetrievalError if we are unable to query chi at the given timestamp
-        - RemoteError if etherscan is queried and there is a problem with the query
-        """
-        # First events show up ~432000 seconds after deployment
-        if from_ts < POT_CREATION_TIMESTAMP:
-            from_ts = Timestamp(POT_CREATION_TIMESTAMP + 432000)
-
-        if to_ts < POT_CREATION_TIMESTAMP:
-            to_ts = Timestamp(POT_CREATION_TIMESTAMP + 432000)
-
-        from_chi = self._try_get_chi_close_to(from_ts)
-        to_chi = self._try_get_chi_close_to(to_ts)
-        normalized_balance = 0
-        amount_in_dsr = 0
-        gain_at_from_ts = ZERO
-        gain_at_to_ts = ZERO
-        gain_at_from_ts_found = False
-        gain_at_to_ts_found = False
-        for m in movements:
-            if not gain_at_from_ts_found and m.timestamp >= from_ts:
-                gain_at_from_ts = normalized_balance * from_chi - amount_in_dsr
-                gain_at_from_ts_found = True
-
-            if not gain_at_to_ts_found and m.timestamp >= to_ts:
-                gain_at_to_ts = normalized_balance * to_chi - amount_in_dsr
-                gain_at_to_ts_found = True
-
-            if m.movement_type == 'deposit':
-                normalized_balance += m.normalized_balance
-                amount_in_dsr += m.amount
-            else:  # withdrawal
-                amount_in_dsr -= m.amount
-                normalized_balance -= m.normalized_balance
-
-        if not gain_at_from_ts_found:
-            return ZERO
-        if not gain_at_to_ts_found:
-            gain_at_to_ts = normalized_balance * to_chi - amount_in_dsr
-
-        return _dsrdai_to_dai(gain_at_to_ts - gain_at_from_ts)
+        return chi_values + new_chi_values
 
     def get_dsr_gains_in_period(self, from_ts: Timestamp, to_ts: Timestamp) -> FVal:
         """Get DSR gains for all accounts in a given period
 
-        This is a best effort attempt and may also fail due to inability to find
-        the required data via logs
+        The gains are computed from the DSR movements and chi values in the DB.
+        If the period ends after the last sync of the DSR history, the movements
+        and DSR changes since then are synced first.
         """
         with self.lock:
-            history = self.historical_dsr_reports
+            if to_ts > self.last_sync_ts:
+                try:
+                    self._sync_dsr_history()
+                except RemoteError as e:
+                    self.msg_aggregator.add_warning(
+                        f'Failed to sync the DSR history for the DSR gains between '
+                        f'{from_ts} and {to_ts}: {str(e)}. The gains may be incomplete',
+                    )
 
-        gain = ZERO
-        for account, report in history.items():
-            try:
-                gain += self._get_dsr_account_gain_in_period(
-                    movements=report.movements,
-                    from_ts=from_ts,
-                    to_ts=to_ts,
-                )
-            except (ChiRetrievalError, RemoteError) as e:
-                self.msg_aggregator.add_warning(
-                    f'Failed to get DSR gains for {account} between '
-                    f'{from_ts} and {to_ts}: {str(e)}',
-                )
-                continue
+            all_movements = self.database.get_dsr_movements()
+            if len(all_movements) == 0:
+                return ZERO
+
+            chi_values = self.database.get_dsr_chi_values()
+            if len(chi_values) == 0:
+                return ZERO
+
+            accounts = self.database.get_blockchain_accounts().eth
+
+        gain = 0
+        for account in accounts:
+            movements = all_movements.get(account, [])
+            gain += (
+                _dsr_gain_at(movements, chi_values, to_ts) -
+                _dsr_gain_at(movements, chi_values, from_ts)
+            )
 
-        return gain
+        return _dsrdai_to_dai(gain)
 
     # -- Methods following the EthereumModule interface -- #
     def on_startup(self) -> None:
-        self.historical_dsr_reports = self.get_historical_dsr()
+        self.get_historical_dsr()
 
     def on_account_addition(self, address: ChecksumEthAddress) -> None:
         with self.lock:
             proxy = self._get_account_proxy(address)
             if not proxy:
                 return
-            report = self._historical_dsr_for_account(address, proxy)
-            self.historical_dsr_reports[address] = report
+            self._historical_dsr_for_accounts({address: proxy})
 
     def on_account_removal(self, address: ChecksumEthAddress) -> None:
         with self.lock:
-            self.historical_dsr_reports.pop(address, 'None')
+            self.database.set_dsr_movements(address, [])
@@ -1,34 +1,137 @@
+import hashlib
+import itertools
+import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple, Union
+from json.decoder import JSONDecodeError
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import requests
+from gevent.pool import Pool
 from web3 import HTTPProvider, Web3
 from web3._utils.abi import get_abi_output_types
 from web3._utils.contracts import find_matching_event_abi
 from web3._utils.filters import construct_event_filter_params
+from web3.exceptions import BadFunctionCallOutput
 
 from rotkehlchen.assets.asset import EthereumToken
-from rotkehlchen.errors import RemoteError, UnableToDecryptRemoteData
-from rotkehlchen.externalapis.etherscan import Etherscan
+from rotkehlchen.chain.ethereum.block_times import BlockTime, BlockTimeIndex
+from rotkehlchen.constants.ethereum import BALANCE_CHECKER_ABI, BALANCE_CHECKER_ADDRESS
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.errors import DeserializationError, RemoteError, UnableToDecryptRemoteData
+from rotkehlchen.externalapis.etherscan import ETHERSCAN_CONCURRENCY, Etherscan
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.serialization.deserialize import (
+    deserialize_blocknumber,
+    deserialize_int_from_hex,
+)
 from rotkehlchen.typing import ChecksumEthAddress, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import from_wei, request_get_dict
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import rlk_jsonloads
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 DEFAULT_ETH_RPC_TIMEOUT = 10
+# Maximum number of calls sent to the node in a single JSON-RPC batch request
+DEFAULT_ETH_RPC_BATCH_SIZE = 100
+# Logs of the latest blocks are not stored in the DB since they can still be reorganized
+LOGS_CACHE_CONFIRMATIONS = 12
+# Logs are queried in windows of blocks. The windows start with these sizes,
+# double while they contain at most LOGS_SPARSE_WINDOW_RESULTS logs and are split
+# in half when they contain too many logs or the query times out.
+LOGS_NODE_START_WINDOW = 250000
+LOGS_ETHERSCAN_START_WINDOW = 300000
+LOGS_MAX_WINDOW = 4000000
+LOGS_SPARSE_WINDOW_RESULTS = 100
+# How many windows are queried at the same time
+LOGS_NODE_CONCURRENCY = 8
+LOGS_ETHERSCAN_CONCURRENCY = 4
+# Etherscan returns at most this many logs for a query and drops the rest
+ETHERSCAN_LOGS_MAX_RESULTS = 1000
+# Limits for a single call to the balance checker contract. The number of
+# (account, token) pairs keeps the call under the gas limit nodes put on eth_call
+# and the number of addresses keeps the input data small enough for an etherscan query
+BALANCE_CHECKER_MAX_PAIRS = 500
+BALANCE_CHECKER_MAX_ADDRESSES = 100
+BALANCE_CHECKER_MAX_ACCOUNTS = 20
 
 
 def address_to_bytes32(address: ChecksumEthAddress) -> str:
     return '0x' + 24 * '0' + address[2:]
 
 
+def _hex_or_int_to_int(value: Union[int, str], location: str) -> int:
+    """May raise DeserializationError if the value is neither an int nor a hex string"""
+    if isinstance(value, int):
+        return value
+    return deserialize_int_from_hex(value, location=location)
+
+
+def _topic_combinations(topics: List[Any]) -> List[List[Any]]:
+    """Returns the topic filters with a single value per topic that together
+    match the same logs as the given topic filter
+
+    A topic filter can accept any of a list of values for a topic.
+    """
+    return [
+        list(combination) for combination in
+        itertools.product(*[topic if isinstance(topic, list) else [topic] for topic in topics])
+    ]
+
+
+def normalize_log(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Turns a log returned either by web3 or etherscan into a common format
+
+    Byte values, such as the topics, become hex strings and the block number,
+    transaction index and log index become ints. All other values are kept as is.
+    Logs from etherscan also keep their timeStamp.
+
+    May raise:
+    - DeserializationError if the block number, transaction index or log index
+    is not in the expected format
+    """
+    normalized: Dict[str, Any] = {}
+    for key, value in dict(event).items():
+        if isinstance(value, bytes):
+            value = '0x' + bytes(value).hex()
+        elif isinstance(value, (list, tuple)):
+            value = [
+                '0x' + bytes(entry).hex() if isinstance(entry, bytes) else entry
+                for entry in value
+            ]
+        normalized[key] = value
+
+    if 'blockNumber' in normalized:
+        normalized['blockNumber'] = deserialize_blocknumber(normalized['blockNumber'])
+    for key in ('transactionIndex', 'logIndex'):
+        if key in normalized:
+            normalized[key] = _hex_or_int_to_int(normalized[key], location=f'ethereum log {key}')
+
+    return normalized
+
+
+def balance_checker_chunks(
+        accounts: List[ChecksumEthAddress],
+        tokens: List[EthereumToken],
+) -> Iterator[Tuple[List[ChecksumEthAddress], List[EthereumToken]]]:
+    """Splits the accounts and tokens into chunks that can be queried in a single
+    call to the balance checker contract"""
+    accounts_per_call = max(1, min(len(accounts), BALANCE_CHECKER_MAX_ACCOUNTS))
+    tokens_per_call = max(1, min(
+        BALANCE_CHECKER_MAX_ADDRESSES - accounts_per_call,
+        BALANCE_CHECKER_MAX_PAIRS // accounts_per_call,
+    ))
+    for i in range(0, len(accounts), accounts_per_call):
+        for j in range(0, len(tokens), tokens_per_call):
+            yield accounts[i:i + accounts_per_call], tokens[j:j + tokens_per_call]
+
+
 class EthereumManager():
     def __init__(
             self,
@@ -37,6 +140,8 @@ class EthereumManager():
             msg_aggregator: MessagesAggregator,
             attempt_connect: bool = True,
             eth_rpc_timeout: int = DEFAULT_ETH_RPC_TIMEOUT,
+            eth_rpc_batch_size: int = DEFAULT_ETH_RPC_BATCH_SIZE,
+            database: Optional[DBHandler] = None,
     ) -> None:
         self.web3: Web3 = None
         self.rpc_endpoint = ethrpc_endpoint
@@ -44,6 +149,10 @@ class EthereumManager():
         self.etherscan = etherscan
         self.msg_aggregator = msg_aggregator
         self.eth_rpc_timeout = eth_rpc_timeout
+        self.eth_rpc_batch_size = eth_rpc_batch_size
+        self.rpc_session = create_session()
+        self.database = database
+        self.block_times = BlockTimeIndex(database=database)
         if attempt_connect:
             self.attempt_connect(ethrpc_endpoint)
 
@@ -190,6 +299,73 @@ class EthereumManager():
 
         return block_number
 
+    def query_rpc_batch(self, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+        """Sends the given (method, params) calls to the connected node in JSON-RPC batches
+
+        Each batch request holds up to `eth_rpc_batch_size` calls. The results are
+        returned in the order of the given calls.
+
+        May raise:
+        - RemoteError if there is a problem reaching the node, the node returns an
+        unexpected response or any of the calls returns an error
+        """
+        results: List[Any] = []
+        for start in range(0, len(calls), self.eth_rpc_batch_size):
+            batch = calls[start:start + self.eth_rpc_batch_size]
+            payload = [
+                {'jsonrpc': '2.0', 'id': idx, 'method': method, 'params': params}
+                for idx, (method, params) in enumerate(batch)
+            ]
+            log.debug('Querying ethereum node with batch request', calls_num=len(batch))
+            try:
+                response = self.rpc_session.post(
+                    self.web3.provider.endpoint_uri,
+                    json=payload,
+                    timeout=self.eth_rpc_timeout,
+                )
+            except requests.exceptions.RequestException as e:
+                raise RemoteError(f'Ethereum node batch request failed due to {str(e)}')
+
+            if response.status_code != 200:
+                raise RemoteError(
+                    f'Ethereum node batch request failed with HTTP status code '
+                    f'{response.status_code} and text {response.text}',
+                )
+
+            try:
+                # Not decoding with rlk_jsonloads since the hex values must stay strings
+                json_ret = json.loads(response.text)
+            except JSONDecodeError:
+                raise RemoteError(f'Ethereum node returned invalid JSON response: {response.text}')
+
+            if not isinstance(json_ret, list):
+                raise RemoteError(
+                    f'Ethereum node returned unexpected response to a batch request: '
+                    f'{response.text}',
+                )
+
+            # The responses of a batch can come in any order so route them by id
+            batch_results: Dict[int, Any] = {}
+            for entry in json_ret:
+                if 'error' in entry:
+                    raise RemoteError(f'Ethereum node returned error response: {entry}')
+                try:
+                    batch_results[entry['id']] = entry['result']
+                except KeyError as e:
+                    raise RemoteError(
+                        f'Unexpected format of ethereum node response. Missing key '
+                        f'entry for {str(e)}',
+                    )
+
+            if set(batch_results) != set(range(len(batch))):
+                raise RemoteError(
+                    f'Ethereum node returned {len(batch_results)} responses to a batch '
+                    f'request of {len(batch)} calls',
+                )
+            results.extend(batch_results[idx] for idx in range(len(batch)))
+
+        return results
+
     def get_eth_balance(self, account: ChecksumEthAddress) -> FVal:
         """Gets the balance of the given account in ETH
 
@@ -225,8 +401,11 @@ class EthereumManager():
         if not self.connected:
             balances = self.etherscan.get_accounts_balance(accounts)
         else:
-            for account in accounts:
-                amount = FVal(self.web3.eth.getBalance(account))  # pylint: disable=no-member
+            results = self.query_rpc_batch(
+                [('eth_getBalance', [account, 'latest']) for account in accounts],
+            )
+            for account, result in zip(accounts, results):
+                amount = FVal(int(result, 16))
                 log.debug(
                     'Ethereum node balance result',
                     sensitive_log=True,
@@ -278,8 +457,16 @@ class EthereumManager():
                     amount=token_amount,
                 )
         else:
-            for account in accounts:
-                balances[account] = self.etherscan.get_token_balance(token, account)
+            # Etherscan has no multi account token balance endpoint so query the
+            # accounts concurrently. They are all subject to the etherscan rate limit.
+            pool = Pool(ETHERSCAN_CONCURRENCY)
+            # map returns the results in the order of the given accounts
+            results = pool.map(
+                lambda account: self.etherscan.get_token_balance(token, account),
+                accounts,
+            )
+            for account, balance in zip(accounts, results):
+                balances[account] = balance
                 log.debug(
                     'Etherscan result for token balance',
                     sensitive_log=True,
@@ -291,6 +478,99 @@ class EthereumManager():
 
         return balances
 
+    def get_multiaccount_token_balances(
+            self,
+            tokens: List[EthereumToken],
+            accounts: List[ChecksumEthAddress],
+    ) -> Dict[EthereumToken, Dict[ChecksumEthAddress, FVal]]:
+        """Returns the balances of all given accounts in all given tokens
+
+        The balances are queried via the balance checker contract which returns
+        the balances of many (account, token) pairs in a single eth_call. If the
+        contract does not exist in the connected chain, as is the case for local
+        development chains, each token is queried on its own.
+
+        Balance values are normalized through the token decimals and only non
+        zero balances are returned.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried and
+          there is a problem with its query.
+        - BadFunctionCallOutput if a local node is used and the contract for a
+          token has no code. That means the chain is not synced
+        """
+        balances: Dict[EthereumToken, Dict[ChecksumEthAddress, FVal]] = {}
+        if len(tokens) == 0 or len(accounts) == 0:
+            return balances
+
+        try:
+            for accounts_chunk, tokens_chunk in balance_checker_chunks(accounts, tokens):
+                self._query_balance_checker(
+                    accounts=accounts_chunk,
+                    tokens=tokens_chunk,
+                    balances=balances,
+                )
+        except BadFunctionCallOutput:
+            log.debug(
+                'Balance checker contract not found in the connected chain. '
+                'Querying each token separately',
+            )
+            balances = {}
+            for token in tokens:
+                token_balances = self.get_multitoken_balance(token=token, accounts=accounts)
+                token_balances = {
+                    account: amount for account, amount in token_balances.items()
+                    if amount != ZERO
+                }
+                if len(token_balances) != 0:
+                    balances[token] = token_balances
+
+        return balances
+
+    def _query_balance_checker(
+            self,
+            accounts: List[ChecksumEthAddress],
+            tokens: List[EthereumToken],
+            balances: Dict[EthereumToken, Dict[ChecksumEthAddress, FVal]],
+    ) -> None:
+        """Queries the balances of the accounts in the tokens with a single call to the
+        balance checker contract and adds the non zero ones to the balances
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried and
+          there is a problem with its query.
+        - BadFunctionCallOutput if a local node is used and the balance checker
+          contract has no code.
+        """
+        log.debug(
+            'Querying balance checker contract for token balances',
+            sensitive_log=True,
+            eth_addresses=accounts,
+            token_symbols=[token.symbol for token in tokens],
+        )
+        result = self.call_contract(
+            contract_address=BALANCE_CHECKER_ADDRESS,
+            abi=BALANCE_CHECKER_ABI,
+            method_name='balances',
+            arguments=[accounts, [token.ethereum_address for token in tokens]],
+        )
+        if len(result) != len(accounts) * len(tokens):
+            raise RemoteError(
+                f'Balance checker contract returned {len(result)} balances '
+                f'instead of {len(accounts) * len(tokens)}',
+            )
+
+        # The result holds the balances of the first account in all tokens, then the
+        # balances of the second account in all tokens and so on
+        for account_idx, account in enumerate(accounts):
+            for token_idx, token in enumerate(tokens):
+                token_amount = result[account_idx * len(tokens) + token_idx]
+                if token_amount == 0:
+                    continue
+
+                amount = FVal(token_amount) / (FVal(10) ** FVal(token.decimals))
+                balances.setdefault(token, {})[account] = amount
+
     def get_token_balance(
             self,
             token: EthereumToken,
@@ -320,6 +600,69 @@ class EthereumManager():
 
         return self.web3.eth.getBlock(num)  # pylint: disable=no-member
 
+    def get_blocks_timestamps(self, block_numbers: List[int]) -> Dict[int, Timestamp]:
+        """Returns a mapping of the given block numbers to the timestamps of the blocks
+
+        Timestamps already in the block time index are not queried again. The rest
+        are queried, in JSON-RPC batches when connected to a node, and added to it.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried, or the node
+        is queried, and there is a problem with its query.
+        """
+        block_numbers = sorted(set(block_numbers))
+        timestamps = self.block_times.get_timestamps(block_numbers)
+        missing = [number for number in block_numbers if number not in timestamps]
+        if len(missing) == 0:
+            return timestamps
+
+        new_timestamps = {}
+        if not self.connected:
+            for number in missing:
+                block_data = self.etherscan.get_block_by_number(number)
+                new_timestamps[number] = Timestamp(int(block_data['timestamp'], 16))
+        else:
+            results = self.query_rpc_batch(
+                [('eth_getBlockByNumber', [hex(number), False]) for number in missing],
+            )
+            for number, block_data in zip(missing, results):
+                if block_data is None:
+                    raise RemoteError(f'Ethereum node did not return data for block {number}')
+                new_timestamps[number] = Timestamp(int(block_data['timestamp'], 16))
+
+        self.block_times.add_timestamps(new_timestamps)
+        timestamps.update(new_timestamps)
+        return timestamps
+
+    def _get_latest_block(self) -> BlockTime:
+        """Returns the number and the timestamp of the latest block of the connected node"""
+        block_data = self.web3.eth.getBlock('latest')  # pylint: disable=no-member
+        return block_data['number'], Timestamp(block_data['timestamp'])
+
+    def get_blocknumber_by_time(self, ts: Timestamp) -> int:
+        """Returns the number of the last block mined at or before the given timestamp
+
+        When connected to a node the block is searched for starting from the known
+        blocks closest to the timestamp in the block time index, and all queried
+        blocks are added to it. Without a node etherscan is asked for the block
+        number, unless the known blocks are enough to tell it.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried, or the node
+        is queried, and there is a problem with its query.
+        """
+        if self.connected:
+            return self.block_times.find_blocknumber(
+                timestamp=ts,
+                query_timestamp=lambda number: self.get_blocks_timestamps([number])[number],
+                query_latest_block=self._get_latest_block,
+            )
+
+        block_number = self.block_times.get_known_blocknumber(ts)
+        if block_number is None:
+            block_number = self.etherscan.get_blocknumber_by_time(ts)
+        return block_number
+
     def get_code(self, account: ChecksumEthAddress) -> str:
         """Gets the deployment bytecode at the given address
 
@@ -390,17 +733,175 @@ class EthereumManager():
                 arguments=arguments,
             )
 
+    def _query_logs_window(
+            self,
+            contract_address: ChecksumEthAddress,
+            filter_args: Dict[str, Any],
+            from_block: int,
+            to_block: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Queries the logs of a single block window from the node or etherscan
+
+        Returns None if the window contains too many logs to be queried at once
+        and has to be split into smaller windows.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result
+        """
+        can_split = from_block < to_block
+        if self.connected:
+            window_filter_args = {**filter_args, 'fromBlock': from_block, 'toBlock': to_block}
+            log.debug(
+                'Querying node for contract event',
+                contract_address=contract_address,
+                from_block=from_block,
+                to_block=to_block,
+            )
+            try:
+                events = self.web3.eth.getLogs(window_filter_args)
+            except requests.exceptions.Timeout:
+                if not can_split:
+                    raise
+                return None
+            except ValueError as e:
+                # Nodes refuse queries with too many results with error -32005
+                if not can_split or ('-32005' not in str(e) and 'more than' not in str(e)):
+                    raise
+                return None
+        else:
+            events = self.etherscan.get_logs(
+                contract_address=contract_address,
+                topics=filter_args['topics'],
+                from_block=from_block,
+                to_block=to_block,
+            )
+            if len(events) >= ETHERSCAN_LOGS_MAX_RESULTS:
+                # Etherscan silently drops the logs after the maximum
+                if can_split:
+                    return None
+                log.warning(
+                    f'Etherscan returned the maximum of {len(events)} logs for a single '
+                    f'block. Some logs of block {from_block} may be missing',
+                    contract_address=contract_address,
+                )
+
+        logs = []
+        for event in events:
+            try:
+                logs.append(normalize_log(event))
+            except DeserializationError as e:
+                self.msg_aggregator.add_error(
+                    f'Error at reading event log of contract {contract_address}. '
+                    f'{str(e)}. Skipping event...',
+                )
+        return logs
+
+    def _query_logs(
+            self,
+            contract_address: ChecksumEthAddress,
+            filter_args: Dict[str, Any],
+            from_block: int,
+            to_block: int,
+    ) -> List[Dict[str, Any]]:
+        """Queries the logs of the given filter from the node or etherscan
+
+        The range is queried in block windows, a few of them at a time. The windows
+        grow while they contain few logs and windows that contain too many logs
+        or time out are split in half and queried again.
+
+        Topics of the filter can be lists of alternative values. Etherscan does not
+        support those, so for etherscan each combination of values is queried.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result
+        """
+        topic_combinations = _topic_combinations(filter_args['topics'])
+        if not self.connected and len(topic_combinations) > 1:
+            # Etherscan accepts a single value per topic so each combination is queried
+            def query_combination(topics: List[Any]) -> List[Dict[str, Any]]:
+                return self._query_logs(
+                    contract_address=contract_address,
+                    filter_args={**filter_args, 'topics': topics},
+                    from_block=from_block,
+                    to_block=to_block,
+                )
+
+            combinations_pool = Pool(LOGS_ETHERSCAN_CONCURRENCY)
+            events = [
+                event for combination_events in
+                combinations_pool.map(query_combination, topic_combinations)
+                for event in combination_events
+            ]
+            events.sort(key=lambda event: (event['blockNumber'], event['logIndex']))
+            return events
+
+        if self.connected:
+            window_size, concurrency = LOGS_NODE_START_WINDOW, LOGS_NODE_CONCURRENCY
+        else:
+            window_size, concurrency = LOGS_ETHERSCAN_START_WINDOW, LOGS_ETHERSCAN_CONCURRENCY
+
+        def query_window(window: Tuple[int, int]) -> Optional[List[Dict[str, Any]]]:
+            return self._query_logs_window(
+                contract_address=contract_address,
+                filter_args=filter_args,
+                from_block=window[0],
+                to_block=window[1],
+            )
+
+        pool = Pool(concurrency)
+        windows_events: Dict[int, List[Dict[str, Any]]] = {}
+        split_windows: List[Tuple[int, int]] = []
+        next_block = from_block
+        while next_block <= to_block or len(split_windows) != 0:
+            windows = split_windows
+            split_windows = []
+            while len(windows) < concurrency and next_block <= to_block:
+                end_block = min(next_block + window_size - 1, to_block)
+                windows.append((next_block, end_block))
+                next_block = end_block + 1
+
+            # map returns the results in the order of the given windows
+            results = pool.map(query_window, windows)
+            sparse = True
+            for (start_block, end_block), events in zip(windows, results):
+                if events is None:
+                    middle_block = (start_block + end_block) // 2
+                    split_windows.append((start_block, middle_block))
+                    split_windows.append((middle_block + 1, end_block))
+                    window_size = max(1, min(window_size, middle_block - start_block + 1))
+                    sparse = False
+                    continue
+
+                windows_events[start_block] = events
+                if len(events) > LOGS_SPARSE_WINDOW_RESULTS:
+                    sparse = False
+
+            if sparse:
+                window_size = min(window_size * 2, LOGS_MAX_WINDOW)
+
+        return [event for block in sorted(windows_events) for event in windows_events[block]]
+
     def get_logs(
             self,
             contract_address: ChecksumEthAddress,
             abi: List,
             event_name: str,
-            argument_filters: Dict[str, str],
+            argument_filters: Dict[str, Any],
             from_block: int,
             to_block: Union[int, str] = 'latest',
     ) -> List[Dict[str, Any]]:
         """Queries logs of an ethereum contract
 
+        The logs are returned in the same format whether they come from the node or
+        etherscan, as given by normalize_log.
+
+        The logs of each contract and topics filter are stored in the DB along
+        with the block range they were queried for, so repeated queries only query
+        the blocks outside of that range. The newest LOGS_CACHE_CONFIRMATIONS blocks
+        are always queried since they can still be reorganized.
+
         May raise:
         - RemoteError if etherscan is used and there is a problem with
         reaching it or with the returned result
@@ -417,43 +918,75 @@ class EthereumManager():
         if event_abi['anonymous']:
             # web3.py does not handle the anonymous events correctly and adds the first topic
             filter_args['topics'] = filter_args['topics'][1:]
-        events: List[Dict[str, Any]] = []
-        start_block = from_block
-        if self.connected:
-            until_block = self.web3.eth.blockNumber if to_block == 'latest' else to_block
-            while start_block <= until_block:
-                filter_args['fromBlock'] = start_block
-                end_block = min(start_block + 250000, until_block)
-                filter_args['toBlock'] = end_block
-                log.debug(
-                    'Querying node for contract event',
-                    contract_address=contract_address,
-                    event_name=event_name,
-                    argument_filters=argument_filters,
-                    from_block=filter_args['fromBlock'],
-                    to_block=filter_args['toBlock'],
-                )
-                # WTF: for some reason the first time we get in here the loop resets
-                # to the start without querying eth_getLogs and ends up with double logging
-                new_events = self.web3.eth.getLogs(filter_args)
-                start_block = end_block + 1
-                events.extend(new_events)
+
+        if to_block == 'latest':
+            if self.connected:
+                until_block = self.web3.eth.blockNumber  # pylint: disable=no-member
+            else:
+                until_block = self.etherscan.get_latest_block_number()
+            store_until_block = until_block - LOGS_CACHE_CONFIRMATIONS
         else:
-            until_block = (
-                self.etherscan.get_latest_block_number() if to_block == 'latest' else to_block
+            until_block = int(to_block)
+            store_until_block = until_block
+
+        def query_logs(start: int, end: int) -> List[Dict[str, Any]]:
+            log.debug(
+                'Querying contract event logs',
+                contract_address=contract_address,
+                event_name=event_name,
+                argument_filters=argument_filters,
+                from_block=start,
+                to_block=end,
+            )
+            return self._query_logs(
+                contract_address=contract_address,
+                filter_args=filter_args,
+                from_block=start,
+                to_block=end,
+            )
+
+        store_until_block = min(store_until_block, until_block)
+        if self.database is None or store_until_block < from_block:
+            return query_logs(from_block, until_block)
+
+        topics_hash = hashlib.sha256(json.dumps(filter_args['topics']).encode()).hexdigest()
+        query_key = f'{contract_address}_{topics_hash[:16]}'
+        stored_range = self.database.get_ethereum_logs_range(query_key)
+        new_logs = []
+        touches_stored_range = (
+            stored_range is not None and
+            from_block <= stored_range[1] + 1 and
+            store_until_block >= stored_range[0] - 1
+        )
+        if stored_range is None or not touches_stored_range:
+            # Start a new stored range since filling the gap to the old one could be costly
+            range_start, range_end = from_block, store_until_block
+            new_logs = query_logs(range_start, range_end)
+        else:
+            range_start = min(from_block, stored_range[0])
+            range_end = max(store_until_block, stored_range[1])
+            if range_start < stored_range[0]:
+                new_logs.extend(query_logs(range_start, stored_range[0] - 1))
+            if range_end > stored_range[1]:
+                new_logs.extend(query_logs(stored_range[1] + 1, range_end))
+
+        if stored_range != (range_start, range_end):
+            self.database.add_ethereum_logs(
+                query_key=query_key,
+                logs=new_logs,
+                from_block=range_start,
+                to_block=range_end,
             )
-            while start_block <= until_block:
-                end_block = min(start_block + 300000, until_block)
-                new_events = self.etherscan.get_logs(
-                    contract_address=contract_address,
-                    topics=filter_args['topics'],
-                    from_block=start_block,
-                    to_block=end_block,
-                )
-                start_block = end_block + 1
-                events.extend(new_events)
 
-        return events
+        logs = self.database.get_ethereum_logs(
+            query_key=query_key,
+            from_block=from_block,
+            to_block=store_until_block,
+        )
+        if until_block > store_until_block:
+            logs.extend(query_logs(store_until_block + 1, until_block))
+
+        return logs
 
     def get_event_timestamp(self, event: Dict[str, Any]) -> Timestamp:
         """Reads an event returned either by etherscan or web3 and gets its timestamp
@@ -461,11 +994,35 @@ class EthereumManager():
         Etherscan events contain a timestamp. Normal web3 events don't so it needs to
         be queried from the block number
         """
-        if 'timeStamp' in event:
-            # event from etherscan
-            return Timestamp(int(event['timeStamp'], 16))
-
-        # event from web3
-        block_number = event['blockNumber']
-        block_data = self.get_block_by_number(block_number)
-        return Timestamp(block_data['timestamp'])
+        return self.get_events_timestamps([event])[0]
+
+    def get_events_timestamps(self, events: List[Dict[str, Any]]) -> List[Timestamp]:
+        """Returns the timestamps of the given etherscan or web3 events in order
+
+        The timestamps that etherscan events contain are added to the block time
+        index. The blocks of the web3 events are looked up in the index and the
+        rest are queried together in JSON-RPC batches instead of one by one.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried, or the node
+        is queried, and there is a problem with its query.
+        """
+        etherscan_timestamps = {}
+        for event in events:
+            if 'timeStamp' not in event:
+                continue
+            try:
+                block_number = deserialize_blocknumber(event['blockNumber'])
+            except DeserializationError:
+                continue
+            etherscan_timestamps[block_number] = Timestamp(int(event['timeStamp'], 16))
+        self.block_times.add_timestamps(etherscan_timestamps)
+
+        blocks_timestamps = self.get_blocks_timestamps(
+            [event['blockNumber'] for event in events if 'timeStamp' not in event],
+        )
+        return [
+            Timestamp(int(event['timeStamp'], 16)) if 'timeStamp' in event
+            else blocks_timestamps[event['blockNumber']]
+            for event in events
+        ]
@@ -5,15 +5,16 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union, overload
 
-import requests
 from web3.exceptions import BadFunctionCallOutput
 
 from rotkehlchen.assets.asset import Asset, EthereumToken
+from rotkehlchen.chain.bitcoin import get_bitcoin_addresses_balances
 from rotkehlchen.chain.ethereum.makerdao import MakerDAO
 from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_REP
 from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.db.utils import BlockchainAccounts
-from rotkehlchen.errors import EthSyncError, InputError, RemoteError, UnableToDecryptRemoteData
+from rotkehlchen.errors import EthSyncError, InputError, RemoteError
 from rotkehlchen.externalapis.alethio import Alethio
 from rotkehlchen.fval import FVal
 from rotkehlchen.greenlets import GreenletManager
@@ -34,7 +35,6 @@ from rotkehlchen.utils.interfaces import (
     cache_response_timewise,
     protect_with_lock,
 )
-from rotkehlchen.utils.misc import request_get_dict, request_get_direct, satoshis_to_btc
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager
@@ -144,11 +144,13 @@ class ChainManager(CacheableObject, LockableQueryObject):
             msg_aggregator: MessagesAggregator,
             alethio: Alethio,
             greenlet_manager: GreenletManager,
+            database: DBHandler,
             eth_modules: Optional[List[str]] = None,
     ):
         super().__init__()
         self.ethereum = ethereum_manager
         self.alethio = alethio
+        self.database = database
         self.msg_aggregator = msg_aggregator
         self.owned_eth_tokens = owned_eth_tokens
         self.accounts = blockchain_accounts
@@ -161,10 +163,9 @@ class ChainManager(CacheableObject, LockableQueryObject):
         if eth_modules:
             for given_module in eth_modules:
                 if given_module == 'makerdao':
-                    assert self.alethio.db, 'Alethio should have an instantiated DB'
                     self.eth_modules['makerdao'] = MakerDAO(
                         ethereum_manager=ethereum_manager,
-                        database=self.alethio.db,
+                        database=self.database,
                         msg_aggregator=msg_aggregator,
                     )
         self.greenlet_manager = greenlet_manager
@@ -222,32 +223,19 @@ class ChainManager(CacheableObject, LockableQueryObject):
 
         return self.get_balances_update()
 
-    @staticmethod
-    def query_btc_account_balance(account: BTCAddress) -> FVal:
-        """Queries blockchain.info for the balance of account
+    def query_btc_accounts_balances(self, accounts: List[BTCAddress]) -> Dict[BTCAddress, FVal]:
+        """Queries blockchain.info and blockcypher for the balances of the given accounts
+
+        If a query fails the last balances of the accounts saved in the DB are used
 
         May raise:
         - RemotError if there is a problem querying blockchain.info or blockcypher
         """
-        try:
-            if account.lower()[0:3] == 'bc1':
-                url = f'https://api.blockcypher.com/v1/btc/main/addrs/{account.lower()}/balance'
-                response_data = request_get_dict(url=url)
-                if 'balance' not in response_data:
-                    raise RemoteError(f'Unexpected blockcypher balance response: {response_data}')
-                btc_resp = response_data['balance']
-            else:
-                btc_resp = request_get_direct(
-                    url='https://blockchain.info/q/addressbalance/%s' % account,
-                    handle_429=True,
-                    # If we get a 429 then their docs suggest 10 seconds
-                    # https://blockchain.info/q
-                    backoff_in_seconds=10,
-                )
-        except (requests.exceptions.ConnectionError, UnableToDecryptRemoteData) as e:
-            raise RemoteError(f'bitcoin external API request failed due to {str(e)}')
-
-        return satoshis_to_btc(FVal(btc_resp))  # result is in satoshis
+        return get_bitcoin_addresses_balances(
+            accounts=accounts,
+            database=self.database,
+            msg_aggregator=self.msg_aggregator,
+        )
 
     def query_btc_balances(self) -> None:
         """Queries blockchain.info for the balance of all BTC accounts
@@ -261,9 +249,9 @@ class ChainManager(CacheableObject, LockableQueryObject):
         self.balances.btc = {}
         btc_usd_price = Inquirer().find_usd_price(A_BTC)
         total = FVal(0)
+        balances = self.query_btc_accounts_balances(self.accounts.btc)
         for account in self.accounts.btc:
-            balance = self.query_btc_account_balance(account)
-
+            balance = balances[account]
             total += balance
             self.balances.btc[account] = Balance(
                 amount=balance,
@@ -354,8 +342,12 @@ class ChainManager(CacheableObject, LockableQueryObject):
             # balance query first in order to create the eth_balances mappings
             self.query_ethereum_balances()
 
+        token_usd_price, price_errors = Inquirer().find_usd_prices(tokens)
+        if len(price_errors) != 0:
+            raise RemoteError(next(iter(price_errors.values())))
+
         for token in tokens:
-            usd_price = Inquirer().find_usd_price(token)
+            usd_price = token_usd_price[token]
             for account, account_data in self.balances.eth.items():
                 if token not in account_data.asset_balances:
                     continue
@@ -395,7 +387,7 @@ class ChainManager(CacheableObject, LockableQueryObject):
         # Query the balance of the account except for the case when it's removed
         # and there is no other account in the balances
         if append_or_remove == 'append' or remove_with_populated_balance:
-            balance = self.query_btc_account_balance(account)
+            balance = self.query_btc_accounts_balances([account])[account]
             usd_balance = balance * btc_usd_price
 
         if append_or_remove == 'append':
@@ -635,7 +627,6 @@ class ChainManager(CacheableObject, LockableQueryObject):
         May raise:
         - RemoteError if there is a problem with querying alethio
         """
-        token_usd_price: Dict[EthereumToken, Price] = {}
         token_totals: Dict[EthereumToken, FVal] = defaultdict(FVal)
         eth_balances = self.balances.eth
 
@@ -644,8 +635,10 @@ class ChainManager(CacheableObject, LockableQueryObject):
         else:
             accounts = given_accounts
 
+        account_balances: Dict[ChecksumEthAddress, List[Tuple[EthereumToken, FVal]]] = {}
         for account in accounts:
             balances = self.alethio.get_token_balances(account)
+            account_balances[account] = []
             for token, balance in balances.items():
                 if token.identifier == 'REP-old':
                     # Handle the special case for the Alethio old REP bug
@@ -658,26 +651,28 @@ class ChainManager(CacheableObject, LockableQueryObject):
                     token = A_REP
 
                 if balance != ZERO:
-                    try:
-                        usd_price = token_usd_price.get(
-                            token,
-                            Inquirer().find_usd_price(token),
-                        )
-                    except RemoteError:
-                        usd_price = Price(ZERO)
-
-                    token_usd_price[token] = usd_price
-                    if usd_price == ZERO:
-                        # skip tokens that have no price
-                        continue
-                    usd_value = balance * usd_price
-                    if action == AccountAction.QUERY or action == AccountAction.APPEND:
-                        eth_balances[account].asset_balances[token] = Balance(
-                            amount=balance,
-                            usd_value=usd_value,
-                        )
-                        eth_balances[account].increase_total_usd_value(usd_value)
-                    token_totals[token] = token_totals[token] + balance
+                    account_balances[account].append((token, balance))
+
+        # Price all the tokens found in all accounts at once
+        # Tokens whose price could not be queried are missing from the prices
+        token_usd_price, _ = Inquirer().find_usd_prices(
+            token for pairs in account_balances.values() for token, _ in pairs
+        )
+
+        for account, token_balance_pairs in account_balances.items():
+            for token, balance in token_balance_pairs:
+                usd_price = token_usd_price.get(token, Price(ZERO))
+                if usd_price == ZERO:
+                    # skip tokens that have no price
+                    continue
+                usd_value = balance * usd_price
+                if action == AccountAction.QUERY or action == AccountAction.APPEND:
+                    eth_balances[account].asset_balances[token] = Balance(
+                        amount=balance,
+                        usd_value=usd_value,
+                    )
+                    eth_balances[account].increase_total_usd_value(usd_value)
+                token_totals[token] = token_totals[token] + balance
 
         add_or_sub: Optional[Callable[[Any, Any], Any]]
         if action == AccountAction.APPEND:
@@ -726,43 +721,45 @@ class ChainManager(CacheableObject, LockableQueryObject):
         client and the chain is not synced
         """
         token_balances: Dict[EthereumToken, Dict[ChecksumEthAddress, FVal]] = {}
-        token_usd_price = {}
 
         if given_accounts is None:
             accounts = self.accounts.eth
         else:
             accounts = given_accounts
 
+        # Tokens whose price could not be queried are missing from the prices
+        token_usd_price, _ = Inquirer().find_usd_prices(tokens)
+
+        query_tokens = []
         for token in tokens:
-            try:
-                usd_price = Inquirer().find_usd_price(token)
-            except RemoteError:
-                usd_price = Price(ZERO)
-            if usd_price == ZERO:
+            if token_usd_price.get(token, ZERO) == ZERO:
                 # skip tokens that have no price
                 continue
-            token_usd_price[token] = usd_price
 
             if action == AccountAction.REMOVE and token not in self.totals:
                 # If we remove an account, and the token has no totals entry skip
                 token_balances[token] = {}
                 continue
 
-            try:
-                token_balances[token] = ChainManager._query_token_balances(
-                    token_asset=token,
-                    query_callback=self.ethereum.get_multitoken_balance,
-                    argument=accounts,
-                )
-            except BadFunctionCallOutput as e:
-                log.error(
-                    'Assuming unsynced chain. Got web3 BadFunctionCallOutput '
-                    'exception: {}'.format(str(e)),
-                )
-                raise EthSyncError(
-                    'Tried to use the ethereum chain of the provided client to query '
-                    'token balances but the chain is not synced.',
-                )
+            query_tokens.append(token)
+
+        try:
+            queried_balances = self.ethereum.get_multiaccount_token_balances(
+                tokens=query_tokens,
+                accounts=accounts,
+            )
+        except BadFunctionCallOutput as e:
+            log.error(
+                'Assuming unsynced chain. Got web3 BadFunctionCallOutput '
+                'exception: {}'.format(str(e)),
+            )
+            raise EthSyncError(
+                'Tried to use the ethereum chain of the provided client to query '
+                'token balances but the chain is not synced.',
+            )
+
+        for token in query_tokens:
+            token_balances[token] = queried_balances.get(token, {})
 
         add_or_sub: Optional[Callable[[Any, Any], Any]]
         if action == AccountAction.APPEND:
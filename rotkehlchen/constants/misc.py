@@ -17,6 +17,9 @@ CURRENCYCONVERTER_API_KEY = '7ad371210f296db27c19'
 
 ZERO = FVal(0)
 
+# How many exchange history endpoint queries run at the same time by default
+DEFAULT_HISTORY_QUERY_CONCURRENCY = 4
+
 
 # API URLS
 KRAKEN_BASE_URL = 'https://api.kraken.com'
@@ -14,3 +14,9 @@ QUERY_RETRY_TIMES = 5
 # By default 10 minutes.
 # TODO: Make configurable!
 CACHE_RESPONSE_FOR_SECS = 600
+
+# Seconds for which a queried current price of an asset is reused by default
+DEFAULT_CURRENT_PRICE_CACHE_TTL = 300
+
+# Seconds a single location (exchange, blockchains, banks) is given to return its balances
+BALANCE_QUERY_LOCATION_TIMEOUT = 180
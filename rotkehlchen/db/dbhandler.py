@@ -1,4 +1,5 @@
 import hashlib
+import json
 import logging
 import os
 import re
@@ -68,7 +69,9 @@ from rotkehlchen.typing import (
     ApiKey,
     ApiSecret,
     BlockchainAccountData,
+    BTCAddress,
     ChecksumAddress,
+    ChecksumEthAddress,
     EthereumTransaction,
     ExternalService,
     ExternalServiceApiCredentials,
@@ -599,6 +602,29 @@ class DBHandler:
         )
         return [Asset(q[0]) for q in cursor]
 
+    def add_binance_traded_symbols(self, symbols: List[str]) -> None:
+        """Remembers the binance symbols the user has trades in"""
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO multisettings(name, value) VALUES(?, ?)',
+            [('binance_traded_symbol', symbol) for symbol in symbols],
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_binance_traded_symbols(self) -> List[str]:
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT value FROM multisettings WHERE name="binance_traded_symbol";',
+        )
+        return [q[0] for q in query]
+
+    def delete_binance_traded_symbols(self) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM multisettings WHERE name="binance_traded_symbol";')
+        self.conn.commit()
+        self.update_last_write()
+
     def add_multiple_balances(self, balances: List[AssetBalance]) -> None:
         """Execute addition of multiple balances in the DB"""
         cursor = self.conn.cursor()
@@ -644,6 +670,232 @@ class DBHandler:
         self.conn.commit()
         self.update_last_write()
 
+    def get_ethereum_transactions_last_block(
+            self,
+            address: ChecksumEthAddress,
+            internal: bool,
+    ) -> Optional[int]:
+        """Returns the last block up to which the normal or internal transactions
+        of the address have been queried, if they ever were"""
+        query_range = self.get_used_query_range(
+            f'{"ethinternaltxs" if internal else "ethtxs"}_{address}',
+        )
+        return None if query_range is None else int(query_range[1])
+
+    def update_ethereum_transactions_last_block(
+            self,
+            address: ChecksumEthAddress,
+            internal: bool,
+            block_number: int,
+    ) -> None:
+        self.update_used_query_range(
+            name=f'{"ethinternaltxs" if internal else "ethtxs"}_{address}',
+            start_ts=Timestamp(0),
+            end_ts=Timestamp(block_number),
+        )
+
+    def add_block_timestamps(self, block_timestamps: Dict[int, Timestamp]) -> None:
+        """Remembers the timestamps of the given ethereum block numbers"""
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO ethereum_block_timestamps(block_number, timestamp) '
+            'VALUES(?, ?)',
+            list(block_timestamps.items()),
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_block_timestamps(self, block_numbers: List[int]) -> Dict[int, Timestamp]:
+        """Returns the known timestamps of the given ethereum block numbers"""
+        cursor = self.conn.cursor()
+        result = {}
+        # Stay under the maximum number of host parameters of an SQLite query
+        for start in range(0, len(block_numbers), 500):
+            chunk = block_numbers[start:start + 500]
+            query = cursor.execute(
+                f'SELECT block_number, timestamp FROM ethereum_block_timestamps '
+                f'WHERE block_number IN ({",".join("?" * len(chunk))})',
+                chunk,
+            )
+            for entry in query:
+                result[entry[0]] = Timestamp(entry[1])
+
+        return result
+
+    def get_closest_block_timestamps(
+            self,
+            timestamp: Timestamp,
+    ) -> Tuple[Optional[Tuple[int, Timestamp]], Optional[Tuple[int, Timestamp]]]:
+        """Returns the known ethereum blocks closest to the given timestamp
+
+        The first is the last known block mined at or before the timestamp and the
+        second the first known block mined after it. Each is a tuple of block number
+        and timestamp or None if no such block is known.
+        """
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT block_number, timestamp FROM ethereum_block_timestamps '
+            'WHERE timestamp <= ? ORDER BY block_number DESC LIMIT 1',
+            (timestamp,),
+        )
+        before = query.fetchone()
+        query = cursor.execute(
+            'SELECT block_number, timestamp FROM ethereum_block_timestamps '
+            'WHERE timestamp > ? ORDER BY block_number ASC LIMIT 1',
+            (timestamp,),
+        )
+        after = query.fetchone()
+        return (
+            None if before is None else (before[0], Timestamp(before[1])),
+            None if after is None else (after[0], Timestamp(after[1])),
+        )
+
+    def add_ethereum_logs(
+            self,
+            query_key: str,
+            logs: List[Dict[str, Any]],
+            from_block: int,
+            to_block: int,
+    ) -> None:
+        """Stores the ethereum logs of a query and the block range they were queried for
+
+        The given range replaces any previously stored range of the query.
+        """
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO ethereum_logs(query_key, block_number, log_index, log) '
+            'VALUES(?, ?, ?, ?)',
+            [
+                (query_key, entry['blockNumber'], entry['logIndex'], json.dumps(entry))
+                for entry in logs
+            ],
+        )
+        cursor.execute(
+            'INSERT OR REPLACE INTO used_query_ranges(name, start_ts, end_ts) VALUES (?, ?, ?)',
+            (f'ethereumlogs_{query_key}', str(from_block), str(to_block)),
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_ethereum_logs_range(self, query_key: str) -> Optional[Tuple[int, int]]:
+        """Returns the block range for which the ethereum logs of a query are stored"""
+        query_range = self.get_used_query_range(f'ethereumlogs_{query_key}')
+        if query_range is None:
+            return None
+
+        return int(query_range[0]), int(query_range[1])
+
+    def get_ethereum_logs(
+            self,
+            query_key: str,
+            from_block: int,
+            to_block: int,
+    ) -> List[Dict[str, Any]]:
+        """Returns the stored ethereum logs of a query within the given block range"""
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT log FROM ethereum_logs WHERE query_key=? AND block_number>=? '
+            'AND block_number<=? ORDER BY block_number ASC, log_index ASC',
+            (query_key, from_block, to_block),
+        )
+        return [json.loads(entry[0]) for entry in query]
+
+    def add_dsr_chi_values(self, chi_values: List[Tuple[Timestamp, int, int]]) -> None:
+        """Stores (timestamp, chi, dsr) entries of the MakerDAO pot
+
+        Each entry is the chi at the timestamp and the DSR in effect from then on.
+        """
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO dsr_chi_values(timestamp, chi, dsr) VALUES(?, ?, ?)',
+            [(timestamp, str(chi), str(dsr)) for timestamp, chi, dsr in chi_values],
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_dsr_chi_values(self) -> List[Tuple[Timestamp, int, int]]:
+        """Returns all stored (timestamp, chi, dsr) entries ordered by timestamp"""
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT timestamp, chi, dsr FROM dsr_chi_values ORDER BY timestamp ASC',
+        )
+        return [(Timestamp(entry[0]), int(entry[1]), int(entry[2])) for entry in query]
+
+    def set_dsr_movements(
+            self,
+            address: ChecksumEthAddress,
+            movements: List[Tuple[str, int, int, int, Timestamp]],
+    ) -> None:
+        """Replaces the stored DSR movements of an account
+
+        Each movement is a tuple of movement type, normalized balance, amount,
+        block number and timestamp.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM dsr_movements WHERE address = ?;', (address,))
+        cursor.executemany(
+            'INSERT OR REPLACE INTO dsr_movements(address, movement_type, '
+            'normalized_balance, amount, block_number, timestamp) VALUES(?, ?, ?, ?, ?, ?)',
+            [
+                (address, movement_type, str(normalized_balance), str(amount), block, ts)
+                for movement_type, normalized_balance, amount, block, ts in movements
+            ],
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def add_btc_address_balances(
+            self,
+            balances: Dict[BTCAddress, FVal],
+            timestamp: Timestamp,
+    ) -> None:
+        """Stores the last queried balance of each of the given BTC addresses"""
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO btc_address_balances(address, balance, timestamp) '
+            'VALUES(?, ?, ?)',
+            [(address, str(balance), timestamp) for address, balance in balances.items()],
+        )
+        self.conn.commit()
+        self.update_last_write()
+
+    def get_btc_address_balances(
+            self,
+            addresses: List[BTCAddress],
+    ) -> Dict[BTCAddress, Tuple[FVal, Timestamp]]:
+        """Returns the last stored balance and its query timestamp for the given BTC addresses
+
+        Addresses whose balance was never stored are not in the result.
+        """
+        cursor = self.conn.cursor()
+        result = {}
+        for address in addresses:
+            query = cursor.execute(
+                'SELECT balance, timestamp FROM btc_address_balances WHERE address = ?',
+                (address,),
+            ).fetchone()
+            if query is not None:
+                result[address] = (FVal(query[0]), Timestamp(query[1]))
+
+        return result
+
+    def get_dsr_movements(
+            self,
+    ) -> Dict[ChecksumEthAddress, List[Tuple[str, int, int, int, Timestamp]]]:
+        """Returns the stored DSR movements of each account ordered by block number"""
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT address, movement_type, normalized_balance, amount, block_number, '
+            'timestamp FROM dsr_movements ORDER BY block_number ASC',
+        )
+        movements: Dict[ChecksumEthAddress, List[Tuple[str, int, int, int, Timestamp]]] = {}
+        for entry in query:
+            movements.setdefault(entry[0], []).append(
+                (entry[1], int(entry[2]), int(entry[3]), entry[4], Timestamp(entry[5])),
+            )
+
+        return movements
+
     def get_last_balance_save_time(self) -> Timestamp:
         cursor = self.conn.cursor()
         query = cursor.execute(
@@ -793,6 +1045,11 @@ class DBHandler:
                 f'Tried to remove {len(accounts) - affected_rows} '
                 f'f{blockchain.value} accounts that do not exist',
             )
+        if blockchain == SupportedBlockchain.BITCOIN:
+            cursor.executemany(
+                'DELETE FROM btc_address_balances WHERE address = ?;',
+                [(x,) for x in accounts],
+            )
 
         self.conn.commit()
         self.update_last_write()
@@ -1170,9 +1427,8 @@ class DBHandler:
                                 pass
 
                         # if we reach here it means the transaction is already in the DB
-                        # But this can't be avoided with the way we query etherscan
-                        # right now since we don't query transactions in a specific
-                        # time range, so duplicate addition attempts can happen.
+                        # This can happen when a transaction is between two of the
+                        # accounts so it's in the etherscan results of both.
                         string_repr = db_tuple_to_str(entry, tuple_type)
                         logger.debug(
                             f'Did not add "{string_repr}" to the DB since'
@@ -1382,10 +1638,16 @@ class DBHandler:
         is an etherscan query. This is used to determine how we should handle the
         transactions with nonce "-1" as this is how we currently identify internal
         ethereum transactions from etherscan.
+
+        Transactions that already exist in the DB are ignored.
         """
         tx_tuples: List[Tuple[Any, ...]] = []
+        internal_tx_tuples: List[Tuple[Any, ...]] = []
         for tx in ethereum_transactions:
-            tx_tuples.append((
+            # Only the internal transactions need the special duplicate handling
+            # of write_tuples. All others are written in one go.
+            tuples = internal_tx_tuples if tx.nonce == -1 else tx_tuples
+            tuples.append((
                 tx.tx_hash,
                 tx.timestamp,
                 tx.block_number,
@@ -1414,21 +1676,28 @@ class DBHandler:
               nonce)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
+        cursor = self.conn.cursor()
+        cursor.executemany(query.replace('INSERT INTO', 'INSERT OR IGNORE INTO'), tx_tuples)
+        self.conn.commit()
         self.write_tuples(
             tuple_type='ethereum_transaction',
             query=query,
-            tuples=tx_tuples,
+            tuples=internal_tx_tuples,
             from_etherscan=from_etherscan,
         )
+        # The transactions also tell us the timestamps of their blocks
+        self.add_block_timestamps({tx.block_number: tx.timestamp for tx in ethereum_transactions})
 
     def get_ethereum_transactions(
             self,
             from_ts: Optional[Timestamp] = None,
             to_ts: Optional[Timestamp] = None,
-            address: Optional[ChecksumAddress] = None,
+            addresses: Optional[List[ChecksumAddress]] = None,
     ) -> List[EthereumTransaction]:
-        """Returns a list of ethereum transactions optionally filtered by time and/or from address
+        """Returns a list of ethereum transactions optionally filtered by time and/or
+        addresses, any of which can be either the sender or the receiver
 
+        Each transaction is returned once, even if it's between two of the addresses.
         The returned list is ordered from oldest to newest
         """
         cursor = self.conn.cursor()
@@ -1445,10 +1714,16 @@ class DBHandler:
               input_data,
               nonce FROM ethereum_transactions
         """
-        if address is not None:
-            query += f'WHERE from_address="{address}" '
+        address_bindings: List[ChecksumAddress] = []
+        if addresses is not None:
+            questionmarks = ','.join('?' * len(addresses))
+            query += (
+                f'WHERE (from_address IN ({questionmarks}) OR '
+                f'to_address IN ({questionmarks})) '
+            )
+            address_bindings = addresses + addresses
         query, bindings = form_query_to_filter_timestamps(query, 'timestamp', from_ts, to_ts)
-        results = cursor.execute(query, bindings)
+        results = cursor.execute(query, (*address_bindings, *bindings))
 
         ethereum_transactions = []
         for result in results:
@@ -90,7 +90,7 @@ def form_query_to_filter_timestamps(
             query += f'AND {timestamp_attribute} <= ? '
             bindings = (from_ts, to_ts)
     elif got_to_ts:
-        query += f'AND {timestamp_attribute} <= ? '
+        query += f'{timestamp_attribute} <= ? '
         bindings = (to_ts,)
 
     query += f'ORDER BY {timestamp_attribute} ASC;'
@@ -342,6 +342,51 @@ CREATE TABLE IF NOT EXISTS ethereum_transactions (
 );
 """
 
+DB_CREATE_ETHEREUM_BLOCK_TIMESTAMPS = """
+CREATE TABLE IF NOT EXISTS ethereum_block_timestamps (
+    block_number INTEGER NOT NULL PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+"""
+
+DB_CREATE_ETHEREUM_LOGS = """
+CREATE TABLE IF NOT EXISTS ethereum_logs (
+    query_key TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    log TEXT NOT NULL,
+    PRIMARY KEY(query_key, block_number, log_index)
+);
+"""
+
+DB_CREATE_DSR_CHI_VALUES = """
+CREATE TABLE IF NOT EXISTS dsr_chi_values (
+    timestamp INTEGER NOT NULL PRIMARY KEY,
+    chi TEXT NOT NULL,
+    dsr TEXT NOT NULL
+);
+"""
+
+DB_CREATE_DSR_MOVEMENTS = """
+CREATE TABLE IF NOT EXISTS dsr_movements (
+    address VARCHAR[42] NOT NULL,
+    movement_type TEXT NOT NULL,
+    normalized_balance TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY(address, block_number, movement_type, normalized_balance)
+);
+"""
+
+DB_CREATE_BTC_ADDRESS_BALANCES = """
+CREATE TABLE IF NOT EXISTS btc_address_balances (
+    address TEXT NOT NULL PRIMARY KEY,
+    balance TEXT NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+"""
+
 DB_CREATE_USED_QUERY_RANGES = """
 CREATE TABLE IF NOT EXISTS used_query_ranges (
     name VARCHAR[24] NOT NULL PRIMARY KEY,
@@ -360,7 +405,7 @@ CREATE TABLE IF NOT EXISTS settings (
 DB_SCRIPT_CREATE_TABLES = """
 PRAGMA foreign_keys=off;
 BEGIN TRANSACTION;
-{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}
+{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}
 COMMIT;
 PRAGMA foreign_keys=on;
 """.format(
@@ -377,6 +422,11 @@ PRAGMA foreign_keys=on;
     DB_CREATE_CURRENT_BALANCES,
     DB_CREATE_TRADES,
     DB_CREATE_ETHEREUM_TRANSACTIONS,
+    DB_CREATE_ETHEREUM_BLOCK_TIMESTAMPS,
+    DB_CREATE_ETHEREUM_LOGS,
+    DB_CREATE_DSR_CHI_VALUES,
+    DB_CREATE_DSR_MOVEMENTS,
+    DB_CREATE_BTC_ADDRESS_BALANCES,
     DB_CREATE_MARGIN,
     DB_CREATE_ASSET_MOVEMENTS,
     DB_CREATE_USED_QUERY_RANGES,
@@ -5,8 +5,8 @@ from json.decoder import JSONDecodeError
 from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import gevent
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 
 from rotkehlchen.assets.converters import asset_from_binance
 from rotkehlchen.constants import BINANCE_BASE_URL
@@ -31,7 +31,8 @@ from rotkehlchen.serialization.deserialize import (
 from rotkehlchen.typing import ApiKey, ApiSecret, AssetMovementCategory, Fee, Location, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.interfaces import cache_response_timewise, protect_with_lock
-from rotkehlchen.utils.misc import ts_now_in_ms
+from rotkehlchen.utils.misc import ts_now, ts_now_in_ms
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 from rotkehlchen.utils.serialization import rlk_jsonloads
 
 if TYPE_CHECKING:
@@ -55,6 +56,20 @@ WAPI_ENDPOINTS = (
     'withdrawHistory.html',
 )
 
+# The request weight of the endpoints that don't weigh 1. Binance allows a
+# request weight of 1200 per minute per IP
+# https://github.com/binance-exchange/binance-official-api-docs/blob/master/rest-api.md#limits
+BINANCE_REQUEST_WEIGHTS = {
+    'account': 5,
+    'myTrades': 5,
+    'openOrders': 40,
+}
+# How many symbols are queried for trades at the same time
+BINANCE_MYTRADES_CONCURRENCY = 5
+# Seconds after which the trades of all symbols are queried again, to find
+# symbols traded since the last full scan whose assets are no longer held
+BINANCE_SYMBOLS_FULL_SCAN_INTERVAL = 7 * 24 * 60 * 60
+
 
 class BinancePair(NamedTuple):
     """A binance pair. Contains the symbol in the Binance mode e.g. "ETHBTC" and
@@ -178,6 +193,7 @@ class Binance(ExchangeInterface):
         self.initial_backoff = initial_backoff
         self.backoff_limit = backoff_limit
         self.nonce_lock = Semaphore()
+        self.request_weight_bucket = get_rate_limiter('binance')
 
     def first_connection(self) -> None:
         if self.first_connection_made:
@@ -218,10 +234,14 @@ class Binance(ExchangeInterface):
         backoff = self.initial_backoff
 
         while True:
+            # Wait until the request fits in binance's request weight limit instead of
+            # finding out from a 429. The backoff below only kicks in if something else
+            # uses the same limit, like another client with the same IP, and also
+            # lowers the rate the bucket allows.
+            self.request_weight_bucket.acquire(BINANCE_REQUEST_WEIGHTS.get(method, 1))
             with self.nonce_lock:
-                # Protect this region with a lock since binance will reject
-                # non-increasing nonces. So if two greenlets come in here at
-                # the same time one of them will fail
+                # Protect this region with a lock so that the timestamps of the
+                # signed requests are created in the order the requests are made
                 if method in V3_ENDPOINTS or method in WAPI_ENDPOINTS:
                     api_version = 3
                     # Recommended recvWindows is 5000 but we get timeouts with it
@@ -242,9 +262,10 @@ class Binance(ExchangeInterface):
                 request_url = f'{self.uri}{apistr}v{str(api_version)}/{method}?'
                 request_url += urlencode(options)
 
-                log.debug('Binance API request', request_url=request_url)
-
-                response = self.session.get(request_url)
+            log.debug('Binance API request', request_url=request_url)
+            # Binance only checks that the timestamp is within the receive window,
+            # so the request itself can be made outside of the lock
+            response = self.session.get(request_url)
 
             limit_ban = response.status_code == 429 and backoff > self.backoff_limit
             if limit_ban or response.status_code not in (200, 429):
@@ -273,7 +294,7 @@ class Binance(ExchangeInterface):
                 # Binance has limits and if we hit them we should backoff
                 # https://github.com/binance-exchange/binance-official-api-docs/blob/master/rest-api.md#limits
                 log.debug('Got 429 from Binance. Backing off', seconds=backoff)
-                gevent.sleep(backoff)
+                self.request_weight_bucket.rate_limited(backoff)
                 backoff = backoff * 2
                 continue
             else:
@@ -312,7 +333,7 @@ class Binance(ExchangeInterface):
             log.error(msg)
             return None, msg
 
-        returned_balances = {}
+        asset_amounts = {}
         for entry in account_data['balances']:
             amount = entry['free'] + entry['locked']
             if amount == FVal(0):
@@ -338,18 +359,22 @@ class Binance(ExchangeInterface):
                 )
                 continue
 
-            try:
-                usd_price = Inquirer().find_usd_price(asset)
-            except RemoteError as e:
+            asset_amounts[asset] = amount
+
+        usd_prices, price_errors = Inquirer().find_usd_prices(asset_amounts.keys())
+
+        returned_balances = {}
+        for asset, amount in asset_amounts.items():
+            if asset in price_errors:
                 self.msg_aggregator.add_error(
                     f'Error processing binance balance entry due to inability to '
-                    f'query USD price: {str(e)}. Skipping balance entry',
+                    f'query USD price: {price_errors[asset]}. Skipping balance entry',
                 )
                 continue
 
             balance = {}
             balance['amount'] = amount
-            balance['usd_value'] = FVal(amount * usd_price)
+            balance['usd_value'] = FVal(amount * usd_prices[asset])
             returned_balances[asset] = balance
 
             log.debug(
@@ -362,6 +387,46 @@ class Binance(ExchangeInterface):
 
         return returned_balances, ''
 
+    def _markets_to_query(self) -> Tuple[List[str], bool]:
+        """Returns the symbols whose trades should be queried from binance and
+        whether they are all the symbols
+
+        Binance can only be asked for the trades of one symbol at a time. So the
+        first time the trades are queried all symbols are queried and the ones
+        with trades are remembered. From then on only the remembered symbols and
+        the symbols of the assets currently held in binance are queried, since a
+        newly traded symbol usually leaves a balance in one of its assets.
+
+        A symbol whose assets have both been fully withdrawn or sold is not found
+        that way, so every BINANCE_SYMBOLS_FULL_SCAN_INTERVAL seconds all symbols
+        are queried again. The trades of symbols found then are backfilled.
+
+        May raise:
+        - RemoteError if the account balances can not be queried
+        """
+        last_full_scan = self.db.get_used_query_range(f'{self.name}_symbols_full_scan')
+        if (
+            self.db.get_used_query_range(f'{self.name}_trades') is None or
+            last_full_scan is None or
+            ts_now() - last_full_scan[1] >= BINANCE_SYMBOLS_FULL_SCAN_INTERVAL
+        ):
+            return list(self._symbols_to_pair.keys()), True
+
+        markets = set(self.db.get_binance_traded_symbols())
+        # We know account endpoint returns a dict
+        account_data = self.api_query_dict('account')
+        held_assets = set()
+        for entry in account_data['balances']:
+            if entry['free'] + entry['locked'] != ZERO:
+                held_assets.add(entry['asset'])
+
+        for symbol, pair in self._symbols_to_pair.items():
+            if pair.binance_base_asset in held_assets or pair.binance_quote_asset in held_assets:
+                markets.add(symbol)
+
+        # Only query symbols binance still knows about, in a deterministic order
+        return [symbol for symbol in self._symbols_to_pair if symbol in markets], False
+
     def query_online_trade_history(
             self,
             start_ts: Timestamp,
@@ -370,15 +435,24 @@ class Binance(ExchangeInterface):
     ) -> List[Trade]:
         self.first_connection()
 
+        full_scan = False
         if not markets:
-            iter_markets = list(self._symbols_to_pair.keys())
+            iter_markets, full_scan = self._markets_to_query()
         else:
             iter_markets = markets
 
-        raw_data = []
-        # Limit of results to return. 1000 is max limit according to docs
-        limit = 1000
-        for symbol in iter_markets:
+        # Symbols without remembered trades never had any of their trades saved. So
+        # their trades are kept from the start of the already queried range too.
+        known_symbols = set(self.db.get_binance_traded_symbols())
+        trades_range = self.db.get_used_query_range(f'{self.name}_trades')
+        new_symbols_start_ts = start_ts
+        if trades_range is not None:
+            new_symbols_start_ts = min(start_ts, trades_range[0])
+
+        def query_symbol_trades(symbol: str) -> List[Dict[str, Any]]:
+            symbol_data = []
+            # Limit of results to return. 1000 is max limit according to docs
+            limit = 1000
             last_trade_id = 0
             len_result = limit
             while len_result == limit:
@@ -397,12 +471,31 @@ class Binance(ExchangeInterface):
                 if result:
                     last_trade_id = result[-1]['id'] + 1
                 len_result = len(result)
-                log.debug('binance myTrades query result', results_num=len_result)
+                log.debug('binance myTrades query result', symbol=symbol, results_num=len_result)
                 for r in result:
                     r['symbol'] = symbol
-                raw_data.extend(result)
+                symbol_data.extend(result)
+
+            return symbol_data
+
+        pool = Pool(BINANCE_MYTRADES_CONCURRENCY)
+        # map returns the results in the order of the given markets
+        symbols_data = pool.map(query_symbol_trades, iter_markets)
 
-            raw_data.sort(key=lambda x: x['time'])
+        raw_data = []
+        traded_symbols = []
+        for symbol, symbol_data in zip(iter_markets, symbols_data):
+            if len(symbol_data) != 0:
+                traded_symbols.append(symbol)
+            raw_data.extend(symbol_data)
+        raw_data.sort(key=lambda x: x['time'])
+        self.db.add_binance_traded_symbols(traded_symbols)
+        if full_scan:
+            self.db.update_used_query_range(
+                name=f'{self.name}_symbols_full_scan',
+                start_ts=Timestamp(0),
+                end_ts=ts_now(),
+            )
 
         trades = []
         for raw_trade in raw_data:
@@ -436,7 +529,10 @@ class Binance(ExchangeInterface):
                 continue
 
             # Since binance does not respect the given timestamp range, limit the range here
-            if trade.timestamp < start_ts:
+            if raw_trade['symbol'] in known_symbols:
+                if trade.timestamp < start_ts:
+                    continue
+            elif trade.timestamp < new_symbols_start_ts:
                 continue
 
             if trade.timestamp > end_ts:
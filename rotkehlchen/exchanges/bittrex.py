@@ -5,6 +5,7 @@ from json.decoder import JSONDecodeError
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union, overload
 from urllib.parse import urlencode
 
+from gevent.lock import Semaphore
 from typing_extensions import Literal
 
 from rotkehlchen.assets.asset import Asset
@@ -179,6 +180,7 @@ class Bittrex(ExchangeInterface):
         self.apiversion = 'v1.1'
         self.uri = 'https://bittrex.com/api/{}/'.format(self.apiversion)
         self.msg_aggregator = msg_aggregator
+        self.nonce_lock = Semaphore()
 
     def first_connection(self) -> None:
         self.first_connection_made = True
@@ -230,7 +232,6 @@ class Bittrex(ExchangeInterface):
         """
         if not options:
             options = {}
-        nonce = str(ts_now_in_ms())
         method_type = 'public'
 
         if method in BITTREX_MARKET_METHODS:
@@ -238,20 +239,25 @@ class Bittrex(ExchangeInterface):
         elif method in BITTREX_ACCOUNT_METHODS:
             method_type = 'account'
 
-        request_url = self.uri + method_type + '/' + method + '?'
-
-        if method_type != 'public':
-            request_url += 'apikey=' + self.api_key + "&nonce=" + nonce + '&'
-
-        request_url += urlencode(options)
-        signature = hmac.new(
-            self.secret,
-            request_url.encode(),
-            hashlib.sha512,
-        ).hexdigest()
-        self.session.headers.update({'apisign': signature})
-        log.debug('Bittrex API query', request_url=request_url)
-        response = self.session.get(request_url)
+        with self.nonce_lock:
+            # Protect this region with a lock since bittrex will reject
+            # non-increasing nonces. So if two greenlets come in here at
+            # the same time one of them will fail
+            nonce = str(ts_now_in_ms())
+            request_url = self.uri + method_type + '/' + method + '?'
+
+            if method_type != 'public':
+                request_url += 'apikey=' + self.api_key + "&nonce=" + nonce + '&'
+
+            request_url += urlencode(options)
+            signature = hmac.new(
+                self.secret,
+                request_url.encode(),
+                hashlib.sha512,
+            ).hexdigest()
+            self.session.headers.update({'apisign': signature})
+            log.debug('Bittrex API query', request_url=request_url)
+            response = self.session.get(request_url)
 
         if response.status_code != 200:
             raise RemoteError(
@@ -289,7 +295,7 @@ class Bittrex(ExchangeInterface):
             log.error(msg)
             return None, msg
 
-        returned_balances = {}
+        asset_amounts = {}
         for entry in resp:
             try:
                 asset = asset_from_bittrex(entry['Currency'])
@@ -312,18 +318,22 @@ class Bittrex(ExchangeInterface):
                 )
                 continue
 
-            try:
-                usd_price = Inquirer().find_usd_price(asset=asset)
-            except RemoteError as e:
+            asset_amounts[asset] = FVal(entry['Balance'])
+
+        usd_prices, price_errors = Inquirer().find_usd_prices(asset_amounts.keys())
+
+        returned_balances = {}
+        for asset, amount in asset_amounts.items():
+            if asset in price_errors:
                 self.msg_aggregator.add_error(
                     f'Error processing bittrex balance entry due to inability to '
-                    f'query USD price: {str(e)}. Skipping balance entry',
+                    f'query USD price: {price_errors[asset]}. Skipping balance entry',
                 )
                 continue
 
             balance = {}
-            balance['amount'] = FVal(entry['Balance'])
-            balance['usd_value'] = FVal(balance['amount']) * usd_price
+            balance['amount'] = amount
+            balance['usd_value'] = amount * usd_prices[asset]
             returned_balances[asset] = balance
 
             log.debug(
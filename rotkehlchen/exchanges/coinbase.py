@@ -322,7 +322,7 @@ class Coinbase(ExchangeInterface):
             log.error(msg)
             return None, msg
 
-        returned_balances: Dict[Asset, Dict[str, Any]] = {}
+        asset_amounts: Dict[Asset, FVal] = {}
         for account in resp:
             try:
                 if not account['balance']:
@@ -336,24 +336,7 @@ class Coinbase(ExchangeInterface):
                     continue
 
                 asset = asset_from_coinbase(account['balance']['currency'])
-
-                try:
-                    usd_price = Inquirer().find_usd_price(asset=asset)
-                except RemoteError as e:
-                    self.msg_aggregator.add_error(
-                        f'Error processing coinbase balance entry due to inability to '
-                        f'query USD price: {str(e)}. Skipping balance entry',
-                    )
-                    continue
-
-                if asset in returned_balances:
-                    amount = returned_balances[asset]['amount'] + amount
-                else:
-                    returned_balances[asset] = {}
-
-                returned_balances[asset]['amount'] = amount
-                usd_value = returned_balances[asset]['amount'] * usd_price
-                returned_balances[asset]['usd_value'] = usd_value
+                asset_amounts[asset] = asset_amounts.get(asset, ZERO) + amount
 
             except UnknownAsset as e:
                 self.msg_aggregator.add_warning(
@@ -382,6 +365,22 @@ class Coinbase(ExchangeInterface):
                 )
                 continue
 
+        usd_prices, price_errors = Inquirer().find_usd_prices(asset_amounts.keys())
+
+        returned_balances: Dict[Asset, Dict[str, Any]] = {}
+        for asset, asset_amount in asset_amounts.items():
+            if asset in price_errors:
+                self.msg_aggregator.add_error(
+                    f'Error processing coinbase balance entry due to inability to '
+                    f'query USD price: {price_errors[asset]}. Skipping balance entry',
+                )
+                continue
+
+            returned_balances[asset] = {
+                'amount': asset_amount,
+                'usd_value': asset_amount * usd_prices[asset],
+            }
+
         return returned_balances, ''
 
     def query_online_trade_history(
@@ -1,11 +1,14 @@
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import bisect
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 from dataclasses import dataclass
 
 from rotkehlchen.assets.asset import Asset
+from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.crypto import sha3
 from rotkehlchen.errors import UnknownAsset
-from rotkehlchen.fval import FVal
+from rotkehlchen.fval import FixedVal, FVal
 from rotkehlchen.serialization.deserialize import (
     deserialize_asset_amount,
     deserialize_fee,
@@ -54,8 +57,226 @@ class SellEvent:
     gain: FVal  # Gain in profit currency for this trade. Fees are not counted here.
 
 
+def buy_event_cost(buy_event: BuyEvent, amount: FVal) -> FVal:
+    """The cost in profit currency, including fees, of `amount` out of a buy event"""
+    return amount.fma(buy_event.rate, (buy_event.fee_rate * amount))
+
+
+class LotsConsumption(NamedTuple):
+    """What a consumption from the head of a BuyLotQueue used up"""
+    taxable_amount: FVal
+    taxable_bought_cost: FVal
+    taxfree_amount: FVal
+    taxfree_bought_cost: FVal
+    # The amount that could not be covered by the lots of the queue
+    uncovered_amount: FVal
+
+
+# Consumed lots are compacted away only if they are at least that many and also
+# more than the lots still in the queue, so that compaction is amortized O(1)
+BUY_LOT_QUEUE_COMPACTION_THRESHOLD = 1024
+
+
+class BuyLotQueue():
+    """A first-in-first-out queue of the buy lots of an asset
+
+    Sells consume lots from the head of the queue. Consumed lots are not deleted
+    from the front of the underlying list one by one. The head index is advanced
+    instead and the consumed lots are compacted away only once they outnumber the
+    rest, so popping lots is amortized O(1). Only the head lot can be partially
+    consumed and that happens in place.
+
+    The cumulative amounts of the lots are also kept, as fixed point values, so that
+    the lot at which a consumption stops is found by bisection. Lots are appended in
+    ascending time order, as history is processed, so the lots that are tax-free at
+    a given time are always a prefix of the queue found by bisecting the lot
+    timestamps.
+    """
+
+    def __init__(self, lots: Iterable[BuyEvent] = ()) -> None:
+        self._lots: List[BuyEvent] = []
+        self._timestamps: List[Timestamp] = []
+        self._head = 0
+        # _cumulative_amounts[i] is the sum of the amounts the lots before index i
+        # had when they got appended
+        self._cumulative_amounts: List[FixedVal] = [FixedVal()]
+        for lot in lots:
+            self.append(lot)
+
+    def append(self, lot: BuyEvent) -> None:
+        self._lots.append(lot)
+        self._timestamps.append(lot.timestamp)
+        self._cumulative_amounts.append(
+            self._cumulative_amounts[-1] + FixedVal.from_fval(lot.amount),
+        )
+
+    def __len__(self) -> int:
+        return len(self._lots) - self._head
+
+    def __iter__(self) -> Iterator[BuyEvent]:
+        return islice(self._lots, self._head, None)
+
+    def __getitem__(self, index: int) -> BuyEvent:
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(f'Buy lot index {index} out of range')
+
+        return self._lots[self._head + index]
+
+    def __repr__(self) -> str:
+        return f'BuyLotQueue({list(self)})'
+
+    def _range_amount(self, start: int, end: int) -> FVal:
+        """The amount left in the lots between the given absolute indices"""
+        return sum((lot.amount for lot in islice(self._lots, start, end)), ZERO)
+
+    def _range_sums(self, start: int, end: int) -> Tuple[FVal, FVal]:
+        """The amount and cost left in the lots between the given absolute indices
+
+        They are summed lot by lot from the exact lot amounts, in the order the lots
+        were bought. This is only used for lots that get used up, so each lot is
+        summed once.
+        """
+        amount = ZERO
+        cost = ZERO
+        for lot in islice(self._lots, start, end):
+            amount += lot.amount
+            cost += buy_event_cost(lot, lot.amount)
+
+        return amount, cost
+
+    def _taxfree_boundary(self, taxfree_before: Optional[Timestamp]) -> int:
+        """The absolute index of the first lot not bought before `taxfree_before`"""
+        if taxfree_before is None:
+            return self._head
+
+        return bisect.bisect_left(self._timestamps, taxfree_before, lo=self._head)
+
+    def _locate(self, amount: FVal) -> Tuple[int, FVal]:
+        """Finds where consuming `amount` from the head of the queue stops
+
+        Returns the absolute index of the lot at which the consumption stops and
+        how much of that lot is used. All lots before it are used up. If the lots
+        can't cover the amount the index is past the last lot and the returned
+        amount is the one left uncovered.
+
+        The stop lot is found by bisecting the cumulative amounts. Those are rounded
+        to 18 decimals, so the amount used from the stop lot is computed from the
+        exact amounts of the used up lots, which also moves the stop lot if the
+        rounding put it off by some lots.
+        """
+        index = self._head
+        if amount >= self._lots[self._head].amount:
+            # Express the amount in the coordinates of the cumulative amounts
+            target = (
+                FixedVal.from_fval(amount - self._lots[self._head].amount) +
+                self._cumulative_amounts[self._head + 1]
+            )
+            index = bisect.bisect_right(
+                self._cumulative_amounts,
+                target,
+                lo=self._head + 1,
+            ) - 1
+
+        remaining = amount
+        for lot in islice(self._lots, self._head, index):
+            remaining -= lot.amount
+        while index > self._head and remaining < ZERO:
+            index -= 1
+            remaining += self._lots[index].amount
+        while index < len(self._lots) and remaining >= self._lots[index].amount:
+            remaining -= self._lots[index].amount
+            index += 1
+
+        return index, remaining
+
+    def _advance_head(self, new_head: int) -> None:
+        self._head = new_head
+        should_compact = (
+            self._head >= BUY_LOT_QUEUE_COMPACTION_THRESHOLD and
+            self._head * 2 >= len(self._lots)
+        )
+        if should_compact:
+            del self._lots[:self._head]
+            del self._timestamps[:self._head]
+            del self._cumulative_amounts[:self._head]
+            self._head = 0
+
+    def total_amount(self) -> FVal:
+        """The total amount left in all the lots of the queue"""
+        return self._range_amount(self._head, len(self._lots))
+
+    def taxfree_amount(self, taxfree_before: Optional[Timestamp]) -> FVal:
+        """The amount left in the lots bought before `taxfree_before`"""
+        return self._range_amount(self._head, self._taxfree_boundary(taxfree_before))
+
+    def consume(
+            self,
+            amount: FVal,
+            taxfree_before: Optional[Timestamp] = None,
+    ) -> LotsConsumption:
+        """Consumes the given amount from the lots in first-in-first-out order
+
+        The lots bought before `taxfree_before` count as tax-free. If it's None
+        all lots are taxable. The lot at which the consumption stops and the
+        tax-free boundary are both found by bisection. The amounts and costs of the
+        used up lots on either side of the boundary are summed from their exact
+        amounts, the same way the list based matching summed them.
+        """
+        if len(self) == 0:
+            return LotsConsumption(ZERO, ZERO, ZERO, ZERO, amount)
+
+        stop_index, used_amount = self._locate(amount)
+        taxfree_boundary = self._taxfree_boundary(taxfree_before)
+        boundary = min(taxfree_boundary, stop_index)
+        taxfree_amount, taxfree_cost = self._range_sums(self._head, boundary)
+        taxable_amount, taxable_cost = self._range_sums(boundary, stop_index)
+
+        uncovered_amount = ZERO
+        if stop_index == len(self._lots):
+            uncovered_amount = used_amount
+        else:
+            lot = self._lots[stop_index]
+            used_cost = buy_event_cost(lot, used_amount)
+            if stop_index < taxfree_boundary:
+                taxfree_amount += used_amount
+                taxfree_cost += used_cost
+            else:
+                taxable_amount += used_amount
+                taxable_cost += used_cost
+            lot.amount = lot.amount - used_amount
+
+        self._advance_head(stop_index)
+        return LotsConsumption(
+            taxable_amount=taxable_amount,
+            taxable_bought_cost=taxable_cost,
+            taxfree_amount=taxfree_amount,
+            taxfree_bought_cost=taxfree_cost,
+            uncovered_amount=uncovered_amount,
+        )
+
+    def reduce(self, amount: FVal) -> FVal:
+        """Consumes the given amount from the lots in first-in-first-out order
+
+        Returns the amount that could not be covered by the lots in the queue.
+        """
+        if len(self) == 0:
+            return amount
+
+        stop_index, used_amount = self._locate(amount)
+        if stop_index == len(self._lots):
+            self._advance_head(stop_index)
+            return used_amount
+
+        lot = self._lots[stop_index]
+        lot.amount = lot.amount - used_amount
+        self._advance_head(stop_index)
+        return ZERO
+
+
 class Events(NamedTuple):
-    buys: List[BuyEvent]
+    buys: BuyLotQueue
     sells: List[SellEvent]
 
 
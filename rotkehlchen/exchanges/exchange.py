@@ -1,7 +1,8 @@
 import logging
 from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
 
-import requests
+import gevent
+from gevent.pool import Pool
 
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.exchanges.data_structures import AssetMovement, MarginPosition, Trade
@@ -9,6 +10,7 @@ from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import deserialize_location
 from rotkehlchen.typing import ApiKey, ApiSecret, T_ApiKey, T_ApiSecret, Timestamp
 from rotkehlchen.utils.interfaces import CacheableObject, LockableQueryObject
+from rotkehlchen.utils.network import create_session
 
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
@@ -46,7 +48,7 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
         self.api_key = api_key
         self.secret = secret
         self.first_connection_made = False
-        self.session = requests.session()
+        self.session = create_session()
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
         log.info(f'Initialized {name} exchange')
 
@@ -270,35 +272,38 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
             end_ts: Timestamp,
             success_callback: ExchangeHistorySuccessCallback,
             fail_callback: ExchangeHistoryFailCallback,
+            query_pool: Optional[Pool] = None,
     ) -> None:
         """Queries the historical event endpoints for this exchange and performs actions.
 
         In case of success passes the result to successcallback.
         In case of failure passes the error to failure_callback
+
+        If a query_pool is given then the independent endpoint families (trades,
+        margin positions, asset movements and exchange specific history) are
+        queried concurrently in it. Otherwise they are queried one after the other.
         """
+        history_queries = (
+            self.query_trade_history,
+            self.query_margin_history,
+            self.query_deposits_withdrawals,
+            self.query_exchange_specific_history,
+        )
+        results: List[Any]
         try:
-            trades_history = self.query_trade_history(
-                start_ts=start_ts,
-                end_ts=end_ts,
-            )
-            margin_history = self.query_margin_history(
-                start_ts=start_ts,
-                end_ts=end_ts,
-            )
-            asset_movements = self.query_deposits_withdrawals(
-                start_ts=start_ts,
-                end_ts=end_ts,
-            )
-            exchange_specific_data = self.query_exchange_specific_history(
-                start_ts=start_ts,
-                end_ts=end_ts,
-            )
-            success_callback(
-                trades_history,
-                margin_history,
-                asset_movements,
-                exchange_specific_data,
-            )
-
+            if query_pool is None:
+                results = [query(start_ts=start_ts, end_ts=end_ts) for query in history_queries]
+            else:
+                greenlets = [
+                    query_pool.spawn(query, start_ts=start_ts, end_ts=end_ts)
+                    for query in history_queries
+                ]
+                gevent.joinall(greenlets)
+                # Collect the results in the serial order so that the error reported
+                # when more than one family fails is always the same
+                results = [greenlet.get() for greenlet in greenlets]
         except RemoteError as e:
             fail_callback(str(e))
+            return
+
+        success_callback(*results)
@@ -7,8 +7,8 @@ from http import HTTPStatus
 from json.decoder import JSONDecodeError
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union, overload
 
-import gevent
 import requests
+from gevent.lock import Semaphore
 from typing_extensions import Literal
 
 from rotkehlchen.assets.asset import Asset
@@ -24,6 +24,7 @@ from rotkehlchen.errors import (
 )
 from rotkehlchen.exchanges.data_structures import AssetMovement, Trade
 from rotkehlchen.exchanges.exchange import ExchangeInterface
+from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import (
@@ -38,6 +39,7 @@ from rotkehlchen.typing import ApiKey, ApiSecret, Fee, Location, Timestamp, Trad
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.interfaces import cache_response_timewise, protect_with_lock
 from rotkehlchen.utils.misc import ts_now_in_ms
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict, rlk_jsonloads_list
 
 logger = logging.getLogger(__name__)
@@ -76,6 +78,7 @@ class Gemini(ExchangeInterface):
         super(Gemini, self).__init__('gemini', api_key, secret, database)
         self.base_uri = base_uri
         self.msg_aggregator = msg_aggregator
+        self.nonce_lock = Semaphore()
 
         self.session.headers.update({
             'Content-Type': 'text/plain',
@@ -135,30 +138,37 @@ class Gemini(ExchangeInterface):
         v_endpoint = f'/v1/{endpoint}'
         url = f'{self.base_uri}{v_endpoint}'
         retries_left = QUERY_RETRY_TIMES
+        limiter = get_rate_limiter('gemini')
         while retries_left > 0:
-            if endpoint in ('mytrades', 'balances', 'transfers', 'roles'):
-                # private endpoints
-                timestamp = str(ts_now_in_ms())
-                payload = {'request': v_endpoint, 'nonce': timestamp}
-                if options is not None:
-                    payload.update(options)
-                encoded_payload = json.dumps(payload).encode()
-                b64 = b64encode(encoded_payload)
-                signature = hmac.new(self.secret, b64, hashlib.sha384).hexdigest()
-
-                self.session.headers.update({
-                    'X-GEMINI-PAYLOAD': b64.decode(),
-                    'X-GEMINI-SIGNATURE': signature,
-                })
-
+            limiter.acquire()
             try:
-                response = self.session.request(method=method, url=url)
+                if endpoint in ('mytrades', 'balances', 'transfers', 'roles'):
+                    # private endpoints
+                    with self.nonce_lock:
+                        # Protect this region with a lock since gemini will reject
+                        # non-increasing nonces. So if two greenlets come in here at
+                        # the same time one of them will fail
+                        timestamp = str(ts_now_in_ms())
+                        payload = {'request': v_endpoint, 'nonce': timestamp}
+                        if options is not None:
+                            payload.update(options)
+                        encoded_payload = json.dumps(payload).encode()
+                        b64 = b64encode(encoded_payload)
+                        signature = hmac.new(self.secret, b64, hashlib.sha384).hexdigest()
+
+                        self.session.headers.update({
+                            'X-GEMINI-PAYLOAD': b64.decode(),
+                            'X-GEMINI-SIGNATURE': signature,
+                        })
+                        response = self.session.request(method=method, url=url)
+                else:
+                    response = self.session.request(method=method, url=url)
             except requests.exceptions.ConnectionError as e:
                 raise RemoteError(f'Gemini {method} query at {url} connection error: {str(e)}')
 
             if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
                 # Backoff a bit by sleeping. Sleep more, the more retries have been made
-                gevent.sleep(QUERY_RETRY_TIMES / retries_left)
+                limiter.rate_limited(QUERY_RETRY_TIMES / retries_left)
                 retries_left -= 1
             else:
                 # get out of the retry loop, we did not get 429 complaint
@@ -262,7 +272,7 @@ class Gemini(ExchangeInterface):
             log.error(msg)
             return None, msg
 
-        returned_balances: Dict[Asset, Dict[str, Any]] = {}
+        asset_amounts: Dict[Asset, FVal] = {}
         for entry in balances:
             try:
                 amount = deserialize_asset_amount(entry['amount'])
@@ -271,18 +281,7 @@ class Gemini(ExchangeInterface):
                     continue
 
                 asset = Asset(entry['currency'])
-                try:
-                    usd_price = Inquirer().find_usd_price(asset=asset)
-                except RemoteError as e:
-                    self.msg_aggregator.add_error(
-                        f'Error processing gemini balance result due to inability to '
-                        f'query USD price: {str(e)}. Skipping balance entry',
-                    )
-                    continue
-                returned_balances[asset] = {
-                    'amount': amount,
-                    'usd_value': amount * usd_price,
-                }
+                asset_amounts[asset] = amount
 
             except UnknownAsset as e:
                 self.msg_aggregator.add_warning(
@@ -310,6 +309,22 @@ class Gemini(ExchangeInterface):
                 )
                 continue
 
+        usd_prices, price_errors = Inquirer().find_usd_prices(asset_amounts.keys())
+
+        returned_balances: Dict[Asset, Dict[str, Any]] = {}
+        for asset, asset_amount in asset_amounts.items():
+            if asset in price_errors:
+                self.msg_aggregator.add_error(
+                    f'Error processing gemini balance result due to inability to '
+                    f'query USD price: {price_errors[asset]}. Skipping balance entry',
+                )
+                continue
+
+            returned_balances[asset] = {
+                'amount': asset_amount,
+                'usd_value': asset_amount * usd_prices[asset],
+            }
+
         return returned_balances, ''
 
     def _get_paginated_query(
@@ -11,6 +11,7 @@ from urllib.parse import urlencode
 from gevent.lock import Semaphore
 from requests import Response
 
+from rotkehlchen.assets.asset import Asset
 from rotkehlchen.assets.converters import KRAKEN_TO_WORLD, asset_from_kraken
 from rotkehlchen.constants import KRAKEN_API_VERSION, KRAKEN_BASE_URL
 from rotkehlchen.constants.assets import A_DAI, A_ETH
@@ -56,6 +57,17 @@ log = RotkehlchenLogsAdapter(logger)
 
 
 KRAKEN_DELISTED = ('XDAO', 'XXVN', 'ZKRW', 'XNMC', 'BSV', 'XICN')
+# Kraken's fee credit. It has no price.
+A_KFEE = Asset('KFEE')
+# Ledger and trade history calls increase the kraken API call counter by 2,
+# all other private calls by 1
+# https://support.kraken.com/hc/en-us/articles/206548367
+KRAKEN_PRIVATE_QUERY_COSTS = {
+    'Ledgers': 2,
+    'QueryLedgers': 2,
+    'TradesHistory': 2,
+    'QueryTrades': 2,
+}
 
 
 def kraken_to_world_pair(pair: str) -> TradePair:
@@ -324,7 +336,7 @@ class Kraken(ExchangeInterface):
 
     def query_public(self, method: str, req: Optional[dict] = None) -> dict:
         return retry_calls(
-            times=5, location='kraken',
+            times=5, location='kraken_public',
             handle_429=False,
             backoff_in_seconds=0,
             method_name=method,
@@ -341,6 +353,7 @@ class Kraken(ExchangeInterface):
             backoff_in_seconds=0,
             method_name=method,
             function=self._query_private,
+            tokens=KRAKEN_PRIVATE_QUERY_COSTS.get(method, 1),
             # function's arguments
             method=method,
             req=req,
@@ -397,7 +410,7 @@ class Kraken(ExchangeInterface):
             log.error(msg)
             return None, msg
 
-        balances = {}
+        asset_amounts = {}
         for k, v in old_balances.items():
             v = FVal(v)
             if v == FVal(0):
@@ -418,21 +431,28 @@ class Kraken(ExchangeInterface):
                 )
                 continue
 
+            asset_amounts[our_asset] = v
+
+        usd_prices, price_errors = Inquirer().find_usd_prices(
+            asset for asset in asset_amounts if asset != A_KFEE
+        )
+
+        balances = {}
+        for our_asset, v in asset_amounts.items():
+            if our_asset in price_errors:
+                self.msg_aggregator.add_error(
+                    f'Error processing kraken balance entry due to inability to '
+                    f'query USD price: {price_errors[our_asset]}. Skipping balance entry',
+                )
+                continue
+
             entry = {}
             entry['amount'] = v
-            if k == 'KFEE':
+            if our_asset == A_KFEE:
                 # There is no price value for KFEE. TODO: Shouldn't we then just skip the balance?
                 entry['usd_value'] = ZERO
             else:
-                try:
-                    usd_price = Inquirer().find_usd_price(our_asset)
-                except RemoteError as e:
-                    self.msg_aggregator.add_error(
-                        f'Error processing kraken balance entry due to inability to '
-                        f'query USD price: {str(e)}. Skipping balance entry',
-                    )
-                    continue
-                entry['usd_value'] = FVal(v * usd_price)
+                entry['usd_value'] = FVal(v * usd_prices[our_asset])
 
             balances[our_asset] = entry
             log.debug(
@@ -7,7 +7,6 @@ from json.decoder import JSONDecodeError
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union, overload
 from urllib.parse import urlencode
 
-import gevent
 import requests
 from gevent.lock import Semaphore
 from typing_extensions import Literal
@@ -56,6 +55,7 @@ from rotkehlchen.typing import (
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.interfaces import cache_response_timewise, protect_with_lock
 from rotkehlchen.utils.misc import create_timestamp, ts_now_in_ms
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict, rlk_jsonloads_list
 
 if TYPE_CHECKING:
@@ -313,8 +313,10 @@ class Poloniex(ExchangeInterface):
             post_data=req,
         )
 
+        limiter = get_rate_limiter('poloniex')
         tries = QUERY_RETRY_TIMES
         while tries >= 0:
+            limiter.acquire()
             try:
                 response = self._single_query(command, req)
             except requests.exceptions.ConnectionError as e:
@@ -327,7 +329,7 @@ class Poloniex(ExchangeInterface):
                         f'Got a recoverable poloniex error. '
                         f'Backing off for {backoff_seconds}',
                     )
-                    gevent.sleep(backoff_seconds)
+                    limiter.rate_limited(backoff_seconds)
                     tries -= 1
                     continue
             else:
@@ -456,7 +458,7 @@ class Poloniex(ExchangeInterface):
             log.error(msg)
             return None, msg
 
-        balances = {}
+        asset_amounts = {}
         for poloniex_asset, v in resp.items():
             available = FVal(v['available'])
             on_orders = FVal(v['onOrders'])
@@ -486,28 +488,32 @@ class Poloniex(ExchangeInterface):
                     )
                     continue
 
-                entry = {}
-                entry['amount'] = available + on_orders
-                try:
-                    usd_price = Inquirer().find_usd_price(asset=asset)
-                except RemoteError as e:
-                    self.msg_aggregator.add_error(
-                        f'Error processing poloniex balance entry due to inability to '
-                        f'query USD price: {str(e)}. Skipping balance entry',
-                    )
-                    continue
+                asset_amounts[asset] = available + on_orders
 
-                usd_value = entry['amount'] * usd_price
-                entry['usd_value'] = usd_value
-                balances[asset] = entry
+        usd_prices, price_errors = Inquirer().find_usd_prices(asset_amounts.keys())
 
-                log.debug(
-                    'Poloniex balance query',
-                    sensitive_log=True,
-                    currency=asset,
-                    amount=entry['amount'],
-                    usd_value=usd_value,
+        balances = {}
+        for asset, amount in asset_amounts.items():
+            if asset in price_errors:
+                self.msg_aggregator.add_error(
+                    f'Error processing poloniex balance entry due to inability to '
+                    f'query USD price: {price_errors[asset]}. Skipping balance entry',
                 )
+                continue
+
+            entry = {}
+            entry['amount'] = amount
+            usd_value = entry['amount'] * usd_prices[asset]
+            entry['usd_value'] = usd_value
+            balances[asset] = entry
+
+            log.debug(
+                'Poloniex balance query',
+                sensitive_log=True,
+                currency=asset,
+                amount=entry['amount'],
+                usd_value=usd_value,
+            )
 
         return balances, ''
 
@@ -2,7 +2,6 @@ import logging
 from json.decoder import JSONDecodeError
 from typing import Any, Dict, List, Optional, Union, overload
 
-import gevent
 import requests
 from eth_utils.address import to_checksum_address
 from typing_extensions import Literal
@@ -15,6 +14,8 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import ChecksumEthAddress, EthTokenInfo, ExternalService
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.network import create_session
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ class Alethio(ExternalServiceWithApiKey):
     ) -> None:
         super().__init__(database=database, service_name=ExternalService.ALETHIO)
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = create_session()
         self.all_tokens = all_eth_tokens
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
 
@@ -70,9 +71,11 @@ class Alethio(ExternalServiceWithApiKey):
         if api_key:
             self.session.headers.update({'Authorization': f'Bearer {api_key}'})
 
+        limiter = get_rate_limiter('alethio')
         backoff = 1
         backoff_limit = 13
         while backoff < backoff_limit:
+            limiter.acquire()
             try:
                 response = self.session.get(query_str)
             except requests.exceptions.ConnectionError as e:
@@ -81,7 +84,7 @@ class Alethio(ExternalServiceWithApiKey):
                         f'Got max retries exceeded from alethio. Will '
                         f'backoff for {backoff} seconds.',
                     )
-                    gevent.sleep(backoff)
+                    limiter.rate_limited(backoff)
                     backoff = backoff * 2
                     if backoff >= backoff_limit:
                         raise RemoteError(
@@ -97,7 +100,7 @@ class Alethio(ExternalServiceWithApiKey):
                     f'Got response: {response.text} from alethio. Will '
                     f'backoff for {backoff} seconds.',
                 )
-                gevent.sleep(backoff)
+                limiter.rate_limited(backoff)
                 backoff = backoff * 2
                 if backoff >= backoff_limit:
                     raise RemoteError(
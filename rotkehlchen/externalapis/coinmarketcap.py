@@ -5,12 +5,12 @@ from json.decoder import JSONDecodeError
 from typing import Any, Dict, List, Optional
 
 import gevent
-import requests
 
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import FilePath
 from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -855,7 +855,7 @@ class Coinmarketcap():
         self.prefix = 'https://pro-api.coinmarketcap.com/'
         self.backoff_limit = 180
         self.data_directory = data_directory
-        self.session = requests.session()
+        self.session = create_session()
         # As per coinmarketcap's API
         self.session.headers.update({
             'User-Agent': 'rotkehlchen',
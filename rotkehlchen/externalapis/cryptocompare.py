@@ -2,29 +2,50 @@ import glob
 import logging
 import os
 import re
+from collections import defaultdict
 from json.decoder import JSONDecodeError
-from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, NewType, Optional
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    NewType,
+    Optional,
+    Tuple,
+)
 
-import gevent
 import requests
+from gevent.pool import Pool
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_BTC, A_USD
 from rotkehlchen.constants.cryptocompare import KNOWN_TO_MISS_FROM_CRYPTOCOMPARE
 from rotkehlchen.db.dbhandler import DBHandler
-from rotkehlchen.errors import NoPriceForGivenTimestamp, PriceQueryUnknownFromAsset, RemoteError
+from rotkehlchen.errors import (
+    DeserializationError,
+    NoPriceForGivenTimestamp,
+    PriceQueryUnknownFromAsset,
+    RemoteError,
+)
 from rotkehlchen.externalapis.interface import ExternalServiceWithApiKey
+from rotkehlchen.externalapis.price_history_store import (
+    PRICE_HISTORY_EXTENSION,
+    PriceHistoryEntry,
+    PriceHistoryStore,
+    extend_price_history_file,
+    write_price_history_file,
+)
 from rotkehlchen.fval import FVal
 from rotkehlchen.history import PriceHistorian
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import ExternalService, FilePath, Price, Timestamp
-from rotkehlchen.utils.misc import (
-    convert_to_int,
-    timestamp_to_date,
-    ts_now,
-    write_history_data_in_file,
-)
+from rotkehlchen.utils.misc import timestamp_to_date, ts_now
+from rotkehlchen.utils.network import create_session
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -36,12 +57,12 @@ PairCacheKey = NewType('PairCacheKey', T_PairCacheKey)
 
 RATE_LIMIT_MSG = 'You are over your rate limit please upgrade your account!'
 CRYPTOCOMPARE_QUERY_RETRY_TIMES = 10
+# How many pairs to concurrently query when prefetching historical price data
+CRYPTOCOMPARE_PREFETCH_CONCURRENCY = 5
+# Maximum length of the comma separated fsyms argument of the pricemulti endpoint
+CRYPTOCOMPARE_PRICEMULTI_FSYMS_MAX_LENGTH = 300
 
-
-class PriceHistoryEntry(NamedTuple):
-    time: Timestamp
-    low: Price
-    high: Price
+PricePair = Tuple[Asset, Asset]
 
 
 class PriceHistoryData(NamedTuple):
@@ -99,27 +120,56 @@ def _check_hourly_data_sanity(
         index += 2
 
 
+def _hourly_price(data: PriceHistoryStore, timestamp: Timestamp) -> Price:
+    """Returns the price of the hourly candle closest to timestamp or zero if there is none"""
+    # all data are sorted and timestamps are always increasing by 1 hour
+    # so the closest entry to the provided timestamp is found by its offset
+    index = data.closest_index(timestamp)
+    if index is None:
+        # no price found in the historical data from/to asset
+        return Price(ZERO)
+
+    entry = data[index]
+    if entry.high is None or entry.low is None:
+        # If we get some None in the hourly set price to 0 so that we check alternatives
+        return Price(ZERO)
+
+    return Price((entry.high + entry.low) / 2)
+
+
+def _is_comparison_to_nonusd_fiat(from_asset: Asset, to_asset: Asset) -> bool:
+    return (
+        (to_asset.is_fiat() and to_asset != A_USD) or
+        (from_asset.is_fiat() and from_asset != A_USD)
+    )
+
+
 class Cryptocompare(ExternalServiceWithApiKey):
     def __init__(self, data_directory: FilePath, database: Optional[DBHandler]) -> None:
         super().__init__(database=database, service_name=ExternalService.CRYPTOCOMPARE)
         self.data_directory = data_directory
-        self.price_history: Dict[PairCacheKey, PriceHistoryData] = {}
+        self.price_history: Dict[PairCacheKey, PriceHistoryStore] = {}
         self.price_history_file: Dict[PairCacheKey, FilePath] = {}
-        self.session = requests.session()
+        self.session = create_session()
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
 
-        # Check the data folder and remember the filenames of any cached history
+        # Check the data folder and remember the filenames of any cached history.
+        # Legacy json caches are only remembered if there is no binary cache for the
+        # pair and get migrated to the binary format the first time they are needed.
+        # If there is a binary cache the json one is stale and gets deleted.
         prefix = os.path.join(self.data_directory, 'price_history_')
         prefix = prefix.replace('\\', '\\\\')
-        regex = re.compile(prefix + r'(.*)\.json')
-        files_list = glob.glob(prefix + '*.json')
-
-        for file_ in files_list:
-            file_ = FilePath(file_.replace('\\\\', '\\'))
-            match = regex.match(file_)
-            assert match
-            cache_key = PairCacheKey(match.group(1))
-            self.price_history_file[cache_key] = file_
+        for extension in ('.json', PRICE_HISTORY_EXTENSION):
+            regex = re.compile(prefix + r'(.*)' + re.escape(extension))
+            files_list = glob.glob(prefix + '*' + extension)
+
+            for file_ in files_list:
+                file_ = FilePath(file_.replace('\\\\', '\\'))
+                match = regex.match(file_)
+                assert match
+                cache_key = PairCacheKey(match.group(1))
+                self._remove_legacy_json_price_history(cache_key)
+                self.price_history_file[cache_key] = file_
 
     def set_database(self, database: DBHandler) -> None:
         """If the cryptocompare instance was initialized without a DB this sets its DB"""
@@ -147,8 +197,10 @@ class Cryptocompare(ExternalServiceWithApiKey):
         if api_key:
             querystr += f'&api_key={api_key}'
 
+        limiter = get_rate_limiter('cryptocompare')
         tries = CRYPTOCOMPARE_QUERY_RETRY_TIMES
         while tries >= 0:
+            limiter.acquire()
             try:
                 response = self.session.get(querystr)
             except requests.exceptions.ConnectionError as e:
@@ -167,7 +219,7 @@ class Cryptocompare(ExternalServiceWithApiKey):
                             f'Got rate limited by cryptocompare. '
                             f'Backing off for {backoff_seconds}',
                         )
-                        gevent.sleep(backoff_seconds)
+                        limiter.rate_limited(backoff_seconds)
                         tries -= 1
                         continue
                     else:
@@ -237,6 +289,95 @@ class Cryptocompare(ExternalServiceWithApiKey):
         result = self._api_query(path=query_path)
         return result
 
+    def _query_pricemulti_symbols(
+            self,
+            symbols: List[str],
+            cc_to_asset_symbol: str,
+    ) -> Tuple[Dict[str, Price], Dict[str, str]]:
+        """Queries the pricemulti endpoint for the given symbols
+
+        Returns the prices and the errors of the symbols. If the request fails for
+        more than one symbol then they are queried again one at a time, so that a
+        symbol cryptocompare fails for doesn't fail all the others with it.
+        """
+        query_path = f'pricemulti?fsyms={",".join(symbols)}&tsyms={cc_to_asset_symbol}'
+        try:
+            result = self._api_query(path=query_path)
+        except RemoteError as e:
+            if len(symbols) == 1:
+                return {}, {symbols[0]: str(e)}
+
+            prices: Dict[str, Price] = {}
+            errors: Dict[str, str] = {}
+            for symbol in symbols:
+                symbol_prices, symbol_errors = self._query_pricemulti_symbols(
+                    symbols=[symbol],
+                    cc_to_asset_symbol=cc_to_asset_symbol,
+                )
+                prices.update(symbol_prices)
+                errors.update(symbol_errors)
+            return prices, errors
+
+        prices = {}
+        errors = {}
+        for symbol in symbols:
+            try:
+                prices[symbol] = Price(FVal(result[symbol][cc_to_asset_symbol]))
+            except KeyError:
+                continue
+            except ValueError as e:
+                errors[symbol] = f'Cryptocompare returned invalid price for {symbol}: {str(e)}'
+
+        return prices, errors
+
+    def query_endpoint_pricemulti(
+            self,
+            from_assets: Iterable[Asset],
+            to_asset: Asset,
+    ) -> Tuple[Dict[Asset, Price], Dict[Asset, str]]:
+        """Returns the current prices of many assets compared to another asset
+
+        The assets are queried in as few requests as the length limit of the
+        pricemulti endpoint's symbols argument allows. Assets whose price
+        cryptocompare did not return are missing from the result.
+
+        Returns the prices and, separately, the errors of the assets whose price
+        could not be queried due to a problem reaching the cryptocompare server or
+        with reading the response returned by the server.
+        """
+        # These two can raise but them raising here is a bug
+        cc_to_asset_symbol = to_asset.to_cryptocompare()
+        symbol_to_assets: DefaultDict[str, List[Asset]] = defaultdict(list)
+        for asset in from_assets:
+            symbol_to_assets[asset.to_cryptocompare()].append(asset)
+
+        chunks: List[List[str]] = []
+        chunk_length = 0
+        for symbol in symbol_to_assets:
+            # +1 for the comma separating it from the previous symbol
+            new_length = chunk_length + 1 + len(symbol)
+            if len(chunks) == 0 or new_length > CRYPTOCOMPARE_PRICEMULTI_FSYMS_MAX_LENGTH:
+                chunks.append([])
+                new_length = len(symbol)
+            chunks[-1].append(symbol)
+            chunk_length = new_length
+
+        prices: Dict[Asset, Price] = {}
+        errors: Dict[Asset, str] = {}
+        for chunk in chunks:
+            chunk_prices, chunk_errors = self._query_pricemulti_symbols(
+                symbols=chunk,
+                cc_to_asset_symbol=cc_to_asset_symbol,
+            )
+            for symbol, price in chunk_prices.items():
+                for asset in symbol_to_assets[symbol]:
+                    prices[asset] = price
+            for symbol, error in chunk_errors.items():
+                for asset in symbol_to_assets[symbol]:
+                    errors[asset] = error
+
+        return prices, errors
+
     def query_endpoint_pricehistorical(
             self,
             from_asset: Asset,
@@ -266,15 +407,87 @@ class Cryptocompare(ExternalServiceWithApiKey):
         result = self._api_query(query_path)
         return Price(FVal(result[cc_from_asset_symbol][cc_to_asset_symbol]))
 
+    def _price_history_filepath(self, cache_key: PairCacheKey) -> FilePath:
+        return FilePath(os.path.join(
+            self.data_directory,
+            'price_history_' + cache_key + PRICE_HISTORY_EXTENSION,
+        ))
+
+    def _migrate_json_price_history(self, cache_key: PairCacheKey) -> None:
+        """Converts a legacy json price history cache to the binary format
+
+        May raise:
+        - OSError if the json file can't be read or the binary file can't be written
+        - JSONDecodeError/KeyError if the json file is malformed
+        """
+        json_filepath = self.price_history_file[cache_key]
+        with open(json_filepath, 'r') as f:
+            data = _dict_history_to_data(rlk_jsonloads_dict(f.read()))
+
+        filepath = self._price_history_filepath(cache_key)
+        log.info(
+            'Migrating json price history cache to binary format',
+            json_filepath=json_filepath,
+            filepath=filepath,
+        )
+        write_price_history_file(
+            filepath=filepath,
+            entries=data.data,
+            start_time=data.start_time,
+            end_time=data.end_time,
+        )
+        self.price_history_file[cache_key] = filepath
+        os.remove(json_filepath)
+
+    def _remove_legacy_json_price_history(self, cache_key: PairCacheKey) -> None:
+        """Deletes the legacy json cache file of a pair, if that is the one remembered,
+        since a binary cache file is about to take its place"""
+        json_filepath = self.price_history_file.get(cache_key)
+        if json_filepath is None or not json_filepath.endswith('.json'):
+            return
+
+        try:
+            os.remove(json_filepath)
+        except OSError as e:
+            log.warning(
+                'Could not delete legacy json price history cache',
+                json_filepath=json_filepath,
+                error=str(e),
+            )
+
+    def _swap_price_history(
+            self,
+            cache_key: PairCacheKey,
+            filepath: FilePath,
+    ) -> PriceHistoryStore:
+        """Maps a just written cache file in place of the pair's current one
+
+        The current store is not closed since other greenlets may still be reading
+        it. Its file was either replaced, which keeps the old mapping valid, or
+        only appended to. It is unmapped once the last reference to it is dropped.
+        """
+        store = PriceHistoryStore(filepath)
+        self._remove_legacy_json_price_history(cache_key)
+        self.price_history_file[cache_key] = filepath
+        self.price_history[cache_key] = store
+        return store
+
     def _got_cached_price(self, cache_key: PairCacheKey, timestamp: Timestamp) -> bool:
         """Check if we got a price history for the timestamp cached"""
         if cache_key in self.price_history_file:
             if cache_key not in self.price_history:
                 try:
-                    with open(self.price_history_file[cache_key], 'r') as f:
-                        data = rlk_jsonloads_dict(f.read())
-                        self.price_history[cache_key] = _dict_history_to_data(data)
-                except (OSError, JSONDecodeError):
+                    if self.price_history_file[cache_key].endswith('.json'):
+                        self._migrate_json_price_history(cache_key)
+                    self.price_history[cache_key] = PriceHistoryStore(
+                        self.price_history_file[cache_key],
+                    )
+                except (OSError, JSONDecodeError, KeyError, ValueError, DeserializationError) as e:
+                    log.warning(
+                        'Could not read cached price history',
+                        cache_key=cache_key,
+                        error=str(e),
+                    )
                     return False
 
             in_range = (
@@ -287,41 +500,24 @@ class Cryptocompare(ExternalServiceWithApiKey):
 
         return False
 
-    def get_historical_data(
+    def _query_histohour_since(
             self,
             from_asset: Asset,
             to_asset: Asset,
-            timestamp: Timestamp,
-            historical_data_start: Timestamp,
-    ) -> List[PriceHistoryEntry]:
-        """
-        Get historical price data from cryptocompare
+            start_ts: Timestamp,
+            now_ts: Timestamp,
+    ) -> List[Dict[str, Any]]:
+        """Queries histohour in pages of 2000 hours from start_ts until now_ts
 
-        Returns a sorted list of price entries.
+        Returns the list of hourly candles starting from the candle of start_ts.
 
         - May raise RemoteError if there is a problem reaching the cryptocompare server
         or with reading the response returned by the server
         """
-        log.debug(
-            'Retrieving historical price data from cryptocompare',
-            from_asset=from_asset,
-            to_asset=to_asset,
-            timestamp=timestamp,
-        )
-
-        cache_key = PairCacheKey(from_asset.identifier + '_' + to_asset.identifier)
-        got_cached_value = self._got_cached_price(cache_key, timestamp)
-        if got_cached_value:
-            return self.price_history[cache_key].data
-
-        now_ts = ts_now()
         cryptocompare_hourquerylimit = 2000
         calculated_history: List[Dict[str, Any]] = []
 
-        if historical_data_start <= timestamp:
-            end_date = historical_data_start
-        else:
-            end_date = timestamp
+        end_date = start_ts
         while True:
             pr_end_date = end_date
             end_date = Timestamp(end_date + (cryptocompare_hourquerylimit) * 3600)
@@ -386,35 +582,193 @@ class Cryptocompare(ExternalServiceWithApiKey):
             if end_date >= now_ts:
                 break
 
+        return calculated_history
+
+    def get_historical_data(
+            self,
+            from_asset: Asset,
+            to_asset: Asset,
+            timestamp: Timestamp,
+            historical_data_start: Timestamp,
+    ) -> PriceHistoryStore:
+        """
+        Get historical price data from cryptocompare
+
+        Returns a sorted sequence of price entries, lazily read from the cache file.
+
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        """
+        log.debug(
+            'Retrieving historical price data from cryptocompare',
+            from_asset=from_asset,
+            to_asset=to_asset,
+            timestamp=timestamp,
+        )
+
+        cache_key = PairCacheKey(from_asset.identifier + '_' + to_asset.identifier)
+        got_cached_value = self._got_cached_price(cache_key, timestamp)
+        if got_cached_value:
+            return self.price_history[cache_key]
+
+        now_ts = ts_now()
+        store = self.price_history.get(cache_key, None)
+        can_extend = (
+            store is not None and
+            len(store) != 0 and
+            store.start_time <= timestamp
+        )
+        if can_extend:
+            return self._extend_historical_data(
+                from_asset=from_asset,
+                to_asset=to_asset,
+                cache_key=cache_key,
+                now_ts=now_ts,
+            )
+
+        if historical_data_start <= timestamp:
+            start_ts = historical_data_start
+        else:
+            start_ts = timestamp
+        calculated_history = self._query_histohour_since(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            start_ts=start_ts,
+            now_ts=now_ts,
+        )
+
         # Let's always check for data sanity for the hourly prices.
         _check_hourly_data_sanity(calculated_history, from_asset, to_asset)
         # and now since we actually queried the data let's also cache them
-        filename = FilePath(
-            os.path.join(self.data_directory, 'price_history_' + cache_key + '.json'),
-        )
+        filename = self._price_history_filepath(cache_key)
         log.info(
             'Updating price history cache',
             filename=filename,
             from_asset=from_asset,
             to_asset=to_asset,
         )
-        write_history_data_in_file(
-            data=calculated_history,
+        write_price_history_file(
+            filepath=filename,
+            entries=_dict_history_to_entries(calculated_history),
+            start_time=historical_data_start,
+            end_time=now_ts,
+        )
+
+        # Finally map the new cache file and return its entries
+        return self._swap_price_history(cache_key, filename)
+
+    def _extend_historical_data(
+            self,
+            from_asset: Asset,
+            to_asset: Asset,
+            cache_key: PairCacheKey,
+            now_ts: Timestamp,
+    ) -> PriceHistoryStore:
+        """Queries only the hourly candles after the last cached one and appends them
+
+        The last cached candle is requeried too since it may have been for an hour
+        that was not yet finished at the time. Continuity is checked at the seam
+        between the cached and the new data.
+
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        """
+        store = self.price_history[cache_key]
+        last_time = store.time_at(len(store) - 1)
+        new_history = self._query_histohour_since(
+            from_asset=from_asset,
+            to_asset=to_asset,
+            start_ts=last_time,
+            now_ts=now_ts,
+        )
+        new_history = [x for x in new_history if x['time'] >= last_time]
+        if len(new_history) != 0 and new_history[0]['time'] not in (last_time, last_time + 3600):
+            raise RemoteError(
+                f'Unexpected fata format in cryptocompare query_endpoint_histohour. '
+                f'Expected new {from_asset}_to_{to_asset} prices to continue from the cached '
+                f'ones at {last_time} but they start at {new_history[0]["time"]}',
+            )
+        _check_hourly_data_sanity(new_history, from_asset, to_asset)
+
+        filename = self.price_history_file[cache_key]
+        log.info(
+            'Appending to price history cache',
+            filename=filename,
+            from_asset=from_asset,
+            to_asset=to_asset,
+            new_entries=len(new_history),
+        )
+        extend_price_history_file(
             filepath=filename,
-            start_ts=historical_data_start,
-            end_ts=now_ts,
+            entries=_dict_history_to_entries(new_history),
+            end_time=now_ts,
         )
+        return self._swap_price_history(cache_key, filename)
+
+    def prefetch_historical_data(
+            self,
+            pair_timestamps: Dict[PricePair, List[Timestamp]],
+            historical_data_start: Timestamp,
+    ) -> None:
+        """Makes sure that the hourly price history of each given pair covers all of
+        its given timestamps so that the subsequent price queries need no network access.
+
+        Pairs are queried concurrently. The pairs query_historical_price() would
+        additionally need are also prefetched. Those are the USD pairs used to double
+        check comparisons to non-USD fiat and, in a second round, the BTC pairs for
+        the timestamps at which a pair turned out to have no price.
+
+        Errors are only logged since the actual price queries will encounter and
+        report them again.
+        """
+        queries: DefaultDict[PricePair, List[Timestamp]] = defaultdict(list)
+        for (from_asset, to_asset), timestamps in pair_timestamps.items():
+            queries[(from_asset, to_asset)].extend(timestamps)
+            if _is_comparison_to_nonusd_fiat(from_asset, to_asset):
+                for asset in (from_asset, to_asset):
+                    if not asset.is_fiat():
+                        queries[(asset, A_USD)].extend(timestamps)
+
+        btc_queries: DefaultDict[PricePair, List[Timestamp]] = defaultdict(list)
+
+        def prefetch_pair(pair: PricePair, timestamps: List[Timestamp]) -> None:
+            from_asset, to_asset = pair
+            if from_asset == to_asset or from_asset in KNOWN_TO_MISS_FROM_CRYPTOCOMPARE:
+                return
+
+            try:
+                # Query for both ends of the needed range. The second one is only a
+                # local check if the first query already covered it
+                for timestamp in (min(timestamps), max(timestamps)):
+                    data = self.get_historical_data(
+                        from_asset=from_asset,
+                        to_asset=to_asset,
+                        timestamp=timestamp,
+                        historical_data_start=historical_data_start,
+                    )
+            except RemoteError as e:
+                log.warning(
+                    'Failed to prefetch historical price data',
+                    from_asset=from_asset,
+                    to_asset=to_asset,
+                    error=str(e),
+                )
+                return
+
+            if from_asset == A_BTC or to_asset == A_BTC:
+                return
 
-        # Finally save the objects in memory and return them
-        data_including_time = {
-            'data': calculated_history,
-            'start_time': historical_data_start,
-            'end_time': end_date,
-        }
-        self.price_history_file[cache_key] = filename
-        self.price_history[cache_key] = _dict_history_to_data(data_including_time)
+            missing = [x for x in timestamps if _hourly_price(data, x) == ZERO]
+            if len(missing) != 0:
+                btc_queries[(from_asset, A_BTC)].extend(missing)
+                btc_queries[(A_BTC, to_asset)].extend(missing)
 
-        return self.price_history[cache_key].data
+        for round_queries in (queries, btc_queries):
+            log.debug('Prefetching historical price data', pairs=len(round_queries))
+            pool = Pool(CRYPTOCOMPARE_PREFETCH_CONCURRENCY)
+            for pair, timestamps in round_queries.items():
+                pool.spawn(prefetch_pair, pair, timestamps)
+            pool.join()
 
     def query_historical_price(
             self,
@@ -444,27 +798,7 @@ class Cryptocompare(ExternalServiceWithApiKey):
             historical_data_start=historical_data_start,
         )
 
-        # all data are sorted and timestamps are always increasing by 1 hour
-        # find the closest entry to the provided timestamp
-        if timestamp >= data[0].time:
-            # convert_to_int can't raise here due to its input
-            index = convert_to_int((timestamp - data[0].time) / 3600, accept_only_exact=False)
-            # print("timestamp: {} index: {} data_length: {}".format(timestamp, index, len(data)))
-            diff = abs(data[index].time - timestamp)
-            if index + 1 <= len(data) - 1:
-                diff_p1 = abs(data[index + 1].time - timestamp)
-                if diff_p1 < diff:
-                    index = index + 1
-
-            if data[index].high is None or data[index].low is None:
-                # If we get some None in the hourly set price to 0 so that we check alternatives
-                price = Price(ZERO)
-            else:
-                price = Price((data[index].high + data[index].low) / 2)
-        else:
-            # no price found in the historical data from/to asset, try alternatives
-            price = Price(ZERO)
-
+        price = _hourly_price(data, timestamp)
         if price == 0:
             if from_asset != 'BTC' and to_asset != 'BTC':
                 log.debug(
@@ -491,11 +825,7 @@ class Cryptocompare(ExternalServiceWithApiKey):
                 )
                 price = self.query_endpoint_pricehistorical(from_asset, to_asset, timestamp)
 
-        comparison_to_nonusd_fiat = (
-            (to_asset.is_fiat() and to_asset != A_USD) or
-            (from_asset.is_fiat() and from_asset != A_USD)
-        )
-        if comparison_to_nonusd_fiat:
+        if _is_comparison_to_nonusd_fiat(from_asset, to_asset):
             price = self._adjust_to_cryptocompare_price_incosistencies(
                 price=price,
                 from_asset=from_asset,
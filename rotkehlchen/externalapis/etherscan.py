@@ -1,10 +1,10 @@
 import logging
 from json.decoder import JSONDecodeError
-from typing import Any, Dict, List, Optional, Union, overload
+from typing import Any, Dict, Iterator, List, Optional, Union, overload
 
-import gevent
 import requests
 from eth_utils.address import to_checksum_address
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.assets.asset import EthereumToken
@@ -17,11 +17,23 @@ from rotkehlchen.serialization.deserialize import deserialize_fval, deserialize_
 from rotkehlchen.typing import ChecksumEthAddress, EthereumTransaction, ExternalService, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import convert_to_int, from_wei, hexstring_to_bytes
+from rotkehlchen.utils.network import create_session
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# How many transactions are requested from etherscan per query
+ETHERSCAN_TX_PAGE_SIZE = 1000
+# Etherscan returns no results past this many for a query, no matter the page
+ETHERSCAN_MAX_RESULTS = 10000
+# How many accounts the multi account balance endpoint accepts
+ETHERSCAN_MULTIBALANCE_MAX_ACCOUNTS = 20
+# How many queries that are part of one request are sent at the same time. They
+# are all still subject to the shared etherscan rate limit.
+ETHERSCAN_CONCURRENCY = 4
+
 
 def read_hash(data: Dict[str, Any], key: str) -> bytes:
     try:
@@ -82,7 +94,7 @@ class Etherscan(ExternalServiceWithApiKey):
     def __init__(self, database: DBHandler, msg_aggregator: MessagesAggregator) -> None:
         super().__init__(database=database, service_name=ExternalService.ETHERSCAN)
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = create_session()
         self.session.headers.update({'User-Agent': 'rotkehlchen'})
 
     @overload  # noqa: F811
@@ -159,9 +171,11 @@ class Etherscan(ExternalServiceWithApiKey):
             )
 
         logger.debug(f'Querying etherscan: {query_str}')
+        limiter = get_rate_limiter('etherscan')
         backoff = 1
         backoff_limit = 33
         while backoff < backoff_limit:
+            limiter.acquire()
             try:
                 response = self.session.get(query_str)
             except requests.exceptions.ConnectionError as e:
@@ -170,7 +184,7 @@ class Etherscan(ExternalServiceWithApiKey):
                         f'Got max retries exceeded from etherscan. Will '
                         f'backoff for {backoff} seconds.',
                     )
-                    gevent.sleep(backoff)
+                    limiter.rate_limited(backoff)
                     backoff = backoff * 2
                     if backoff >= backoff_limit:
                         raise RemoteError(
@@ -207,7 +221,7 @@ class Etherscan(ExternalServiceWithApiKey):
                             f'Got response: {response.text} from etherscan. Will '
                             f'backoff for {backoff} seconds.',
                         )
-                        gevent.sleep(backoff)
+                        limiter.rate_limited(backoff)
                         # Continue increasing backoff until limit is reached.
                         # If limit is reached then keep sleeping with the limit.
                         # Etherscan will let the query go through eventually
@@ -266,19 +280,23 @@ class Etherscan(ExternalServiceWithApiKey):
         - RemoteError due to self._query(). Also if the returned result
         is not in the expected format
         """
-        # Etherscan can only accept up to 20 accounts in the multi account balance endpoint
-        if len(accounts) > 20:
-            new_accounts = [accounts[x:x + 2] for x in range(0, len(accounts), 2)]
-        else:
-            new_accounts = [accounts]
-
-        balances = {}
-        for account_slice in new_accounts:
-            result = self._query(
+        chunks = [
+            accounts[x:x + ETHERSCAN_MULTIBALANCE_MAX_ACCOUNTS]
+            for x in range(0, len(accounts), ETHERSCAN_MULTIBALANCE_MAX_ACCOUNTS)
+        ]
+        pool = Pool(ETHERSCAN_CONCURRENCY)
+        # map returns the results in the order of the given chunks
+        results = pool.map(
+            lambda chunk: self._query(
                 module='account',
                 action='balancemulti',
-                options={'address': ','.join(account_slice)},
-            )
+                options={'address': ','.join(chunk)},
+            ),
+            chunks,
+        )
+
+        balances = {}
+        for result in results:
             if not isinstance(result, list):
                 raise RemoteError(
                     f'Etherscan multibalance result {result} is in unexpected format',
@@ -299,7 +317,7 @@ class Etherscan(ExternalServiceWithApiKey):
                     )
             except (KeyError, ValueError):
                 raise RemoteError(
-                    'Unexpected data format in etherscan multibalance response: {result}',
+                    f'Unexpected data format in etherscan multibalance response: {result}',
                 )
 
         return balances
@@ -331,29 +349,37 @@ class Etherscan(ExternalServiceWithApiKey):
 
         return token_amount / (FVal(10) ** FVal(token.decimals))
 
-    def get_transactions(
+    def _query_transactions_page(
             self,
             account: ChecksumEthAddress,
-            internal: bool,
-            from_block: Optional[int] = None,
-            to_block: Optional[int] = None,
-    ) -> List[EthereumTransaction]:
-        """Gets a list of transactions (either normal or internal) for account.
+            action: Literal['txlistinternal', 'txlist'],
+            from_block: int,
+            to_block: Optional[int],
+            page: int,
+    ) -> List[Dict[str, Any]]:
+        """Queries a page of the transactions of account sorted by block
 
         May raise:
-        - RemoteError due to self._query(). Also if the returned result
-        is not in the expected format
+        - RemoteError due to self._query()
         """
-        options = {'address': str(account)}
-        if from_block:
-            options['startBlock'] = str(from_block)
+        options = {
+            'address': str(account),
+            'startBlock': str(from_block),
+            'sort': 'asc',
+            'page': str(page),
+            'offset': str(ETHERSCAN_TX_PAGE_SIZE),
+        }
         if to_block:
             options['endBlock'] = str(to_block)
-        action: Literal['txlistinternal', 'txlist'] = 'txlistinternal' if internal else 'txlist'
+        return self._query(module='account', action=action, options=options)
 
-        result = self._query(module='account', action=action, options=options)
+    def _deserialize_transactions(
+            self,
+            entries: List[Dict[str, Any]],
+            internal: bool,
+    ) -> List[EthereumTransaction]:
         transactions = []
-        for entry in result:
+        for entry in entries:
             try:
                 tx = deserialize_transaction_from_etherscan(data=entry, internal=internal)
             except DeserializationError as e:
@@ -364,6 +390,80 @@ class Etherscan(ExternalServiceWithApiKey):
 
         return transactions
 
+    def get_transactions(
+            self,
+            account: ChecksumEthAddress,
+            internal: bool,
+            from_block: Optional[int] = None,
+            to_block: Optional[int] = None,
+    ) -> Iterator[List[EthereumTransaction]]:
+        """Gets the transactions (either normal or internal) for account in batches
+        ordered by block.
+
+        Each query returns at most one page of ETHERSCAN_TX_PAGE_SIZE transactions.
+        When a page is full the transactions of its last block may be cut off, so the
+        next query starts from that block. A block that fills whole pages by itself
+        is yielded once all of its pages are queried. So each batch contains all
+        transactions of its blocks and can be stored before the next one is queried.
+
+        May raise:
+        - RemoteError due to self._query(). Also if the returned result
+        is not in the expected format
+        """
+        action: Literal['txlistinternal', 'txlist'] = 'txlistinternal' if internal else 'txlist'
+        start_block = from_block if from_block else 0
+        while to_block is None or start_block <= to_block:
+            result = self._query_transactions_page(
+                account=account,
+                action=action,
+                from_block=start_block,
+                to_block=to_block,
+                page=1,
+            )
+            if len(result) < ETHERSCAN_TX_PAGE_SIZE:
+                yield self._deserialize_transactions(result, internal)
+                break
+
+            try:
+                blocks = [read_integer(x, 'blockNumber') for x in result]
+            except DeserializationError as e:
+                raise RemoteError(f'Unexpected etherscan transaction list response. {str(e)}')
+
+            first_block, last_block = blocks[0], blocks[-1]
+            if first_block != last_block:
+                yield self._deserialize_transactions(
+                    [x for x, block in zip(result, blocks) if block != last_block],
+                    internal,
+                )
+                start_block = last_block
+                continue
+
+            # The whole page is a single block so query the rest of its pages. The
+            # block is only yielded once all of its pages are queried.
+            block_entries = list(result)
+            page = 1
+            while (
+                    len(result) == ETHERSCAN_TX_PAGE_SIZE and
+                    (page + 1) * ETHERSCAN_TX_PAGE_SIZE <= ETHERSCAN_MAX_RESULTS
+            ):
+                page += 1
+                result = self._query_transactions_page(
+                    account=account,
+                    action=action,
+                    from_block=last_block,
+                    to_block=last_block,
+                    page=page,
+                )
+                block_entries.extend(result)
+
+            if len(result) == ETHERSCAN_TX_PAGE_SIZE:
+                self.msg_aggregator.add_warning(
+                    f'Block {last_block} has more than {ETHERSCAN_MAX_RESULTS} '
+                    f'transactions of {account}. Some of them are skipped',
+                )
+            yield self._deserialize_transactions(block_entries, internal)
+            start_block = last_block + 1
+
     def get_latest_block_number(self) -> int:
         """Gets the latest block number
 
@@ -438,7 +538,7 @@ class Etherscan(ExternalServiceWithApiKey):
     def get_logs(
             self,
             contract_address: ChecksumEthAddress,
-            topics: List[str],
+            topics: List[Optional[str]],
             from_block: int,
             to_block: Union[int, str] = 'latest',
     ) -> List[Dict[str, Any]]:
@@ -451,6 +551,8 @@ class Etherscan(ExternalServiceWithApiKey):
         """
         options = {'fromBlock': from_block, 'toBlock': to_block, 'address': contract_address}
         for idx, topic in enumerate(topics):
+            if topic is None:  # matches any value
+                continue
             options[f'topic{idx}'] = topic
             options[f'topic{idx}_{idx + 1}opr'] = 'and'
 
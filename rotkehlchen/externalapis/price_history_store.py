@@ -0,0 +1,355 @@
+"""A compact binary on-disk format for hourly price history
+
+The file consists of a fixed size header followed by three fixed-width columns,
+each of them having room for `capacity` entries out of which the first `count`
+are used:
+
+    header | time column | low column | high column
+
+The spare capacity lets new candles be appended in place by writing the new
+entries in each column and then updating the header.
+
+- The time column contains little endian signed 64 bit timestamps.
+- The price columns contain each price as a decimal coefficient (signed 64 bit)
+and a base 10 exponent (signed 16 bit). A missing price is denoted by an
+exponent equal to ``MISSING_PRICE_EXPONENT``.
+
+The files are memory mapped and entries are only deserialized when accessed so
+opening a price history does not need to load the whole file in memory.
+"""
+import logging
+import mmap
+import os
+import struct
+from decimal import Context, Decimal
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union, overload
+
+from rotkehlchen.errors import DeserializationError
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import FilePath, Price, Timestamp
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+PRICE_HISTORY_MAGIC = b'RKPH'
+PRICE_HISTORY_VERSION = 2
+PRICE_HISTORY_EXTENSION = '.bin'
+MISSING_PRICE_EXPONENT = -32768
+HOUR_IN_SECONDS = 3600
+
+# magic, version, start_time, end_time, count, capacity
+_HEADER = struct.Struct('<4sHqqII')
+# Version 1 files had no capacity in the header and no spare capacity in the columns
+_HEADER_V1 = struct.Struct('<4sHqqI')
+_TIME = struct.Struct('<q')
+_PRICE = struct.Struct('<qh')
+_ENTRY_SIZE = _TIME.size + 2 * _PRICE.size
+# Free slots left at the end of each column when a file is (re)written.
+# At least a month of hourly candles so that regular syncs append in place.
+_MIN_SPARE_CAPACITY = 24 * 31
+_MAX_COEFFICIENT_DIGITS = 18
+_ROUNDING_CONTEXT = Context(prec=_MAX_COEFFICIENT_DIGITS)
+
+
+class PriceHistoryEntry(NamedTuple):
+    time: Timestamp
+    low: Optional[Price]
+    high: Optional[Price]
+
+
+def _encode_price(price: Optional[FVal]) -> Tuple[int, int]:
+    """Turns a price into a (coefficient, exponent) pair that fits the price column
+
+    The decimal exponent of the value is kept as is so that the decoded FVal
+    has the exact same representation. Only values with more significant digits
+    than fit in the coefficient are rounded.
+    """
+    if price is None:
+        return 0, MISSING_PRICE_EXPONENT
+
+    value = price.num
+    if not value.is_finite():
+        return 0, MISSING_PRICE_EXPONENT
+
+    if len(value.as_tuple().digits) > _MAX_COEFFICIENT_DIGITS:
+        value = _ROUNDING_CONTEXT.plus(value)
+
+    sign, digits, exponent = value.as_tuple()
+    coefficient = int(''.join(str(x) for x in digits))
+    return -coefficient if sign else coefficient, exponent  # type: ignore
+
+
+def _decode_price(coefficient: int, exponent: int) -> Optional[Price]:
+    if exponent == MISSING_PRICE_EXPONENT:
+        return None
+
+    return Price(FVal(Decimal(coefficient).scaleb(exponent)))
+
+
+def _capacity_for(count: int) -> int:
+    return count + max(count // 8, _MIN_SPARE_CAPACITY)
+
+
+def _pack_columns(
+        entries: Iterable[PriceHistoryEntry],
+) -> Tuple[int, bytes, bytes, bytes]:
+    """Packs the entries into their column representation
+
+    Returns the number of entries and the bytes of the time, low and high columns
+    """
+    times: List[bytes] = []
+    lows: List[bytes] = []
+    highs: List[bytes] = []
+    for entry in entries:
+        times.append(_TIME.pack(entry.time))
+        lows.append(_PRICE.pack(*_encode_price(entry.low)))
+        highs.append(_PRICE.pack(*_encode_price(entry.high)))
+
+    return len(times), b''.join(times), b''.join(lows), b''.join(highs)
+
+
+def write_price_history_file(
+        filepath: FilePath,
+        entries: Iterable[PriceHistoryEntry],
+        start_time: Timestamp,
+        end_time: Timestamp,
+) -> None:
+    """Writes the given, sorted by time, price entries in the binary format
+
+    The file is first written under a temporary name and then moved in place
+    so that a reader never sees a partially written file.
+    """
+    count, times, lows, highs = _pack_columns(entries)
+    capacity = _capacity_for(count)
+    log.info(
+        'Writing price history file',
+        filepath=filepath,
+        start_time=start_time,
+        end_time=end_time,
+        entries=count,
+    )
+    tmp_filepath = filepath + '.tmp'
+    with open(tmp_filepath, 'wb') as f:
+        f.write(_HEADER.pack(
+            PRICE_HISTORY_MAGIC,
+            PRICE_HISTORY_VERSION,
+            start_time,
+            end_time,
+            count,
+            capacity,
+        ))
+        padding = capacity - count
+        f.write(times + bytes(padding * _TIME.size))
+        f.write(lows + bytes(padding * _PRICE.size))
+        f.write(highs + bytes(padding * _PRICE.size))
+    os.replace(tmp_filepath, filepath)
+
+
+def extend_price_history_file(
+        filepath: FilePath,
+        entries: List[PriceHistoryEntry],
+        end_time: Timestamp,
+) -> None:
+    """Appends the given, sorted by time, price entries to an existing file
+
+    The first of the new entries may have the same time as the last stored one
+    in which case it replaces it, since the last candle of a previous query may
+    have been for a then not yet finished hour. The caller should make sure that
+    the new entries continue the stored series.
+
+    If there is enough spare capacity the entries are written in place and only
+    then the header is updated, so a reader never sees a partial append. If not,
+    the whole file is rewritten with new spare capacity.
+
+    Files of an older version are always rewritten in the current one.
+
+    A PriceHistoryStore already open for the file keeps working. If the file is
+    rewritten it keeps the old mapping and otherwise it keeps seeing its entries,
+    with only the last one possibly updated to the requeried candle.
+
+    May raise:
+    - OSError if the file can't be read or written
+    - DeserializationError if the existing file is not a valid price history file
+    """
+    store = PriceHistoryStore(filepath)
+    try:
+        start_time = store.start_time
+        count = len(store)
+        capacity = store.capacity
+        position = count
+        if count != 0 and len(entries) != 0 and entries[0].time == store.time_at(count - 1):
+            position = count - 1
+
+        if store.version != PRICE_HISTORY_VERSION or position + len(entries) > capacity:
+            old_entries = store[:position]
+        else:
+            old_entries = None
+    finally:
+        store.close()
+
+    if old_entries is not None:
+        write_price_history_file(
+            filepath=filepath,
+            entries=old_entries + entries,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        return
+
+    new_count, times, lows, highs = _pack_columns(entries)
+    log.info(
+        'Appending to price history file',
+        filepath=filepath,
+        end_time=end_time,
+        entries=new_count,
+    )
+    times_offset = _HEADER.size
+    lows_offset = times_offset + capacity * _TIME.size
+    highs_offset = lows_offset + capacity * _PRICE.size
+    with open(filepath, 'r+b') as f:
+        f.seek(times_offset + position * _TIME.size)
+        f.write(times)
+        f.seek(lows_offset + position * _PRICE.size)
+        f.write(lows)
+        f.seek(highs_offset + position * _PRICE.size)
+        f.write(highs)
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(_HEADER.pack(
+            PRICE_HISTORY_MAGIC,
+            PRICE_HISTORY_VERSION,
+            start_time,
+            end_time,
+            position + new_count,
+            capacity,
+        ))
+
+
+class PriceHistoryStore():
+    """A read-only, memory mapped view over a binary price history file
+
+    Behaves like a sequence of PriceHistoryEntry sorted by time. Entries are
+    deserialized on access.
+
+    Since the entries are hourly candles, the entry closest to a timestamp can be
+    found in O(1) through `closest_index()`.
+    """
+
+    def __init__(self, filepath: FilePath) -> None:
+        """May raise:
+        - OSError if the file can't be opened or mapped
+        - DeserializationError if the file is not a valid price history file
+        """
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._read_header()
+        except DeserializationError:
+            self._mmap.close()
+            raise
+
+    def _read_header(self) -> None:
+        if len(self._mmap) < _HEADER_V1.size:
+            raise DeserializationError(f'Price history file {self.filepath} is too small')
+
+        magic, version, start_time, end_time, count = _HEADER_V1.unpack_from(self._mmap, 0)
+        if magic != PRICE_HISTORY_MAGIC:
+            raise DeserializationError(f'{self.filepath} is not a price history file')
+
+        if version == 1:
+            header_size = _HEADER_V1.size
+            capacity = count
+        elif version == PRICE_HISTORY_VERSION:
+            if len(self._mmap) < _HEADER.size:
+                raise DeserializationError(f'Price history file {self.filepath} is too small')
+            header_size = _HEADER.size
+            capacity = _HEADER.unpack_from(self._mmap, 0)[5]
+        else:
+            raise DeserializationError(
+                f'Unsupported price history file version {version} at {self.filepath}',
+            )
+
+        expected_size = header_size + capacity * _ENTRY_SIZE
+        if count > capacity or len(self._mmap) != expected_size:
+            raise DeserializationError(
+                f'Price history file {self.filepath} has size {len(self._mmap)} '
+                f'but {expected_size} was expected for {count}/{capacity} entries',
+            )
+
+        self.version = version
+        self.start_time = Timestamp(start_time)
+        self.end_time = Timestamp(end_time)
+        self.capacity = capacity
+        self._count = count
+        self._times_offset = header_size
+        self._lows_offset = self._times_offset + capacity * _TIME.size
+        self._highs_offset = self._lows_offset + capacity * _PRICE.size
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> PriceHistoryEntry:
+        ...
+
+    @overload  # noqa: F811
+    def __getitem__(self, index: slice) -> List[PriceHistoryEntry]:
+        ...
+
+    def __getitem__(  # noqa: F811
+            self,
+            index: Union[int, slice],
+    ) -> Union[PriceHistoryEntry, List[PriceHistoryEntry]]:
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(self._count))]
+
+        position = index + self._count if index < 0 else index
+        if position < 0 or position >= self._count:
+            raise IndexError(f'Price history index {index} out of range')
+
+        return self._entry(position)
+
+    def _entry(self, index: int) -> PriceHistoryEntry:
+        return PriceHistoryEntry(
+            time=self.time_at(index),
+            low=_decode_price(*_PRICE.unpack_from(
+                self._mmap,
+                self._lows_offset + index * _PRICE.size,
+            )),
+            high=_decode_price(*_PRICE.unpack_from(
+                self._mmap,
+                self._highs_offset + index * _PRICE.size,
+            )),
+        )
+
+    def time_at(self, index: int) -> Timestamp:
+        """Reads only the time column for the entry at index"""
+        return Timestamp(_TIME.unpack_from(self._mmap, self._times_offset + index * _TIME.size)[0])
+
+    def closest_index(self, timestamp: Timestamp) -> Optional[int]:
+        """Returns the index of the hourly entry closest to the given timestamp
+
+        Returns None if there are no entries or the timestamp is before the first one.
+        """
+        if self._count == 0:
+            return None
+
+        first_time = self.time_at(0)
+        if timestamp < first_time:
+            return None
+
+        index = min((timestamp - first_time) // HOUR_IN_SECONDS, self._count - 1)
+        if index + 1 < self._count:
+            diff = abs(self.time_at(index) - timestamp)
+            diff_p1 = abs(self.time_at(index + 1) - timestamp)
+            if diff_p1 < diff:
+                index += 1
+
+        return index
@@ -7,6 +7,11 @@ from rotkehlchen.errors import ConversionError
 AcceptableFValInitInput = Union[float, bytes, Decimal, int, str, 'FVal']
 AcceptableFValOtherInput = Union[int, 'FVal']
 
+# compare_signal() results. Kept around so comparisons don't allocate them every time
+_DECIMAL_MINUS_ONE = Decimal('-1')
+_DECIMAL_ZERO = Decimal('0')
+_DECIMAL_ONE = Decimal('1')
+
 
 class FVal():
     """A value to represent numbers for financial applications. At the moment
@@ -53,23 +58,23 @@ class FVal():
 
     def __gt__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('1')
+        return self.num.compare_signal(evaluated_other) == _DECIMAL_ONE
 
     def __lt__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('-1')
+        return self.num.compare_signal(evaluated_other) == _DECIMAL_MINUS_ONE
 
     def __le__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('-1'), Decimal('0'))
+        return self.num.compare_signal(evaluated_other) in (_DECIMAL_MINUS_ONE, _DECIMAL_ZERO)
 
     def __ge__(self, other: AcceptableFValOtherInput) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) in (Decimal('1'), Decimal('0'))
+        return self.num.compare_signal(evaluated_other) in (_DECIMAL_ONE, _DECIMAL_ZERO)
 
     def __eq__(self, other: object) -> bool:
         evaluated_other = evaluate_input(other)
-        return self.num.compare_signal(evaluated_other) == Decimal('0')
+        return self.num.compare_signal(evaluated_other) == _DECIMAL_ZERO
 
     def __add__(self, other: AcceptableFValOtherInput) -> 'FVal':
         evaluated_other = evaluate_input(other)
@@ -178,3 +183,117 @@ def evaluate_input(other: Any) -> Union[Decimal, int]:
         raise NotImplementedError("Expected either FVal or int.")
 
     return other
+
+
+FIXED_POINT_DECIMALS = 18
+FIXED_POINT_SCALE = 10 ** FIXED_POINT_DECIMALS
+
+
+def _divide_round_half_even(numerator: int, denominator: int) -> int:
+    quotient, remainder = divmod(numerator, denominator)
+    # divmod floors so the remainder has the sign of the denominator
+    doubled_remainder = 2 * abs(remainder)
+    if doubled_remainder > abs(denominator) or (
+            doubled_remainder == abs(denominator) and quotient % 2 == 1
+    ):
+        quotient += 1
+    return quotient
+
+
+class FixedVal():
+    """A fixed point value with 18 decimals, represented by a scaled integer
+
+    Meant to be used internally in hot paths that do lots of additions and
+    comparisons, such as the running totals of the accounting. Those are exact and
+    a lot cheaper than with FVal since they are plain integer operations without any
+    input evaluation. Multiplication and division round half even to 18 decimals.
+
+    Values are converted from and to FVal at the boundaries with from_fval() and
+    to_fval(). Anything after the 18th decimal is rounded half even in the conversion.
+    """
+
+    __slots__ = ('scaled',)
+
+    def __init__(self, scaled: int = 0) -> None:
+        """Creates the value scaled / 10^18. To convert a number use from_fval()"""
+        self.scaled = scaled
+
+    @staticmethod
+    def from_fval(value: FVal) -> 'FixedVal':
+        """May raise ValueError if the FVal is not a finite number"""
+        if not value.num.is_finite():
+            raise ValueError(f'Can not convert non finite {value} to a fixed point value')
+
+        sign, digits, exponent = value.num.as_tuple()
+        coefficient = 0
+        for digit in digits:
+            coefficient = coefficient * 10 + digit
+        if sign == 1:
+            coefficient = -coefficient
+
+        shift = exponent + FIXED_POINT_DECIMALS  # type: ignore # finite so int exponent
+        if shift >= 0:
+            return FixedVal(coefficient * 10 ** shift)
+
+        return FixedVal(_divide_round_half_even(coefficient, 10 ** -shift))
+
+    def to_fval(self) -> FVal:
+        # Constructing the Decimal from a string is exact, regardless of the context,
+        # and leaving out the trailing zeros keeps the representation FVal would have
+        integral, fractional = divmod(abs(self.scaled), FIXED_POINT_SCALE)
+        sign = '-' if self.scaled < 0 else ''
+        if fractional == 0:
+            return FVal(Decimal(f'{sign}{integral}'))
+
+        decimals = f'{fractional:0{FIXED_POINT_DECIMALS}d}'.rstrip('0')
+        return FVal(Decimal(f'{sign}{integral}.{decimals}'))
+
+    def __str__(self) -> str:
+        return str(self.to_fval())
+
+    def __repr__(self) -> str:
+        return f'FixedVal({str(self)})'
+
+    def __hash__(self) -> int:
+        return hash(self.scaled)
+
+    def __bool__(self) -> bool:
+        return self.scaled != 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FixedVal):
+            return NotImplemented
+        return self.scaled == other.scaled
+
+    def __lt__(self, other: 'FixedVal') -> bool:
+        return self.scaled < other.scaled
+
+    def __le__(self, other: 'FixedVal') -> bool:
+        return self.scaled <= other.scaled
+
+    def __gt__(self, other: 'FixedVal') -> bool:
+        return self.scaled > other.scaled
+
+    def __ge__(self, other: 'FixedVal') -> bool:
+        return self.scaled >= other.scaled
+
+    def __add__(self, other: 'FixedVal') -> 'FixedVal':
+        return FixedVal(self.scaled + other.scaled)
+
+    def __sub__(self, other: 'FixedVal') -> 'FixedVal':
+        return FixedVal(self.scaled - other.scaled)
+
+    def __mul__(self, other: 'FixedVal') -> 'FixedVal':
+        return FixedVal(_divide_round_half_even(self.scaled * other.scaled, FIXED_POINT_SCALE))
+
+    def __truediv__(self, other: 'FixedVal') -> 'FixedVal':
+        """May raise ZeroDivisionError"""
+        if other.scaled == 0:
+            raise ZeroDivisionError('FixedVal division by zero')
+        return FixedVal(_divide_round_half_even(self.scaled * FIXED_POINT_SCALE, other.scaled))
+
+    def __neg__(self) -> 'FixedVal':
+        return FixedVal(-self.scaled)
+
+    def __abs__(self) -> 'FixedVal':
+        return FixedVal(abs(self.scaled))
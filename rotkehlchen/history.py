@@ -1,10 +1,14 @@
 import logging
-from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Union
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import gevent
+from gevent.pool import Pool
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.chain.manager import ChainManager
 from rotkehlchen.constants.assets import A_DAI
-from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.constants.misc import DEFAULT_HISTORY_QUERY_CONCURRENCY, ZERO
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.exchanges.data_structures import AssetMovement, Loan, MarginPosition, Trade
 from rotkehlchen.exchanges.manager import ExchangeManager
@@ -142,6 +146,36 @@ class PriceHistorian():
             historical_data_start=instance._historical_data_start,
         )
 
+    @staticmethod
+    def prefetch_historical_prices(queries: Iterable[Tuple[Asset, Asset, Timestamp]]) -> None:
+        """Makes sure that the price data needed for all the given
+        (from_asset, to_asset, timestamp) queries are locally available so that
+        subsequent calls to query_historical_price() do not block on the network.
+
+        The queries are grouped per pair and the pairs are fetched concurrently.
+        Failures are not raised here since they will surface again when the
+        price is actually queried.
+        """
+        pair_timestamps: Dict[Tuple[Asset, Asset], List[Timestamp]] = {}
+        for from_asset, to_asset, timestamp in queries:
+            if from_asset == to_asset:
+                continue
+            if from_asset.is_fiat() and to_asset.is_fiat():
+                # Historical forex data are queried through the Inquirer
+                continue
+
+            pair_timestamps.setdefault((from_asset, to_asset), []).append(timestamp)
+
+        if len(pair_timestamps) == 0:
+            return
+
+        log.debug('Prefetching historical prices', pairs=len(pair_timestamps))
+        instance = PriceHistorian()
+        instance._cryptocompare.prefetch_historical_data(
+            pair_timestamps=pair_timestamps,
+            historical_data_start=instance._historical_data_start,
+        )
+
 
 class TradesHistorian():
 
@@ -152,6 +186,7 @@ class TradesHistorian():
             msg_aggregator: MessagesAggregator,
             exchange_manager: ExchangeManager,
             chain_manager: ChainManager,
+            history_query_concurrency: int = DEFAULT_HISTORY_QUERY_CONCURRENCY,
     ) -> None:
 
         self.msg_aggregator = msg_aggregator
@@ -159,6 +194,7 @@ class TradesHistorian():
         self.db = db
         self.exchange_manager = exchange_manager
         self.chain_manager = chain_manager
+        self.history_query_concurrency = history_query_concurrency
 
     def get_history(
             self,
@@ -206,14 +242,56 @@ class TradesHistorian():
             nonlocal empty_or_error
             empty_or_error += '\n' + error_msg
 
-        for _, exchange in self.exchange_manager.connected_exchanges.items():
-            exchange.query_history_with_callbacks(
+        exchange_results: Dict[
+            str,
+            Tuple[List[Trade], List[MarginPosition], List[AssetMovement], Any],
+        ] = {}
+        exchange_errors: Dict[str, str] = {}
+
+        def store_history_cb(
+                name: str,
+                trades_history: List[Trade],
+                margin_history: List[MarginPosition],
+                result_asset_movements: List[AssetMovement],
+                exchange_specific_data: Any,
+        ) -> None:
+            exchange_results[name] = (
+                trades_history,
+                margin_history,
+                result_asset_movements,
+                exchange_specific_data,
+            )
+
+        def store_error_cb(name: str, error_msg: str) -> None:
+            exchange_errors[name] = error_msg
+
+        # All exchanges and their endpoint families are queried concurrently. The
+        # pool bounds how many endpoint family queries run at the same time.
+        exchanges = list(self.exchange_manager.connected_exchanges.items())
+        query_pool = Pool(self.history_query_concurrency)
+        greenlets = [
+            gevent.spawn(
+                exchange.query_history_with_callbacks,
                 # We need to have full history of exchanges available
                 start_ts=Timestamp(0),
                 end_ts=now,
-                success_callback=populate_history_cb,
-                fail_callback=fail_history_cb,
-            )
+                success_callback=partial(store_history_cb, name),
+                fail_callback=partial(store_error_cb, name),
+                query_pool=query_pool,
+            ) for name, exchange in exchanges
+        ]
+        gevent.joinall(greenlets)
+        for greenlet in greenlets:
+            # Re-raise any unexpected exception of an exchange history query
+            greenlet.get()
+
+        # Merge in the order of the exchanges so that the sorted history is
+        # identical to the one of querying the exchanges one after the other
+        for name, _ in exchanges:
+            if name in exchange_results:
+                populate_history_cb(*exchange_results[name])
+            else:
+                fail_history_cb(exchange_errors[name])
 
         try:
             eth_transactions = query_ethereum_transactions(
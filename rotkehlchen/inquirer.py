@@ -3,18 +3,21 @@ from __future__ import unicode_literals
 import logging
 import os
 from json.decoder import JSONDecodeError
-from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 import requests
+from gevent.event import AsyncResult
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants import CURRENCYCONVERTER_API_KEY, ZERO
 from rotkehlchen.constants.assets import A_USD, FIAT_CURRENCIES
+from rotkehlchen.constants.timing import DEFAULT_CURRENT_PRICE_CACHE_TTL
 from rotkehlchen.errors import RemoteError, UnableToDecryptRemoteData
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import FilePath, Price, Timestamp
 from rotkehlchen.utils.misc import request_get_dict, retry_calls, timestamp_to_date, ts_now
+from rotkehlchen.utils.network import get_shared_session
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 if TYPE_CHECKING:
@@ -25,6 +28,23 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 
+class CachedPriceEntry(NamedTuple):
+    price: Price
+    time: Timestamp
+
+
+class PriceCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    # Queries that waited for an identical query already in flight instead of making a new one
+    deduplicated: int
+    entries: int
+    ttl: int
+
+    def serialize(self) -> Dict[str, int]:
+        return self._asdict()  # pylint: disable=no-member
+
+
 def _query_exchanges_rateapi(base: Asset, quote: Asset) -> Optional[Price]:
     assert base.is_fiat(), 'fiat currency should have been provided'
     assert quote.is_fiat(), 'fiat currency should have been provided'
@@ -83,11 +103,18 @@ class Inquirer():
     _cached_forex_data: Dict
     _data_directory: FilePath
     _cryptocompare: 'Cryptocompare'
+    _current_price_cache_ttl: int
+    _cached_current_price: Dict[Asset, CachedPriceEntry]
+    _usd_price_queries: Dict[Asset, AsyncResult]
+    _price_cache_hits: int
+    _price_cache_misses: int
+    _price_cache_deduplicated: int
 
     def __new__(
             cls,
             data_dir: FilePath = None,
             cryptocompare: 'Cryptocompare' = None,
+            current_price_cache_ttl: int = DEFAULT_CURRENT_PRICE_CACHE_TTL,
     ) -> 'Inquirer':
         if Inquirer.__instance is not None:
             return Inquirer.__instance
@@ -99,6 +126,12 @@ class Inquirer():
 
         Inquirer.__instance._data_directory = data_dir
         Inquirer._cryptocompare = cryptocompare
+        Inquirer.__instance._current_price_cache_ttl = current_price_cache_ttl
+        Inquirer.__instance._cached_current_price = {}
+        Inquirer.__instance._usd_price_queries = {}
+        Inquirer.__instance._price_cache_hits = 0
+        Inquirer.__instance._price_cache_misses = 0
+        Inquirer.__instance._price_cache_deduplicated = 0
         filename = os.path.join(data_dir, 'price_history_forex.json')
         try:
             with open(filename, 'r') as f:
@@ -114,20 +147,138 @@ class Inquirer():
     def find_usd_price(asset: Asset) -> Price:
         """Returns the current USD price of the asset
 
+        Prices are cached for the configured TTL. If the price of the asset is already
+        being queried by another greenlet then this waits for that query's result
+        instead of making another one.
+
         May raise:
         - RemoteError if the cryptocompare query has a problem
         """
-        result = Inquirer()._cryptocompare.query_endpoint_price(
-            from_asset=asset,
-            to_asset=A_USD,
+        prices, errors = Inquirer.find_usd_prices([asset])
+        if asset in errors:
+            raise RemoteError(errors[asset])
+
+        return prices[asset]
+
+    @staticmethod
+    def find_usd_prices(
+            assets: Iterable[Asset],
+    ) -> Tuple[Dict[Asset, Price], Dict[Asset, str]]:
+        """Returns the current USD prices of the given assets
+
+        Works like find_usd_price() but all the prices that are neither cached nor
+        already being queried are queried together, in as few cryptocompare
+        requests as possible.
+
+        The assets whose price query had a problem are missing from the returned
+        prices. Their errors are returned separately, per asset, so that callers
+        can skip only those.
+        """
+        instance = Inquirer()
+        now = ts_now()
+        prices: Dict[Asset, Price] = {}
+        in_flight_queries: Dict[Asset, AsyncResult] = {}
+        to_query: List[Asset] = []
+        for asset in dict.fromkeys(assets):  # deduplicate keeping the order
+            cache = instance._cached_current_price.get(asset)
+            if cache is not None and now - cache.time < instance._current_price_cache_ttl:
+                instance._price_cache_hits += 1
+                prices[asset] = cache.price
+                continue
+
+            in_flight_query = instance._usd_price_queries.get(asset)
+            if in_flight_query is not None:
+                instance._price_cache_deduplicated += 1
+                in_flight_queries[asset] = in_flight_query
+                continue
+
+            instance._price_cache_misses += 1
+            to_query.append(asset)
+
+        errors: Dict[Asset, str] = {}
+        if len(to_query) != 0:
+            queried_prices, query_errors = Inquirer._query_usd_prices(to_query)
+            prices.update(queried_prices)
+            errors.update(query_errors)
+
+        for asset, query in in_flight_queries.items():
+            try:
+                prices[asset] = query.get()
+            except RemoteError as e:
+                errors[asset] = str(e)
+
+        return prices, errors
+
+    @staticmethod
+    def get_price_cache_stats() -> PriceCacheStats:
+        instance = Inquirer()
+        return PriceCacheStats(
+            hits=instance._price_cache_hits,
+            misses=instance._price_cache_misses,
+            deduplicated=instance._price_cache_deduplicated,
+            entries=len(instance._cached_current_price),
+            ttl=instance._current_price_cache_ttl,
         )
-        if 'USD' not in result:
-            log.error('Cryptocompare usd price query failed', asset=asset)
-            return Price(ZERO)
 
-        price = Price(FVal(result['USD']))
-        log.debug('Got usd price from cryptocompare', asset=asset, price=price)
-        return price
+    @staticmethod
+    def _query_usd_prices(
+            assets: List[Asset],
+    ) -> Tuple[Dict[Asset, Price], Dict[Asset, str]]:
+        """Queries cryptocompare for the current USD prices of the assets and caches them
+
+        While the query is in flight other greenlets asking for the same prices
+        wait for its result. Returns the prices and the errors of the assets whose
+        price query had a problem.
+        """
+        instance = Inquirer()
+        queries = {asset: AsyncResult() for asset in assets}
+        instance._usd_price_queries.update(queries)
+        try:
+            result, query_errors = instance._cryptocompare.query_endpoint_pricemulti(
+                from_assets=assets,
+                to_asset=A_USD,
+            )
+        except BaseException as e:
+            # The greenlets waiting for the query must never be left blocked. If the
+            # query greenlet is killed or timed out they get a RemoteError instead
+            # since that exception would end them silently.
+            if not isinstance(e, Exception):
+                e = RemoteError(f'USD price query was interrupted: {e!r}')
+            for query in queries.values():
+                if not query.ready():
+                    query.set_exception(e)
+            raise
+        finally:
+            for asset in assets:
+                del instance._usd_price_queries[asset]
+
+        now = ts_now()
+        prices = {}
+        errors = {}
+        for asset in assets:
+            if asset in query_errors:
+                log.error(
+                    'Cryptocompare usd price query failed',
+                    asset=asset,
+                    error=query_errors[asset],
+                )
+                errors[asset] = query_errors[asset]
+                queries[asset].set_exception(RemoteError(query_errors[asset]))
+                continue
+
+            price = result.get(asset)
+            if price is None:
+                log.error('Cryptocompare usd price query failed', asset=asset)
+                price = Price(ZERO)
+            else:
+                log.debug('Got usd price from cryptocompare', asset=asset, price=price)
+                # Failures are not cached so that they are retried at the next call
+                instance._cached_current_price[asset] = CachedPriceEntry(price=price, time=now)
+
+            queries[asset].set(price)
+            prices[asset] = price
+
+        return prices, errors
 
     @staticmethod
     def get_fiat_usd_exchange_rates(
@@ -171,7 +322,7 @@ class Inquirer():
             handle_429=False,
             backoff_in_seconds=0,
             method_name='requests.get',
-            function=requests.get,
+            function=get_shared_session().get,
             # function's arguments
             url=query_str,
         )
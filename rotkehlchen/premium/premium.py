@@ -16,6 +16,7 @@ from typing_extensions import Literal
 from rotkehlchen.constants import ROTKEHLCHEN_SERVER_TIMEOUT
 from rotkehlchen.errors import IncorrectApiKeyFormat, PremiumAuthenticationError, RemoteError
 from rotkehlchen.typing import B64EncodedBytes, Timestamp
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -92,7 +93,7 @@ class Premium():
 
     def __init__(self, credentials: PremiumCredentials):
         self.status = SubscriptionStatus.UNKNOWN
-        self.session = requests.session()
+        self.session = create_session()
         self.apiversion = '1'
         self.uri = 'https://rotki.com/api/{}/'.format(self.apiversion)
         self.reset_credentials(credentials)
@@ -4,10 +4,12 @@ import argparse
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import gevent
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.accounting.accountant import Accountant
@@ -17,6 +19,7 @@ from rotkehlchen.balances.manual import account_for_manually_tracked_balances
 from rotkehlchen.chain.ethereum.manager import EthereumManager
 from rotkehlchen.chain.manager import BlockchainBalancesUpdate, ChainManager
 from rotkehlchen.constants.assets import A_USD
+from rotkehlchen.constants.timing import BALANCE_QUERY_LOCATION_TIMEOUT
 from rotkehlchen.data.importer import DataImporter
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.settings import DBSettings, ModifiableDBSettings
@@ -27,6 +30,7 @@ from rotkehlchen.errors import (
     RemoteError,
     SystemPermissionError,
 )
+from rotkehlchen.exchanges.exchange import ExchangeInterface
 from rotkehlchen.exchanges.manager import ExchangeManager
 from rotkehlchen.externalapis.alethio import Alethio
 from rotkehlchen.externalapis.cryptocompare import Cryptocompare
@@ -50,11 +54,14 @@ from rotkehlchen.typing import (
 from rotkehlchen.usage_analytics import maybe_submit_usage_analytics
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import combine_stat_dicts, dict_get_sumof, merge_dicts
+from rotkehlchen.utils.network import set_http_timeout
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 MAIN_LOOP_SECS_DELAY = 15
+# How many locations are queried for balances at the same time
+BALANCE_QUERY_CONCURRENCY = 4
 
 
 class Rotkehlchen():
@@ -109,6 +116,7 @@ class Rotkehlchen():
                 f'The given data directory {self.data_dir} is not readable or writable',
             )
         self.args = args
+        set_http_timeout(args.http_timeout)
         self.msg_aggregator = MessagesAggregator()
         self.greenlet_manager = GreenletManager(msg_aggregator=self.msg_aggregator)
         self.exchange_manager = ExchangeManager(msg_aggregator=self.msg_aggregator)
@@ -116,7 +124,11 @@ class Rotkehlchen():
         self.data = DataHandler(self.data_dir, self.msg_aggregator)
         self.cryptocompare = Cryptocompare(data_directory=self.data_dir, database=None)
         # Initialize the Inquirer singleton
-        Inquirer(data_dir=self.data_dir, cryptocompare=self.cryptocompare)
+        Inquirer(
+            data_dir=self.data_dir,
+            cryptocompare=self.cryptocompare,
+            current_price_cache_ttl=args.current_price_cache_ttl,
+        )
 
         self.lock.release()
         self.shutdown_event = gevent.event.Event()
@@ -221,6 +233,7 @@ class Rotkehlchen():
             ethrpc_endpoint=eth_rpc_endpoint,
             etherscan=self.etherscan,
             msg_aggregator=self.msg_aggregator,
+            database=self.data.db,
         )
         self.chain_manager = ChainManager(
             blockchain_accounts=self.data.db.get_blockchain_accounts(),
@@ -229,6 +242,7 @@ class Rotkehlchen():
             msg_aggregator=self.msg_aggregator,
             alethio=alethio,
             greenlet_manager=self.greenlet_manager,
+            database=self.data.db,
             eth_modules=ethereum_modules,
         )
         self.ethereum_analyzer = EthereumAnalyzer(
@@ -241,6 +255,7 @@ class Rotkehlchen():
             msg_aggregator=self.msg_aggregator,
             exchange_manager=self.exchange_manager,
             chain_manager=self.chain_manager,
+            history_query_concurrency=self.args.history_query_concurrency,
         )
         self.user_is_logged_in = True
 
@@ -478,6 +493,88 @@ class Rotkehlchen():
 
         return result
 
+    def _query_location_balances(
+            self,
+            ignore_cache: bool,
+    ) -> Tuple[Dict[str, Any], Dict[str, FVal], bool]:
+        """Query the balances of all exchanges, blockchains and banks concurrently
+
+        Each location is queried in its own greenlet of a bounded pool and is given
+        BALANCE_QUERY_LOCATION_TIMEOUT seconds to respond so that a single slow
+        location can't stall the rest.
+
+        Returns a tuple of the balances per location, the seconds each location
+        query took and whether all locations were queried without a problem.
+        """
+        def query_exchange(exchange: ExchangeInterface) -> Optional[Dict[Asset, Dict[str, Any]]]:
+            exchange_balances, _ = exchange.query_balances(ignore_cache=ignore_cache)
+            # If we got an error, disregard that exchange but make sure we don't save data
+            if not isinstance(exchange_balances, dict):
+                return None
+            return exchange_balances
+
+        def query_blockchain() -> Optional[Dict[Asset, Dict[str, Any]]]:
+            try:
+                blockchain_result = self.chain_manager.query_balances(
+                    blockchain=None,
+                    ignore_cache=ignore_cache,
+                )
+            except (RemoteError, EthSyncError) as e:
+                log.error(f'Querying blockchain balances failed due to: {str(e)}')
+                return None
+
+            return {
+                asset: balance.to_dict() for asset, balance in blockchain_result.totals.items()
+            }
+
+        queries: Dict[str, Callable[[], Optional[Dict[Asset, Dict[str, Any]]]]] = {}
+        for name, exchange in self.exchange_manager.connected_exchanges.items():
+            queries[name] = partial(query_exchange, exchange)
+        queries['blockchain'] = query_blockchain
+        queries['banks'] = self.query_fiat_balances
+
+        results: Dict[str, Optional[Dict[Asset, Dict[str, Any]]]] = {}
+        query_times: Dict[str, FVal] = {}
+
+        def query_location(location: str) -> None:
+            start = time.time()
+            try:
+                with gevent.Timeout(BALANCE_QUERY_LOCATION_TIMEOUT):
+                    results[location] = queries[location]()
+            except gevent.Timeout:
+                log.error(
+                    f'Querying {location} balances did not finish within '
+                    f'{BALANCE_QUERY_LOCATION_TIMEOUT} seconds',
+                )
+                results[location] = None
+            finally:
+                query_times[location] = FVal(round(time.time() - start, 3))
+                log.debug(
+                    'Location balances query finished',
+                    location=location,
+                    seconds=query_times[location],
+                )
+
+        pool = Pool(BALANCE_QUERY_CONCURRENCY)
+        greenlets = [pool.spawn(query_location, location) for location in queries]
+        pool.join()
+        for greenlet in greenlets:
+            # Re-raise any unexpected exception of a location query
+            greenlet.get()
+
+        # Merge in the order the locations were given so the result is deterministic
+        balances = {}
+        problem_free = True
+        for location in queries:
+            location_balances = results[location]
+            if location_balances is None:
+                problem_free = False
+            elif location != 'banks' or location_balances != {}:
+                # Banks are only included when some fiat balance is tracked
+                balances[location] = location_balances
+
+        return balances, query_times, problem_free
+
     def query_balances(
             self,
             requested_save_data: bool = True,
@@ -492,35 +589,14 @@ class Rotkehlchen():
         to be saved in the DB
         If ignore_cache is True then all underlying calls that have a cache ignore it
 
-        Returns a dictionary with the queried balances.
+        Returns a dictionary with the queried balances. Under the 'query_times' key
+        are the seconds it took to query each location.
         """
         log.info('query_balances called', requested_save_data=requested_save_data)
 
-        balances = {}
-        problem_free = True
-        for _, exchange in self.exchange_manager.connected_exchanges.items():
-            exchange_balances, _ = exchange.query_balances(ignore_cache=ignore_cache)
-            # If we got an error, disregard that exchange but make sure we don't save data
-            if not isinstance(exchange_balances, dict):
-                problem_free = False
-            else:
-                balances[exchange.name] = exchange_balances
-
-        try:
-            blockchain_result = self.chain_manager.query_balances(
-                blockchain=None,
-                ignore_cache=ignore_cache,
-            )
-            balances['blockchain'] = {
-                asset: balance.to_dict() for asset, balance in blockchain_result.totals.items()
-            }
-        except (RemoteError, EthSyncError) as e:
-            problem_free = False
-            log.error(f'Querying blockchain balances failed due to: {str(e)}')
-
-        result = self.query_fiat_balances()
-        if result != {}:
-            balances['banks'] = result
+        balances, query_times, problem_free = self._query_location_balances(
+            ignore_cache=ignore_cache,
+        )
         balances = account_for_manually_tracked_balances(db=self.data.db, balances=balances)
 
         combined = combine_stat_dicts([v for k, v in balances.items()])
@@ -592,6 +668,7 @@ class Rotkehlchen():
         except AttributeError:
             pass
 
+        result_dict['query_times'] = query_times
         return result_dict
 
     def set_settings(self, settings: ModifiableDBSettings) -> Tuple[bool, str]:
@@ -643,6 +720,8 @@ class Rotkehlchen():
         # Success, remove it also from the DB
         self.data.db.remove_exchange(name)
         self.data.db.delete_used_query_range_for_exchange(name)
+        if name == 'binance':
+            self.data.db.delete_binance_traded_symbols()
         return True, ''
 
     def query_periodic_data(self) -> Dict[str, Union[bool, Timestamp]]:
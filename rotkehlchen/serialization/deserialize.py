@@ -496,3 +496,26 @@ def deserialize_blocknumber(symbol: Union[str, int]) -> int:
         )
 
     return block_number
+
+
+def deserialize_int_from_hex(symbol: str, location: str) -> int:
+    """Takes a hex string and turns it into an integer. Etherscan returns zero
+    values as '0x' so that is turned into 0.
+
+    May Raise:
+    - DeserializationError if the given data are in an unexpected format.
+    """
+    if not isinstance(symbol, str):
+        raise DeserializationError(f'Expected a hex string but got {type(symbol)} at {location}')
+
+    if symbol == '0x':
+        return 0
+
+    try:
+        result = int(symbol, 16)
+    except ValueError:
+        raise DeserializationError(
+            f'Could not turn string "{symbol}" into an integer at {location}',
+        )
+
+    return result
@@ -2,6 +2,7 @@ from contextlib import ExitStack
 from http import HTTPStatus
 from unittest.mock import patch
 
+import gevent
 import pytest
 import requests
 
@@ -66,7 +67,10 @@ def assert_all_balances(
         assert result['location']['external']['usd_value'] is not None
         assert result['location']['external']['percentage_of_net_value'] is not None
 
-    assert len(result) == 6  # 4 assets + location + net_usd
+    assert set(result['query_times'].keys()) == {'binance', 'poloniex', 'blockchain', 'banks'}
+    assert all(FVal(x) >= 0 for x in result['query_times'].values())
+
+    assert len(result) == 7  # 4 assets + location + net_usd + query_times
 
     eth_tbalances = db.query_timed_balances(from_ts=None, to_ts=None, asset=A_ETH)
     if not expected_data_in_db:
@@ -385,6 +389,48 @@ def test_query_all_balances_with_manually_tracked_balances(
     )
 
 
+@pytest.mark.parametrize('number_of_eth_accounts', [2])
+@pytest.mark.parametrize('btc_accounts', [[UNIT_BTC_ADDRESS1, UNIT_BTC_ADDRESS2]])
+@pytest.mark.parametrize('owned_eth_tokens', [[A_RDN]])
+@pytest.mark.parametrize('added_exchanges', [('binance', 'poloniex')])
+def test_query_all_balances_slow_location_times_out(
+        rotkehlchen_api_server_with_exchanges,
+        ethereum_accounts,
+        btc_accounts,
+):
+    """Test that a location not responding in time does not stall the other locations
+
+    Its balances should be missing from the result and nothing should be saved in the DB"""
+    rotki = rotkehlchen_api_server_with_exchanges.rest_api.rotkehlchen
+    setup = setup_balances(rotki, ethereum_accounts, btc_accounts)
+    binance = rotki.exchange_manager.connected_exchanges['binance']
+
+    def mock_slow_query_balances(**kwargs):  # pylint: disable=unused-argument
+        gevent.sleep(5)
+        return {}, ''
+
+    with ExitStack() as stack:
+        setup.enter_all_patches(stack)
+        stack.enter_context(patch('rotkehlchen.rotkehlchen.BALANCE_QUERY_LOCATION_TIMEOUT', 0.5))
+        stack.enter_context(
+            patch.object(binance, 'query_balances', side_effect=mock_slow_query_balances),
+        )
+        response = requests.get(
+            api_url_for(
+                rotkehlchen_api_server_with_exchanges,
+                "allbalancesresource",
+            ),
+        )
+
+    assert_proper_response(response)
+    result = response.json()['result']
+    assert set(result['location'].keys()) == {'poloniex', 'blockchain', 'banks'}
+    assert FVal(result['query_times']['binance']) < FVal(5)
+    expected_btc = get_asset_balance_total('BTC', setup) - setup.binance_balances['BTC']
+    assert FVal(result['BTC']['amount']) == expected_btc
+    assert len(rotki.data.db.query_timed_balances(from_ts=None, to_ts=None, asset=A_BTC)) == 0
+
+
 def test_query_all_balances_errors(rotkehlchen_api_server):
     """Test that errors are handled correctly by the all balances endpoint"""
     # invoke the endpoint with non boolean save_data
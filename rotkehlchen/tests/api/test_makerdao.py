@@ -12,6 +12,7 @@ from rotkehlchen.constants.ethereum import (
     MAKERDAO_PROXY_REGISTRY_ADDRESS,
     MAKERDAO_VAT_ADDRESS,
 )
+from rotkehlchen.errors import RemoteError
 from rotkehlchen.externalapis.etherscan import Etherscan
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.api import (
@@ -41,6 +42,7 @@ class DSRTestSetup(NamedTuple):
     etherscan_patch: _patch
     dsr_balance_response: Dict[str, Any]
     dsr_history_response: Dict[ChecksumEthAddress, Dict[str, Any]]
+    params: 'DSRMockParameters'
 
 
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=False)
@@ -61,6 +63,8 @@ class DSRMockParameters():
     account1_join2_blocknumber: int
     account1_exit1_blocknumber: int
     account2_join1_blocknumber: int
+    dsr_file_rate: int
+    dsr_file_blocknumber: int
 
 
 def blocknumber_to_timestamp(num: int) -> int:
@@ -84,7 +88,7 @@ def mock_etherscan_for_dsr(
     account1_join1_move_event = f"""{{"address": "{MAKERDAO_VAT_ADDRESS}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{MAKERDAO_POT_ADDRESS}", "{int_to_32byteshexstr(account1_join1_deposit)}"], "data": "0xwedontcare", "blockNumber": "{hex(params.account1_join1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join1_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontcare", "transactionIndex": "0x79"}}"""  # noqa: E501
     account1_join2_event = f"""{{"address": "{MAKERDAO_POT_ADDRESS}", "topics": ["0x049878f300000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{int_to_32byteshexstr(params.account1_join2_normalized_balance)}", "0x0000000000000000000000000000000000000000000000000000000000000000"], "data": "0xwedontcare", "blockNumber": "{hex(params.account1_join2_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join2_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontacre", "transactionIndex": "0x79"}}"""  # noqa: E501
     account1_join2_deposit = params.account1_join2_normalized_balance * params.account1_join2_chi
-    account1_join2_move_event = f"""{{"address": "{MAKERDAO_VAT_ADDRESS}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{MAKERDAO_POT_ADDRESS}", "{int_to_32byteshexstr(account1_join2_deposit)}"], "data": "0xwedontcare", "blockNumber": "{hex(params.account1_join1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join2_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontcare", "transactionIndex": "0x79"}}"""  # noqa: E501
+    account1_join2_move_event = f"""{{"address": "{MAKERDAO_VAT_ADDRESS}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{MAKERDAO_POT_ADDRESS}", "{int_to_32byteshexstr(account1_join2_deposit)}"], "data": "0xwedontcare", "blockNumber": "{hex(params.account1_join2_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join2_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontcare", "transactionIndex": "0x79"}}"""  # noqa: E501
 
     account1_exit1_event = f"""{{"address": "{MAKERDAO_POT_ADDRESS}", "topics": ["0x7f8661a100000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{int_to_32byteshexstr(params.account1_exit1_normalized_balance)}", "0x0000000000000000000000000000000000000000000000000000000000000000"], "data": "0xwedontcare", "blockNumber": "{hex(params.account1_exit1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_exit1_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontacre", "transactionIndex": "0x79"}}"""  # noqa: E501
     account1_exit1_withdrawal = (
@@ -96,6 +100,8 @@ def mock_etherscan_for_dsr(
     account2_join1_deposit = params.account2_join1_normalized_balance * params.account2_join1_chi
     account2_join1_move_event = f"""{{"address": "{MAKERDAO_VAT_ADDRESS}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy2)}", "{MAKERDAO_POT_ADDRESS}", "{int_to_32byteshexstr(account2_join1_deposit)}"], "data": "0xwedontcare", "blockNumber": "{hex(params.account2_join1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account2_join1_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontcare", "transactionIndex": "0x79"}}"""  # noqa: E501
 
+    dsr_file_event = f"""{{"address": "{MAKERDAO_POT_ADDRESS}", "topics": ["0x29ae811400000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(make_ethereum_address())}", "0x6473720000000000000000000000000000000000000000000000000000000000", "{int_to_32byteshexstr(params.dsr_file_rate)}"], "data": "0xwedontcare", "blockNumber": "{hex(params.dsr_file_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.dsr_file_blocknumber))}", "gasPrice": "dontcare", "gasUsed": "dontcare", "logIndex": "0x6c", "transactionHash": "dontcare", "transactionIndex": "0x79"}}"""  # noqa: E501
+
     def mock_requests_get(url, *args, **kwargs):
         if 'etherscan.io/api?module=proxy&action=eth_blockNumber' in url:
             response = f'{{"status":"1","message":"OK","result":"{TEST_LATEST_BLOCKNUMBER_HEX}"}}'
@@ -146,7 +152,9 @@ def mock_etherscan_for_dsr(
         elif 'etherscan.io/api?module=logs&action=getLogs' in url:
             contract_address = url.split('&address=')[1].split('&topic0')[0]
             topic0 = url.split('&topic0=')[1].split('&topic0_1')[0]
-            topic1 = url.split('&topic1=')[1].split('&topic1_2')[0]
+            topic1 = None
+            if '&topic1=' in url:
+                topic1 = url.split('&topic1=')[1].split('&topic1_2')[0]
             topic2 = None
             if '&topic2=' in url:
                 topic2 = url.split('&topic2=')[1].split('&')[0]
@@ -179,6 +187,13 @@ def mock_etherscan_for_dsr(
                             events.append(account1_exit1_event)
 
                     response = f'{{"status":"1","message":"OK","result":[{",".join(events)}]}}'
+
+                elif topic0.startswith('0x29ae8114'):  # file
+                    events = []
+                    if from_block <= params.dsr_file_blocknumber <= to_block:
+                        events.append(dsr_file_event)
+
+                    response = f'{{"status":"1","message":"OK","result":[{",".join(events)}]}}'
                 else:
                     raise AssertionError('Etherscan unknown log query to makerdao POT contract')
 
@@ -240,6 +255,9 @@ def setup_tests_for_dsr(
         account1_join2_blocknumber=9102100,
         account1_exit1_blocknumber=9232100,
         account2_join1_blocknumber=9342100,
+        # 2% per year
+        dsr_file_rate=1000000000627937192491029810,
+        dsr_file_blocknumber=8990000,
     )
     etherscan_patch = mock_etherscan_for_dsr(
         etherscan=etherscan,
@@ -315,6 +333,7 @@ def setup_tests_for_dsr(
         etherscan_patch=etherscan_patch,
         dsr_balance_response=dsr_balance_response,
         dsr_history_response=dsr_history_response,
+        params=params,
     )
 
 
@@ -487,3 +506,66 @@ def test_query_historical_dsr_async(
     assert outcome['message'] == ''
     result = outcome['result']
     assert_dsr_history_result_is_correct(result, setup)
+
+
+@pytest.mark.parametrize('number_of_eth_accounts', [3])
+@pytest.mark.parametrize('ethereum_modules', [['makerdao']])
+@pytest.mark.parametrize('start_with_valid_premium', [True])
+def test_dsr_gains_in_period_are_computed_locally(
+        rotkehlchen_api_server,
+        ethereum_accounts,
+):
+    """Test that after the DSR history is queried the DSR gains of any period are
+    computed from the stored movements and chi values without remote queries"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    makerdao = rotki.chain_manager.makerdao
+    setup = setup_tests_for_dsr(
+        etherscan=rotki.etherscan,
+        account1=ethereum_accounts[0],
+        account2=ethereum_accounts[2],
+        original_requests_get=requests.get,
+    )
+    with setup.etherscan_patch:
+        makerdao.get_historical_dsr()
+
+    params = setup.params
+    # A month after the last movement of both accounts
+    from_ts = blocknumber_to_timestamp(params.account2_join1_blocknumber) + 100
+    to_ts = from_ts + 30 * 86400
+    file_ts = blocknumber_to_timestamp(params.dsr_file_blocknumber)
+    rate = FVal(params.dsr_file_rate) / FVal(10 ** 27)
+    chi_difference = (rate ** (to_ts - file_ts) - rate ** (from_ts - file_ts)) * FVal(10 ** 27)
+    normalized_balance = (
+        params.account1_join1_normalized_balance +
+        params.account1_join2_normalized_balance -
+        params.account1_exit1_normalized_balance +
+        params.account2_join1_normalized_balance
+    )
+    expected_gain = _dsrdai_to_dai(normalized_balance * chi_difference)
+
+    def mock_requests_get(url, *args, **kwargs):  # pylint: disable=unused-argument
+        raise AssertionError(f'Unexpected remote query to {url}')
+
+    with patch.object(rotki.etherscan.session, 'get', side_effect=mock_requests_get):
+        gain = makerdao.get_dsr_gains_in_period(from_ts, to_ts)
+        assert gain.is_close(expected_gain, max_diff='1e-12')
+        # Before the DSR was first set there are no gains
+        gain = makerdao.get_dsr_gains_in_period(0, file_ts)
+        assert gain == FVal(0)
+
+    # A period ending after the last sync first syncs the DSR history. If that
+    # fails the gains are still computed from what is in the DB.
+    makerdao.last_sync_ts = to_ts - 1
+    with patch.object(
+            makerdao,
+            '_sync_dsr_history',
+            side_effect=RemoteError('etherscan is down'),
+    ) as sync_mock:
+        gain = makerdao.get_dsr_gains_in_period(from_ts, to_ts)
+        assert gain.is_close(expected_gain, max_diff='1e-12')
+        assert sync_mock.call_count == 1
+        warnings = rotki.msg_aggregator.consume_warnings()
+        assert any('etherscan is down' in warning for warning in warnings)
+
+        makerdao.get_dsr_gains_in_period(from_ts, to_ts - 1)
+        assert sync_mock.call_count == 1
@@ -1,10 +1,14 @@
 from typing import Any, Dict
 from unittest.mock import patch
+from urllib.parse import urlparse
 
 import requests
 
+from rotkehlchen.constants.timing import DEFAULT_CURRENT_PRICE_CACHE_TTL
 from rotkehlchen.tests.utils.api import api_url_for, assert_proper_response
 from rotkehlchen.utils.misc import get_system_spec
+from rotkehlchen.utils.network import get_shared_session
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 
 
 def test_query_version_when_up_to_date(rotkehlchen_api_server):
@@ -80,3 +84,50 @@ def test_query_version_when_update_required(rotkehlchen_api_server):
     assert data['result']['our_version'] == our_version
     assert data['result']['latest_version'] == 'v99.99.99'
     assert 'v99.99.99' in data['result']['download_url']
+
+
+def test_query_price_cache_stats(rotkehlchen_api_server):
+    """Test that the price cache statistics endpoint works"""
+    response = requests.get(api_url_for(rotkehlchen_api_server, "pricecachestatsresource"))
+    assert_proper_response(response)
+    result = response.json()['result']
+    assert set(result.keys()) == {'hits', 'misses', 'deduplicated', 'entries', 'ttl'}
+    assert all(isinstance(value, int) and value >= 0 for value in result.values())
+    assert result['ttl'] == DEFAULT_CURRENT_PRICE_CACHE_TTL
+
+
+def test_query_rate_limit_stats(rotkehlchen_api_server):
+    """Test that the rate limit statistics endpoint reports the limited services"""
+    get_rate_limiter('test_service').acquire()
+    response = requests.get(api_url_for(rotkehlchen_api_server, "ratelimitstatsresource"))
+    assert_proper_response(response)
+    result = response.json()['result']
+    assert set(result['test_service'].keys()) == {
+        'requests',
+        'rate_limited',
+        'total_wait_seconds',
+        'max_wait_seconds',
+        'rate',
+    }
+    assert result['test_service']['requests'] >= 1
+    assert result['test_service']['rate_limited'] == 0
+
+
+def test_query_connection_stats(rotkehlchen_api_server):
+    """Test that the connection statistics endpoint reports every queried host"""
+    # Query the API server itself through the shared session so that its host
+    # has a connection pool
+    url = api_url_for(rotkehlchen_api_server, "connectionstatsresource")
+    response = get_shared_session().get(url)
+    assert_proper_response(response)
+
+    response = requests.get(url)
+    assert_proper_response(response)
+    result = response.json()['result']
+    assert isinstance(result, dict)
+    host = urlparse(url).hostname
+    assert host in result
+    assert result[host]['requests'] >= 1
+    for stats in result.values():
+        assert set(stats.keys()) == {'requests', 'connections', 'reused'}
+        assert stats['reused'] <= stats['requests']
@@ -43,6 +43,7 @@ from rotkehlchen.tests.utils.constants import (
     ETH_ADDRESS3,
     MOCK_INPUT_DATA,
 )
+from rotkehlchen.tests.utils.factories import make_ethereum_address
 from rotkehlchen.tests.utils.rotkehlchen import add_starting_balances
 from rotkehlchen.typing import (
     ApiKey,
@@ -74,6 +75,11 @@ TABLES_AT_INIT = [
     'current_balances',
     'trades',
     'ethereum_transactions',
+    'ethereum_block_timestamps',
+    'ethereum_logs',
+    'dsr_chi_values',
+    'dsr_movements',
+    'btc_address_balances',
     'manually_tracked_balances',
     'trade_type',
     'location',
@@ -1044,3 +1050,72 @@ def test_get_external_service_credentials(database):
         credentials = database.get_external_service_credentials(service)
         assert credentials.service == service
         assert credentials.api_key == f'{service.name.lower()}_key'
+
+
+def test_block_timestamps(database):
+    database.add_block_timestamps({100: 1000, 105: 1075, 110: 1150})
+    # Already known blocks are ignored
+    database.add_block_timestamps({105: 1075, 120: 1300})
+
+    assert database.get_block_timestamps([100, 101, 120]) == {100: 1000, 120: 1300}
+    assert database.get_closest_block_timestamps(1100) == ((105, 1075), (110, 1150))
+    assert database.get_closest_block_timestamps(1150) == ((110, 1150), (120, 1300))
+    assert database.get_closest_block_timestamps(999) == (None, (100, 1000))
+    assert database.get_closest_block_timestamps(1400) == ((120, 1300), None)
+
+
+def test_ethereum_transactions_add_block_timestamps(database):
+    tx = EthereumTransaction(
+        tx_hash=b'1',
+        timestamp=Timestamp(1451606400),
+        block_number=800000,
+        from_address='0x0',
+        to_address='0x1',
+        value=FVal(1),
+        gas=FVal(2),
+        gas_price=FVal(3),
+        gas_used=FVal(4),
+        input_data=b'',
+        nonce=1,
+    )
+    database.add_ethereum_transactions([tx], from_etherscan=True)
+    assert database.get_block_timestamps([800000]) == {800000: 1451606400}
+
+
+def test_ethereum_logs(database):
+    query_key = '0x197E90f9FAD81970bA7976f33CbD77088E5D7cf7_abc'
+    assert database.get_ethereum_logs_range(query_key) is None
+
+    logs = [
+        {'blockNumber': 105, 'logIndex': 2, 'topics': ['0x1'], 'data': '0x'},
+        {'blockNumber': 101, 'logIndex': 0, 'topics': ['0x2'], 'data': '0x'},
+        {'blockNumber': 105, 'logIndex': 1, 'topics': ['0x3'], 'data': '0x'},
+    ]
+    database.add_ethereum_logs(query_key, logs, from_block=100, to_block=110)
+    # Already stored logs are ignored and the range is replaced
+    database.add_ethereum_logs(query_key, logs[:1], from_block=90, to_block=110)
+
+    assert database.get_ethereum_logs_range(query_key) == (90, 110)
+    assert database.get_ethereum_logs(query_key, 100, 110) == [logs[1], logs[2], logs[0]]
+    assert database.get_ethereum_logs(query_key, 102, 110) == [logs[2], logs[0]]
+    assert database.get_ethereum_logs('other', 100, 110) == []
+
+
+def test_dsr_chi_values_and_movements(database):
+    database.add_dsr_chi_values([(1574092800, 10 ** 27, 1000000000627937192491029810)])
+    database.add_dsr_chi_values([(1575000000, 1000570000000000000000000000, 10 ** 27)])
+    assert database.get_dsr_chi_values() == [
+        (1574092800, 10 ** 27, 1000000000627937192491029810),
+        (1575000000, 1000570000000000000000000000, 10 ** 27),
+    ]
+
+    address = make_ethereum_address()
+    deposit = ('deposit', 1321333211111121, 1484384727226416633422143, 9000100, 900010050)
+    withdrawal = ('withdrawal', 221333211131121, 248571285272231211212112, 9232100, 923210050)
+    database.set_dsr_movements(address, [withdrawal, deposit])
+    assert database.get_dsr_movements() == {address: [deposit, withdrawal]}
+    # The movements of an account are replaced
+    database.set_dsr_movements(address, [deposit])
+    assert database.get_dsr_movements() == {address: [deposit]}
+    database.set_dsr_movements(address, [])
+    assert database.get_dsr_movements() == {}
@@ -1,3 +1,4 @@
+import bisect
 import warnings as test_warnings
 from unittest.mock import patch
 
@@ -8,16 +9,24 @@ from rotkehlchen.assets.converters import UNSUPPORTED_BINANCE_ASSETS, asset_from
 from rotkehlchen.constants.assets import A_BTC, A_ETH
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.errors import RemoteError, UnknownAsset, UnsupportedAsset
-from rotkehlchen.exchanges.binance import Binance, trade_from_binance
+from rotkehlchen.exchanges.binance import (
+    BINANCE_REQUEST_WEIGHTS,
+    BINANCE_SYMBOLS_FULL_SCAN_INTERVAL,
+    Binance,
+    trade_from_binance,
+)
 from rotkehlchen.exchanges.data_structures import Location, Trade, TradeType
 from rotkehlchen.fval import FVal
+from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.tests.utils.constants import A_BNB, A_RDN, A_USDT, A_XMR
 from rotkehlchen.tests.utils.exchanges import BINANCE_BALANCES_RESPONSE, BINANCE_MYTRADES_RESPONSE
 from rotkehlchen.tests.utils.factories import make_api_key, make_api_secret
 from rotkehlchen.tests.utils.history import TEST_END_TS
-from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.tests.utils.mock import MockClock, MockResponse, patch_ratelimit_clock
 from rotkehlchen.typing import AssetMovementCategory
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.ratelimit import SERVICE_RATE_LIMITS, TokenBucket
 
 
 def test_name():
@@ -172,6 +181,25 @@ def test_binance_backoff_after_429(function_scope_binance):
             binance.api_query('exchangeInfo')
 
 
+def test_binance_request_weight_per_minute():
+    """Binance counts the request weight in windows of a minute. Make sure that a
+    full scan of the trades of all symbols never spends more than 1200 in a minute"""
+    clock = MockClock()
+    weight = BINANCE_REQUEST_WEIGHTS['myTrades']
+    request_times = []
+    with patch_ratelimit_clock(clock):
+        capacity, refill_rate = SERVICE_RATE_LIMITS['binance']
+        bucket = TokenBucket(capacity=capacity, refill_rate=refill_rate)
+        for _ in range(1500):
+            bucket.acquire(weight)
+            request_times.append(clock.now)
+
+    assert request_times[-1] > 5 * 60
+    for idx, start in enumerate(request_times):
+        requests_in_window = bisect.bisect_left(request_times, start + 60) - idx
+        assert requests_in_window * weight <= 1200
+
+
 def test_binance_assets_are_known(
         database,
         inquirer,  # pylint: disable=unused-argument
@@ -225,6 +253,30 @@ def test_binance_query_balances_unknown_asset(function_scope_binance):
     assert 'unsupported binance asset ETF' in warnings[1]
 
 
+def test_binance_query_balances_skips_assets_without_price(function_scope_binance):
+    """Test that an asset whose USD price can't be queried only skips its own balance"""
+    binance = function_scope_binance
+
+    def mock_balances_return(url):  # pylint: disable=unused-argument
+        return MockResponse(200, BINANCE_BALANCES_RESPONSE)
+
+    price_patch = patch.object(
+        Inquirer,
+        'find_usd_prices',
+        return_value=({A_BTC: FVal(10)}, {A_ETH: 'cryptocompare is down'}),
+    )
+    with patch.object(binance.session, 'get', side_effect=mock_balances_return), price_patch:
+        balances, msg = binance.query_balances()
+
+    assert msg == ''
+    assert balances == {
+        A_BTC: {'amount': FVal('4723846.89208129'), 'usd_value': FVal('47238468.9208129')},
+    }
+    errors = binance.msg_aggregator.consume_errors()
+    assert len(errors) == 1
+    assert 'query USD price: cryptocompare is down. Skipping balance entry' in errors[0]
+
+
 def test_binance_query_trade_history(function_scope_binance):
     """Test that turning a binance trade as returned by the server to our format works"""
     binance = function_scope_binance
@@ -256,6 +308,78 @@ def test_binance_query_trade_history(function_scope_binance):
     assert trades[0] == expected_trade
 
 
+def test_binance_query_trade_history_remembers_traded_symbols(function_scope_binance):
+    """Test that after the first trades query only traded and held symbols are queried"""
+    binance = function_scope_binance
+    queried_symbols = []
+
+    def mock_my_trades(url):
+        if 'account' in url:
+            return MockResponse(200, BINANCE_BALANCES_RESPONSE)
+
+        symbol = url.split('symbol=')[1].split('&')[0]
+        queried_symbols.append(symbol)
+        text = BINANCE_MYTRADES_RESPONSE if symbol == 'BNBBTC' else '[]'
+        return MockResponse(200, text)
+
+    with patch.object(binance.session, 'get', side_effect=mock_my_trades):
+        trades = binance.query_trade_history(start_ts=0, end_ts=1564301134)
+        assert len(trades) == 1
+        assert len(queried_symbols) == len(binance.symbols_to_pair)
+        assert binance.db.get_binance_traded_symbols() == ['BNBBTC']
+
+        queried_symbols = []
+        trades = binance.query_trade_history(start_ts=0, end_ts=1564401134)
+        assert len(trades) == 1
+
+    held_assets = ('BTC', 'ETH', 'IDONTEXIST', 'ETF')
+    expected_symbols = {'BNBBTC'}
+    for symbol, pair in binance.symbols_to_pair.items():
+        if pair.binance_base_asset in held_assets or pair.binance_quote_asset in held_assets:
+            expected_symbols.add(symbol)
+    assert len(queried_symbols) == len(expected_symbols)
+    assert set(queried_symbols) == expected_symbols
+    assert len(expected_symbols) < len(binance.symbols_to_pair)
+
+
+def test_binance_query_trade_history_full_symbol_scan(function_scope_binance):
+    """Test that all symbols are periodically queried again and that the trades of
+    newly found symbols are saved even if they are older than the queried range"""
+    binance = function_scope_binance
+    assert 'LTCUSDT' in binance.symbols_to_pair
+    queried_symbols = []
+    traded_symbols = ['BNBBTC']
+
+    def mock_my_trades(url):
+        if 'account' in url:
+            return MockResponse(200, BINANCE_BALANCES_RESPONSE)
+
+        symbol = url.split('symbol=')[1].split('&')[0]
+        queried_symbols.append(symbol)
+        text = BINANCE_MYTRADES_RESPONSE if symbol in traded_symbols else '[]'
+        return MockResponse(200, text)
+
+    with patch.object(binance.session, 'get', side_effect=mock_my_trades):
+        binance.query_trade_history(start_ts=0, end_ts=1564301134)
+
+        # A trade in a symbol whose assets are not held is not found before the
+        # next full scan
+        traded_symbols.append('LTCUSDT')
+        queried_symbols = []
+        binance.query_trade_history(start_ts=0, end_ts=1564401134)
+        assert 'LTCUSDT' not in queried_symbols
+
+        queried_symbols = []
+        full_scan_ts = ts_now() + BINANCE_SYMBOLS_FULL_SCAN_INTERVAL
+        with patch('rotkehlchen.exchanges.binance.ts_now', return_value=full_scan_ts):
+            binance.query_trade_history(start_ts=0, end_ts=1564501134)
+        assert len(queried_symbols) == len(binance.symbols_to_pair)
+
+    trades = binance.db.get_trades(from_ts=0, to_ts=1564501134, location=Location.BINANCE)
+    assert {trade.pair for trade in trades} == {'BNB_BTC', 'LTC_USDT'}
+    assert 'LTCUSDT' in binance.db.get_binance_traded_symbols()
+
+
 def test_binance_query_trade_history_unexpected_data(function_scope_binance):
     """Test that turning a binance trade that contains unexpected data is handled gracefully"""
     binance = function_scope_binance
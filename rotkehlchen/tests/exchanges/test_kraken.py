@@ -1,4 +1,5 @@
 import warnings as test_warnings
+from functools import partial
 from unittest.mock import patch
 
 import pytest
@@ -13,6 +14,7 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.history import TEST_END_TS
 from rotkehlchen.typing import AssetMovementCategory
 from rotkehlchen.utils.misc import ts_now
+from rotkehlchen.utils.ratelimit import get_rate_limiter
 
 
 def test_name():
@@ -332,3 +334,34 @@ def test_trade_from_kraken_unexpected_data(function_scope_kraken):
     input_trades = test_trades
     input_trades = input_trades.replace('"vol": "1",', '')
     query_kraken_and_test(input_trades, expected_warnings_num=0, expected_errors_num=1)
+
+
+def test_kraken_query_costs(function_scope_kraken):
+    """Test that private calls take their kraken API counter cost from the kraken
+    rate limiter and that public calls are limited separately"""
+    kraken = function_scope_kraken
+    acquired = []
+
+    def mock_acquire(service, tokens=1):
+        acquired.append((service, tokens))
+        return 0.0
+
+    private_patch = patch.object(
+        get_rate_limiter('kraken'),
+        'acquire',
+        side_effect=partial(mock_acquire, 'kraken'),
+    )
+    public_patch = patch.object(
+        get_rate_limiter('kraken_public'),
+        'acquire',
+        side_effect=partial(mock_acquire, 'public'),
+    )
+    with patch.object(kraken, '_query_private', return_value={}), \
+            patch.object(kraken, '_query_public', return_value={}), \
+            private_patch, public_patch:
+        # MockKraken mocks query_private so call the real one
+        Kraken.query_private(kraken, 'Ledgers')
+        Kraken.query_private(kraken, 'Balance')
+        kraken.query_public('AssetPairs')
+
+    assert acquired == [('kraken', 2), ('kraken', 1), ('public', 1)]
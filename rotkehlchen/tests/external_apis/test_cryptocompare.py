@@ -4,9 +4,17 @@ from unittest.mock import patch
 import pytest
 
 from rotkehlchen.assets.asset import Asset
-from rotkehlchen.constants.assets import A_BTC, A_USD
-from rotkehlchen.errors import NoPriceForGivenTimestamp
-from rotkehlchen.externalapis.cryptocompare import Cryptocompare
+from rotkehlchen.assets.resolver import AssetResolver
+from rotkehlchen.constants.assets import A_BTC, A_DAI, A_ETH, A_USD
+from rotkehlchen.errors import NoPriceForGivenTimestamp, RemoteError, UnsupportedAsset
+from rotkehlchen.externalapis.cryptocompare import (
+    CRYPTOCOMPARE_PRICEMULTI_FSYMS_MAX_LENGTH,
+    Cryptocompare,
+)
+from rotkehlchen.externalapis.price_history_store import (
+    PriceHistoryEntry,
+    write_price_history_file,
+)
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.constants import A_SNGLS
 
@@ -22,6 +30,80 @@ def test_cryptocompare_query_pricehistorical(cryptocompare):
     assert price
 
 
+def test_cryptocompare_query_pricemulti_chunks(cryptocompare):
+    """Test that many assets are priced in a few pricemulti queries within the length limit"""
+    assets = []
+    for identifier in list(AssetResolver().assets)[:200]:
+        asset = Asset(identifier)
+        try:
+            asset.to_cryptocompare()
+        except (UnsupportedAsset, RuntimeError):
+            continue
+        assets.append(asset)
+    missing_asset = assets[-1]
+
+    queried_symbols = []
+
+    def mock_api_query(path):
+        assert path.startswith('pricemulti?fsyms=') and path.endswith('&tsyms=USD')
+        fsyms = path[len('pricemulti?fsyms='):-len('&tsyms=USD')]
+        assert len(fsyms) <= CRYPTOCOMPARE_PRICEMULTI_FSYMS_MAX_LENGTH
+        symbols = fsyms.split(',')
+        queried_symbols.append(symbols)
+        return {
+            symbol: {'USD': idx + 1} for idx, symbol in enumerate(symbols)
+            if symbol != missing_asset.to_cryptocompare()
+        }
+
+    with patch.object(cryptocompare, '_api_query', side_effect=mock_api_query):
+        prices, errors = cryptocompare.query_endpoint_pricemulti(
+            from_assets=assets,
+            to_asset=A_USD,
+        )
+
+    assert errors == {}
+    all_symbols = [symbol for symbols in queried_symbols for symbol in symbols]
+    assert len(all_symbols) == len({asset.to_cryptocompare() for asset in assets})
+    assert 1 < len(queried_symbols) < len(assets)
+    assert missing_asset not in prices
+    assert len(prices) == len(assets) - 1
+    for symbols in queried_symbols:
+        for idx, symbol in enumerate(symbols):
+            for asset in assets:
+                if asset.to_cryptocompare() == symbol and asset != missing_asset:
+                    assert prices[asset] == FVal(idx + 1)
+
+
+def test_cryptocompare_query_pricemulti_failed_request(cryptocompare):
+    """Test that if a pricemulti request fails its symbols are queried one at a time
+    and only the ones that still fail get an error"""
+    assets = [A_BTC, A_ETH, A_DAI]
+    queried_symbols = []
+
+    def mock_api_query(path):
+        fsyms = path[len('pricemulti?fsyms='):-len('&tsyms=USD')]
+        symbols = fsyms.split(',')
+        queried_symbols.append(symbols)
+        if A_ETH.to_cryptocompare() in symbols:
+            raise RemoteError('cryptocompare failed')
+        if A_DAI.to_cryptocompare() in symbols:
+            return {symbol: {'USD': 'notaprice'} for symbol in symbols}
+        return {symbol: {'USD': 10} for symbol in symbols}
+
+    with patch.object(cryptocompare, '_api_query', side_effect=mock_api_query):
+        prices, errors = cryptocompare.query_endpoint_pricemulti(
+            from_assets=assets,
+            to_asset=A_USD,
+        )
+
+    symbols = [asset.to_cryptocompare() for asset in assets]
+    assert queried_symbols == [symbols] + [[symbol] for symbol in symbols]
+    assert prices == {A_BTC: FVal(10)}
+    assert set(errors.keys()) == {A_ETH, A_DAI}
+    assert errors[A_ETH] == 'cryptocompare failed'
+    assert 'invalid price' in errors[A_DAI]
+
+
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 def test_cryptocompare_historical_data_use_cached_price(data_dir, database):
     """Test that the cryptocompare cache is used and also properly deserialized"""
@@ -54,6 +136,112 @@ def test_cryptocompare_historical_data_use_cached_price(data_dir, database):
     assert isinstance(result[1].high, FVal)
     assert result[1].high == FVal(20)
 
+    # Also make sure that the json cache got migrated to the binary format
+    assert not os.path.exists(os.path.join(data_dir, 'price_history_SNGLS_BTC.json'))
+    assert os.path.isfile(os.path.join(data_dir, 'price_history_SNGLS_BTC.bin'))
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    with patch.object(cc, 'query_endpoint_histohour') as histohour_mock:
+        result = cc.get_historical_data(
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=1438390801,
+            historical_data_start=0,
+        )
+        assert histohour_mock.call_count == 0
+
+    assert len(result) == 2
+    assert result[0].time == 1438387200
+    assert result[1].low == FVal(20)
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_historical_data_appends_to_cache(data_dir, database):
+    """Test that when the cache is outdated only the missing candles are queried and appended"""
+    start_ts = 1438387200
+    cached_entries = [
+        PriceHistoryEntry(time=start_ts + i * 3600, low=FVal(i), high=FVal(i)) for i in range(3)
+    ]
+    last_ts = cached_entries[-1].time
+    write_price_history_file(
+        filepath=os.path.join(data_dir, 'price_history_SNGLS_BTC.bin'),
+        entries=cached_entries,
+        start_time=0,
+        end_time=last_ts + 1,
+    )
+
+    now_ts = last_ts + 5 * 3600
+    new_data = [
+        {'time': last_ts + i * 3600, 'high': FVal(100 + i), 'low': FVal(100 + i)}
+        for i in range(6)
+    ]
+
+    def mock_histohour(**kwargs):  # pylint: disable=unused-argument
+        return {'TimeFrom': last_ts, 'TimeTo': now_ts, 'Data': new_data}
+
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    # A store handed out before the extension should keep working after it
+    old_result = cc.get_historical_data(
+        from_asset=A_SNGLS,
+        to_asset=A_BTC,
+        timestamp=last_ts,
+        historical_data_start=0,
+    )
+    histohour_patch = patch.object(cc, 'query_endpoint_histohour', side_effect=mock_histohour)
+    now_patch = patch('rotkehlchen.externalapis.cryptocompare.ts_now', return_value=now_ts)
+    with histohour_patch as histohour_mock, now_patch:
+        result = cc.get_historical_data(
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=last_ts + 3 * 3600,
+            historical_data_start=0,
+        )
+        # Only the data after the last cached entry should have been queried
+        assert histohour_mock.call_count == 1
+        assert histohour_mock.call_args[1]['to_timestamp'] == last_ts + 2000 * 3600
+
+    assert result.start_time == 0
+    assert result.end_time == now_ts
+    assert len(result) == 8
+    assert result[:2] == cached_entries[:2]
+    # the last cached candle gets replaced by the requeried one
+    for idx, entry in enumerate(result[2:]):
+        assert entry.time == last_ts + idx * 3600
+        assert entry.low == FVal(100 + idx)
+
+    assert result is not old_result
+    assert old_result.end_time == last_ts + 1
+    assert len(old_result) == 3
+    assert old_result[:2] == cached_entries[:2]
+    assert old_result[2].time == last_ts
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_stale_json_cache_is_deleted(data_dir, database):
+    """Test that a legacy json cache is deleted if a binary cache exists for the pair"""
+    entries = [PriceHistoryEntry(time=1438387200, low=FVal(10), high=FVal(10))]
+    write_price_history_file(
+        filepath=os.path.join(data_dir, 'price_history_SNGLS_BTC.bin'),
+        entries=entries,
+        start_time=0,
+        end_time=1438387201,
+    )
+    json_filepath = os.path.join(data_dir, 'price_history_SNGLS_BTC.json')
+    with open(json_filepath, 'w') as f:
+        f.write('{"start_time": 0, "end_time": 1, "data": []}')
+
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    assert not os.path.exists(json_filepath)
+    with patch.object(cc, 'query_endpoint_histohour') as histohour_mock:
+        result = cc.get_historical_data(
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=1438387200,
+            historical_data_start=0,
+        )
+        assert histohour_mock.call_count == 0
+
+    assert result[:] == entries
+
 
 @pytest.mark.skip(
     'Same test as test_end_to_end_tax_report::'
@@ -1,13 +1,22 @@
 import os
 import sys
 import traceback
+from unittest.mock import patch
 
 import gevent
 import pytest
 
 from rotkehlchen.db.dbhandler import DBHandler
-from rotkehlchen.externalapis.etherscan import Etherscan
+from rotkehlchen.errors import RemoteError
+from rotkehlchen.externalapis.etherscan import (
+    ETHERSCAN_MULTIBALANCE_MAX_ACCOUNTS,
+    ETHERSCAN_TX_PAGE_SIZE,
+    Etherscan,
+)
+from rotkehlchen.fval import FVal
+from rotkehlchen.tests.utils.factories import make_ethereum_address
 from rotkehlchen.typing import ExternalService, ExternalServiceApiCredentials
+from rotkehlchen.utils.misc import from_wei
 
 
 @pytest.fixture(scope='function')
@@ -71,3 +80,89 @@ def test_maximum_rate_limit_reached(temp_etherscan):
         greenlet.link_exception(_handle_killed_greenlets)
         gevent.sleep(0.001)
         count -= 1
+
+
+def test_get_transactions_in_pages(etherscan):
+    """Test that the transactions of an account are queried in pages ordered by block
+    and that no transactions of a block are missed when a page ends in its middle"""
+    account = make_ethereum_address()
+    # Blocks with 3 transactions each plus a block with more than two full pages
+    block_numbers = [
+        block_number for block_number in range(1000, 2000) for _ in range(3)
+    ] + [5000] * (2 * ETHERSCAN_TX_PAGE_SIZE + 10) + [6000]
+    entries = [{
+        'blockNumber': str(block_number),
+        'timeStamp': str(1500000000 + block_number),
+        'hash': '0x' + idx.to_bytes(32, byteorder='big').hex(),
+        'nonce': str(idx),
+        'from': account,
+        'to': make_ethereum_address(),
+        'value': '1',
+        'gas': '21000',
+        'gasPrice': '1',
+        'gasUsed': '21000',
+        'input': '0x',
+    } for idx, block_number in enumerate(block_numbers)]
+    queries = []
+
+    def mock_query(module, action, options):
+        assert module == 'account' and action == 'txlist'
+        assert options['sort'] == 'asc'
+        queries.append(options)
+        start_block = int(options['startBlock'])
+        end_block = int(options.get('endBlock', 99999999))
+        page, offset = int(options['page']), int(options['offset'])
+        result = [x for x in entries if start_block <= int(x['blockNumber']) <= end_block]
+        return result[(page - 1) * offset:page * offset]
+
+    with patch.object(etherscan, '_query', side_effect=mock_query):
+        batches = list(etherscan.get_transactions(account=account, internal=False))
+
+    assert [tx.nonce for batch in batches for tx in batch] == list(range(len(entries)))
+    # Only the batch of the block with more than a page of transactions is bigger
+    # than a page and no batch ends in the middle of a block
+    for batch in batches:
+        if len(batch) > ETHERSCAN_TX_PAGE_SIZE:
+            assert {tx.block_number for tx in batch} == {5000}
+    for batch, next_batch in zip(batches, batches[1:]):
+        if len(batch) != 0 and len(next_batch) != 0:
+            assert batch[-1].block_number < next_batch[0].block_number
+    assert len(queries) < 10
+
+    # If a later page of a block fails, none of the block's transactions are yielded
+    def mock_query_fail_later_page(module, action, options):
+        if int(options['page']) > 1:
+            raise RemoteError('etherscan is down')
+        return mock_query(module, action, options)
+
+    batches = []
+    with patch.object(etherscan, '_query', side_effect=mock_query_fail_later_page):
+        with pytest.raises(RemoteError):
+            for batch in etherscan.get_transactions(account=account, internal=False):
+                batches.append(batch)
+    assert max(tx.block_number for batch in batches for tx in batch) < 5000
+
+
+def test_get_accounts_balance_in_chunks(etherscan):
+    """Test that the ETH balances of many accounts are queried in chunks of as many
+    accounts as the multi account balance endpoint accepts"""
+    accounts = [make_ethereum_address() for _ in range(45)]
+    queries = []
+
+    def mock_query(module, action, options):
+        assert module == 'account' and action == 'balancemulti'
+        addresses = options['address'].split(',')
+        queries.append(addresses)
+        return [
+            {'account': address.lower(), 'balance': FVal(accounts.index(address) + 1)}
+            for address in addresses
+        ]
+
+    with patch.object(etherscan, '_query', side_effect=mock_query):
+        balances = etherscan.get_accounts_balance(accounts)
+
+    assert len(queries) == 3
+    assert all(len(x) <= ETHERSCAN_MULTIBALANCE_MAX_ACCOUNTS for x in queries)
+    assert balances == {
+        account: from_wei(FVal(idx + 1)) for idx, account in enumerate(accounts)
+    }
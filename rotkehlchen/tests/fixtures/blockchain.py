@@ -100,13 +100,14 @@ def alethio(database, messages_aggregator, all_eth_tokens):
 
 
 @pytest.fixture
-def ethereum_manager(ethrpc_port, etherscan, messages_aggregator):
+def ethereum_manager(ethrpc_port, etherscan, database, messages_aggregator):
     ethrpc_endpoint = f'http://localhost:{ethrpc_port}'
     return EthereumManager(
         ethrpc_endpoint=ethrpc_endpoint,
         etherscan=etherscan,
         msg_aggregator=messages_aggregator,
         attempt_connect=False,
+        database=database,
     )
 
 
@@ -211,6 +212,7 @@ def blockchain(
         owned_eth_tokens,
         ethereum_modules,
         alethio,
+        database,
 ):
     return ChainManager(
         blockchain_accounts=blockchain_accounts,
@@ -219,5 +221,6 @@ def blockchain(
         msg_aggregator=messages_aggregator,
         alethio=alethio,
         greenlet_manager=greenlet_manager,
+        database=database,
         eth_modules=ethereum_modules,
     )
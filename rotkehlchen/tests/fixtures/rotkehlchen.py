@@ -4,6 +4,8 @@ from collections import namedtuple
 import pytest
 
 import rotkehlchen.tests.utils.exchanges as exchange_tests
+from rotkehlchen.constants.misc import DEFAULT_HISTORY_QUERY_CONCURRENCY
+from rotkehlchen.constants.timing import ALL_REMOTES_TIMEOUT, DEFAULT_CURRENT_PRICE_CACHE_TTL
 from rotkehlchen.history import PriceHistorian
 from rotkehlchen.premium.premium import Premium, PremiumCredentials
 from rotkehlchen.rotkehlchen import Rotkehlchen
@@ -54,11 +56,17 @@ def cli_args(data_dir):
         'logtarget',
         'loglevel',
         'logfromothermodules',
+        'current_price_cache_ttl',
+        'history_query_concurrency',
+        'http_timeout',
     ])
     args.loglevel = 'debug'
     args.logfromothermodules = False
     args.sleep_secs = 60
     args.data_dir = data_dir
+    args.current_price_cache_ttl = DEFAULT_CURRENT_PRICE_CACHE_TTL
+    args.history_query_concurrency = DEFAULT_HISTORY_QUERY_CONCURRENCY
+    args.http_timeout = ALL_REMOTES_TIMEOUT
     return args
 
 
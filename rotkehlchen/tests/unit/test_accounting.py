@@ -1,10 +1,11 @@
 import pytest
 
-from rotkehlchen.constants.assets import A_BTC
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_EUR
 from rotkehlchen.exchanges.data_structures import MarginPosition
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.accounting import accounting_history_process
 from rotkehlchen.tests.utils.constants import A_DASH
+from rotkehlchen.tests.utils.database import QueryCountingConnection
 from rotkehlchen.tests.utils.history import prices
 from rotkehlchen.typing import EthereumTransaction, Location
 
@@ -365,6 +366,55 @@ def test_ignored_assets(accountant):
     assert FVal(result['overview']['total_taxable_profit_loss']).is_close('557.5284549025')
 
 
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+@pytest.mark.parametrize('ignored_assets', [[A_DASH]])
+def test_prices_are_prefetched_before_processing(accountant, price_historian):
+    """Test that all needed prices are collected and prefetched before processing"""
+    prefetched = []
+    price_historian.prefetch_historical_prices = lambda queries: prefetched.append(queries)
+    history = history1 + [{
+        'timestamp': 1476979735,
+        'pair': 'DASH_EUR',
+        'trade_type': 'buy',
+        'rate': 9.76775956284,
+        'fee': 0.0011,
+        'fee_currency': 'DASH',
+        'amount': 10,
+        'location': 'kraken',
+    }]
+    accounting_history_process(accountant, 1436979735, 1519693374, history)
+
+    assert len(prefetched) == 1
+    # The ignored asset and the profit currency itself need no prices
+    assert prefetched[0] == {
+        (A_BTC, A_EUR, 1446979735),
+        (A_ETH, A_EUR, 1446979735),
+        (A_ETH, A_EUR, 1473505138),
+        (A_BTC, A_EUR, 1473505138),
+        (A_ETH, A_EUR, 1475042230),
+        (A_BTC, A_EUR, 1475042230),
+    }
+    assert accountant.general_trade_pl.is_close("557.5284549025")
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+@pytest.mark.parametrize('ignored_assets', [[A_DASH]])
+def test_history_processing_db_queries_per_action(accountant):
+    """Regression benchmark: the DB should be queried a fixed number of times per
+    history processing run and not for every processed action"""
+    queries = []
+    for history in (history1[:1], history1 * 25):
+        counting_conn = QueryCountingConnection(accountant.db.conn)
+        accountant.db.conn = counting_conn
+        try:
+            accounting_history_process(accountant, 1436979735, 1495751688, history)
+        finally:
+            accountant.db.conn = counting_conn.conn
+        queries.append(counting_conn.queries)
+
+    assert queries[1] == queries[0]
+
+
 @pytest.mark.parametrize('mocked_price_queries', [prices])
 def test_settlement_buy(accountant):
     history = [{
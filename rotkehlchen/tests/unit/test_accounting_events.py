@@ -1,14 +1,24 @@
+import random
+from typing import List, Tuple
+
 import pytest
 
-from rotkehlchen.exchanges.data_structures import BuyEvent, Events
+from rotkehlchen.constants import ZERO
+from rotkehlchen.exchanges.data_structures import (
+    BUY_LOT_QUEUE_COMPACTION_THRESHOLD,
+    BuyEvent,
+    BuyLotQueue,
+    Events,
+)
 from rotkehlchen.fval import FVal
+from rotkehlchen.typing import Timestamp
 
 
 @pytest.mark.parametrize('accounting_initialize_parameters', [True])
 def test_search_buys_calculate_profit_after_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -60,7 +70,7 @@ def test_search_buys_calculate_profit_1_buy_consumed_by_1_sell(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -94,7 +104,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxable(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -147,7 +157,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxfree(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -195,7 +205,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxfree(accountant):
 def test_search_buys_calculate_profit_sell_more_than_bought_within_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -234,7 +244,7 @@ def test_search_buys_calculate_profit_sell_more_than_bought_within_year(accounta
 def test_search_buys_calculate_profit_sell_more_than_bought_after_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -272,7 +282,7 @@ def test_search_buys_calculate_profit_sell_more_than_bought_after_year(accountan
 def test_reduce_asset_amount(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -307,7 +317,7 @@ def test_reduce_asset_amount(accountant):
 def test_reduce_asset_amount_exact(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -337,7 +347,7 @@ def test_reduce_asset_amount_not_bought(accountant):
 def test_reduce_asset_amount_more_that_bought(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLotQueue(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -357,3 +367,200 @@ def test_reduce_asset_amount_more_that_bought(accountant):
 
     assert not accountant.events.reduce_asset_amount(asset, FVal(3))
     assert (len(accountant.events.events[asset].buys)) == 0, 'all buys should be used'
+
+
+def _list_search_buys_calculate_profit(
+        buys: List[BuyEvent],
+        selling_amount: FVal,
+        timestamp: Timestamp,
+        taxfree_after_period: int,
+) -> Tuple[FVal, FVal, FVal]:
+    """The list based first-in-first-out matching the lot queue replaced"""
+    remaining_sold_amount = selling_amount
+    stop_index = -1
+    taxfree_bought_cost = FVal(0)
+    taxable_bought_cost = FVal(0)
+    taxable_amount = FVal(0)
+    taxfree_amount = FVal(0)
+    remaining_amount_from_last_buy = FVal('-1')
+    for idx, buy_event in enumerate(buys):
+        at_taxfree_period = buy_event.timestamp + taxfree_after_period < timestamp
+        if remaining_sold_amount < buy_event.amount:
+            stop_index = idx
+            buying_cost = remaining_sold_amount.fma(
+                buy_event.rate,
+                (buy_event.fee_rate * remaining_sold_amount),
+            )
+            if at_taxfree_period:
+                taxfree_amount += remaining_sold_amount
+                taxfree_bought_cost += buying_cost
+            else:
+                taxable_amount += remaining_sold_amount
+                taxable_bought_cost += buying_cost
+            remaining_amount_from_last_buy = buy_event.amount - remaining_sold_amount
+            break
+        else:
+            buying_cost = buy_event.amount.fma(
+                buy_event.rate,
+                (buy_event.fee_rate * buy_event.amount),
+            )
+            remaining_sold_amount -= buy_event.amount
+            if at_taxfree_period:
+                taxfree_amount += buy_event.amount
+                taxfree_bought_cost += buying_cost
+            else:
+                taxable_amount += buy_event.amount
+                taxable_bought_cost += buying_cost
+            if idx == len(buys) - 1:
+                stop_index = idx + 1
+
+    if len(buys) == 0:
+        return selling_amount, FVal(0), FVal(0)
+
+    del buys[:stop_index]
+    if remaining_amount_from_last_buy != FVal('-1'):
+        buys[0].amount = remaining_amount_from_last_buy
+    elif remaining_sold_amount != FVal(0):
+        return selling_amount - taxfree_amount, taxable_bought_cost, taxfree_bought_cost
+
+    return taxable_amount, taxable_bought_cost, taxfree_bought_cost
+
+
+@pytest.mark.parametrize('decimals', [5, 20])
+def test_lot_queue_profit_matches_list_matching(accountant, decimals):
+    """Make sure the lot queue gives the exact same P&L as the list based matching
+
+    Many small buys are interleaved with bigger sells so that sells consume whole
+    runs of lots, end exactly at lot boundaries and exhaust the queue. Amounts with
+    more than 18 decimals are rounded in the cumulative amounts of the queue.
+    """
+    rng = random.Random(42)
+    asset = 'BTC'
+    taxfree_after_period = 365 * 86400
+    accountant.events.taxfree_after_period = taxfree_after_period
+    accountant.events.events[asset] = Events(BuyLotQueue(), [])
+    queue = accountant.events.events[asset].buys
+    reference: List[BuyEvent] = []
+
+    timestamp = 1446979735
+    for _ in range(3000):
+        timestamp += rng.randint(1, 86400 * 3)
+        if rng.random() < 0.7:
+            amount = FVal(rng.randint(1, 10 ** (decimals + 1))) / FVal(10 ** decimals)
+            rate = FVal(rng.randint(1, 10 ** 8)) / FVal(10 ** 3)
+            fee_rate = FVal(rng.randint(0, 10 ** 4)) / FVal(10 ** 6)
+            for lots in (queue, reference):
+                lots.append(
+                    BuyEvent(timestamp=timestamp, amount=amount, rate=rate, fee_rate=fee_rate),
+                )
+            continue
+
+        if rng.random() < 0.2 and len(reference) != 0:
+            # sell exactly up to a lot boundary
+            selling_amount = sum(
+                (lot.amount for lot in reference[:rng.randint(1, len(reference))]),
+                FVal(0),
+            )
+        else:
+            selling_amount = (
+                FVal(rng.randint(1, 4 * 10 ** (decimals + 1))) / FVal(10 ** decimals)
+            )
+
+        result = accountant.events.search_buys_calculate_profit(
+            selling_amount=selling_amount,
+            selling_asset=asset,
+            timestamp=timestamp,
+        )
+        expected = _list_search_buys_calculate_profit(
+            buys=reference,
+            selling_amount=selling_amount,
+            timestamp=timestamp,
+            taxfree_after_period=taxfree_after_period,
+        )
+        assert result == expected
+        assert [str(x) for x in result] == [str(x) for x in expected]
+        assert list(queue) == reference
+        assert queue.total_amount() == sum((lot.amount for lot in reference), FVal(0))
+
+
+def test_lot_queue_taxfree_amount():
+    queue = BuyLotQueue()
+    for idx, timestamp in enumerate((1000, 2000, 2000, 3000)):
+        queue.append(BuyEvent(
+            timestamp=timestamp,
+            amount=FVal(idx + 1),
+            rate=FVal(10),
+            fee_rate=FVal('0.1'),
+        ))
+
+    assert queue.taxfree_amount(None) == ZERO
+    assert queue.taxfree_amount(1000) == ZERO
+    assert queue.taxfree_amount(2001) == FVal(6)
+    assert queue.taxfree_amount(5000) == FVal(10)
+
+    consumption = queue.consume(amount=FVal('1.5'), taxfree_before=2001)
+    assert consumption.taxfree_amount == FVal('1.5')
+    assert consumption.taxfree_bought_cost == FVal('15.15')
+    assert consumption.taxable_amount == ZERO
+    assert queue.taxfree_amount(2001) == FVal('4.5')
+
+    consumption = queue.consume(amount=FVal(8), taxfree_before=2001)
+    assert consumption.taxfree_amount == FVal('4.5')
+    assert consumption.taxable_amount == FVal('3.5')
+    assert consumption.taxable_bought_cost == FVal('35.35')
+    assert consumption.uncovered_amount == ZERO
+    assert len(queue) == 1 and queue[0].amount == FVal('0.5')
+
+    consumption = queue.consume(amount=FVal(1), taxfree_before=None)
+    assert consumption.taxable_amount == FVal('0.5')
+    assert consumption.uncovered_amount == FVal('0.5')
+    assert len(queue) == 0
+
+
+@pytest.mark.parametrize('decimals', [4, 24])
+def test_lot_queue_reduce_matches_list_matching(decimals):
+    """Amounts with more than 18 decimals are rounded in the cumulative amounts of
+    the queue but the reductions should still be exact"""
+    rng = random.Random(7)
+    queue = BuyLotQueue()
+    reference: List[FVal] = []
+    for _ in range(5000):
+        if rng.random() < 0.6:
+            amount = FVal(rng.randint(1, 10 ** (decimals + 2))) / FVal(10 ** decimals)
+            queue.append(BuyEvent(timestamp=1, amount=amount, rate=FVal(1), fee_rate=FVal(0)))
+            reference.append(amount)
+            continue
+
+        amount = FVal(rng.randint(1, 5 * 10 ** (decimals + 2))) / FVal(10 ** decimals)
+        remaining = amount
+        while len(reference) != 0 and remaining >= reference[0]:
+            remaining -= reference.pop(0)
+        if len(reference) != 0:
+            reference[0] = reference[0] - remaining
+            remaining = FVal(0)
+
+        assert queue.reduce(amount) == remaining
+        assert [lot.amount for lot in queue] == reference
+
+
+def test_lot_queue_reduce_across_compaction():
+    """Make sure a reduction that compacts the queue consumes the right lot"""
+    lots_num = 2 * BUY_LOT_QUEUE_COMPACTION_THRESHOLD
+    queue = BuyLotQueue(
+        BuyEvent(timestamp=1, amount=FVal(idx + 1), rate=FVal(1), fee_rate=FVal(0))
+        for idx in range(lots_num)
+    )
+    consumed_amount = sum(
+        (FVal(idx + 1) for idx in range(BUY_LOT_QUEUE_COMPACTION_THRESHOLD)),
+        FVal(0),
+    )
+    assert queue.reduce(consumed_amount + FVal('0.5')) == FVal(0)
+    assert len(queue) == lots_num - BUY_LOT_QUEUE_COMPACTION_THRESHOLD
+    assert queue[0].amount == FVal(BUY_LOT_QUEUE_COMPACTION_THRESHOLD + 1) - FVal('0.5')
+    assert queue[1].amount == FVal(BUY_LOT_QUEUE_COMPACTION_THRESHOLD + 2)
+    assert queue[-1].amount == FVal(lots_num)
+
+    # Once compacted the queue keeps working from the new head
+    assert queue.reduce(FVal(BUY_LOT_QUEUE_COMPACTION_THRESHOLD + 1)) == FVal(0)
+    assert queue[0].amount == FVal(BUY_LOT_QUEUE_COMPACTION_THRESHOLD + 2) - FVal('0.5')
+    assert queue.total_amount() == sum((lot.amount for lot in queue), FVal(0))
@@ -1,9 +1,37 @@
-from rotkehlchen.chain.bitcoin import is_valid_btc_address
+import json
+import math
+from itertools import product
+from unittest.mock import patch
+
+import pytest
+from web3 import HTTPProvider, Web3
+from web3.exceptions import BadFunctionCallOutput
+
+from rotkehlchen.chain.bitcoin import (
+    BLOCKCYPHER_BATCH_MAX_ADDRESSES,
+    get_bitcoin_addresses_balances,
+    is_valid_btc_address,
+)
+from rotkehlchen.chain.ethereum.block_times import (
+    BLOCK_TIME_CONFIRMATION_SECONDS,
+    BlockTimeIndex,
+)
+from rotkehlchen.constants.ethereum import (
+    BALANCE_CHECKER_ADDRESS,
+    MAKERDAO_POT_ABI,
+    MAKERDAO_POT_ADDRESS,
+)
+from rotkehlchen.errors import RemoteError
+from rotkehlchen.fval import FVal
+from rotkehlchen.tests.utils.eth_tokens import CONTRACT_ADDRESS_TO_TOKEN
 from rotkehlchen.tests.utils.factories import (
     UNIT_BTC_ADDRESS1,
     UNIT_BTC_ADDRESS2,
     UNIT_BTC_ADDRESS3,
+    make_ethereum_address,
 )
+from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.utils.misc import ts_now
 
 
 def test_is_valid_btc_address():
@@ -46,3 +74,437 @@ def test_is_valid_btc_address():
     assert not is_valid_btc_address(
         'tb1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3pjxtptv')
     assert not is_valid_btc_address('bc1gmk9yu')
+
+
+def test_multiaccount_token_balances_are_batched(ethereum_manager):
+    """Test that token balances are queried in chunks via the balance checker contract"""
+    accounts = [make_ethereum_address() for _ in range(7)]
+    tokens = list(CONTRACT_ADDRESS_TO_TOKEN.values())
+    amounts = {
+        pair: idx * 10 ** 17 for idx, pair in enumerate(product(accounts, tokens))
+        if idx % 3 != 0
+    }
+    calls = []
+
+    def mock_call_contract(
+            contract_address,
+            abi,  # pylint: disable=unused-argument
+            method_name,
+            arguments,
+    ):
+        assert contract_address == BALANCE_CHECKER_ADDRESS
+        assert method_name == 'balances'
+        queried_accounts, token_addresses = arguments
+        calls.append((len(queried_accounts), len(token_addresses)))
+        return [
+            amounts.get((account, CONTRACT_ADDRESS_TO_TOKEN[token_address]), 0)
+            for account in queried_accounts for token_address in token_addresses
+        ]
+
+    call_patch = patch.object(
+        ethereum_manager,
+        'call_contract',
+        side_effect=mock_call_contract,
+    )
+    pairs_patch = patch('rotkehlchen.chain.ethereum.manager.BALANCE_CHECKER_MAX_PAIRS', 6)
+    addresses_patch = patch('rotkehlchen.chain.ethereum.manager.BALANCE_CHECKER_MAX_ADDRESSES', 5)
+    accounts_patch = patch('rotkehlchen.chain.ethereum.manager.BALANCE_CHECKER_MAX_ACCOUNTS', 3)
+    with call_patch, pairs_patch, addresses_patch, accounts_patch:
+        balances = ethereum_manager.get_multiaccount_token_balances(
+            tokens=tokens,
+            accounts=accounts,
+        )
+
+    # 3 chunks of accounts times 2 chunks of tokens instead of one call per pair
+    assert len(calls) == 6
+    assert all(accounts_num * tokens_num <= 6 for accounts_num, tokens_num in calls)
+    assert all(accounts_num + tokens_num <= 5 for accounts_num, tokens_num in calls)
+    expected = {}
+    for (account, token), amount in amounts.items():
+        expected.setdefault(token, {})[account] = FVal(amount) / FVal(10) ** token.decimals
+    assert balances == expected
+
+
+def test_multiaccount_token_balances_without_balance_checker(ethereum_manager):
+    """Test that each token is queried separately if the chain has no balance checker"""
+    accounts = [make_ethereum_address() for _ in range(2)]
+    tokens = list(CONTRACT_ADDRESS_TO_TOKEN.values())[:2]
+
+    def mock_multitoken_balance(token, accounts):
+        if token == tokens[0]:
+            return {accounts[0]: FVal(1), accounts[1]: FVal(0)}
+        return {}
+
+    call_patch = patch.object(
+        ethereum_manager,
+        'call_contract',
+        side_effect=BadFunctionCallOutput('no code'),
+    )
+    token_patch = patch.object(
+        ethereum_manager,
+        'get_multitoken_balance',
+        side_effect=mock_multitoken_balance,
+    )
+    with call_patch, token_patch as token_mock:
+        balances = ethereum_manager.get_multiaccount_token_balances(
+            tokens=tokens,
+            accounts=accounts,
+        )
+
+    assert token_mock.call_count == 2
+    assert balances == {tokens[0]: {accounts[0]: FVal(1)}}
+
+
+def test_node_queries_are_batched(ethereum_manager):
+    """Test that node queries are sent as JSON-RPC batches and the results are routed
+    back to each call even if the node responds out of order"""
+    ethereum_manager.web3 = Web3(HTTPProvider('http://localhost:8545'))
+    ethereum_manager.connected = True
+    ethereum_manager.eth_rpc_batch_size = 2
+    accounts = [make_ethereum_address() for _ in range(3)]
+    wei_balances = {account: (idx + 1) * 10 ** 18 for idx, account in enumerate(accounts)}
+    batches = []
+
+    def mock_post(url, **kwargs):  # pylint: disable=unused-argument
+        batch = kwargs['json']
+        batches.append(batch)
+        responses = []
+        for call in batch:
+            if call['method'] == 'eth_getBalance':
+                result = hex(wei_balances[call['params'][0]])
+            else:
+                result = {'timestamp': hex(int(call['params'][0], 16) * 10)}
+            responses.append({'jsonrpc': '2.0', 'id': call['id'], 'result': result})
+        return MockResponse(200, json.dumps(list(reversed(responses))))
+
+    with patch.object(ethereum_manager.rpc_session, 'post', side_effect=mock_post):
+        balances = ethereum_manager.get_multieth_balance(accounts)
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert balances == {account: FVal(idx + 1) for idx, account in enumerate(accounts)}
+
+        events = [
+            {'blockNumber': 15},
+            {'timeStamp': '0x5'},
+            {'blockNumber': 12},
+            {'blockNumber': 15},
+        ]
+        timestamps = ethereum_manager.get_events_timestamps(events)
+        # Each block is only queried once
+        assert [len(batch) for batch in batches[2:]] == [2]
+        assert timestamps == [150, 5, 120, 150]
+
+
+def test_block_time_index_keeps_recent_blocks_in_memory():
+    index = BlockTimeIndex(cache_size=2)
+    index.add_timestamps({10: 100, 20: 200})
+    assert index.get_timestamps([10]) == {10: 100}
+    # 20 is the least recently used so it is evicted
+    index.add_timestamps({30: 300})
+    assert index.get_timestamps([10, 20, 30]) == {10: 100, 30: 300}
+    assert index.get_closest_known(250) == ((10, 100), (30, 300))
+
+
+def test_block_time_index_skips_blocks_that_can_be_reorganized(database):
+    index = BlockTimeIndex(database=database)
+    now = ts_now()
+    index.add_timestamps({10: 100, 20: now - BLOCK_TIME_CONFIRMATION_SECONDS - 1, 30: now})
+    assert index.get_timestamps([10, 20, 30]) == {
+        10: 100,
+        20: now - BLOCK_TIME_CONFIRMATION_SECONDS - 1,
+    }
+    assert 30 not in database.get_block_timestamps([10, 20, 30])
+
+
+def test_block_time_index_find_blocknumber(database):
+    """Test that the block of a timestamp is found with few queries by searching from
+    the known blocks and that the queried blocks are reused by later searches"""
+    index = BlockTimeIndex(database=database)
+    latest_block = 10000000
+
+    def block_timestamp(number):
+        # Blocks are 15 seconds apart plus some irregularity
+        return 1438269973 + number * 15 + number % 7
+
+    queried_blocks = []
+
+    def query_timestamp(number):
+        queried_blocks.append(number)
+        timestamp = block_timestamp(number)
+        index.add_timestamps({number: timestamp})
+        return timestamp
+
+    def find_blocknumber(timestamp):
+        return index.find_blocknumber(
+            timestamp=timestamp,
+            query_timestamp=query_timestamp,
+            query_latest_block=lambda: (latest_block, block_timestamp(latest_block)),
+        )
+
+    for block_number in (9000000, 8999999, 1234567, 5):
+        # in between the block and the next one
+        timestamp = block_timestamp(block_number) + 5
+        queried_blocks = []
+        assert find_blocknumber(timestamp) == block_number
+        assert len(queried_blocks) < 40
+        # exactly at the block
+        assert find_blocknumber(block_timestamp(block_number)) == block_number
+
+    # Now both the block and the next one are known so nothing is queried
+    queried_blocks = []
+    assert find_blocknumber(block_timestamp(1234567) + 3) == 1234567
+    assert index.get_known_blocknumber(block_timestamp(1234567) + 3) == 1234567
+    assert queried_blocks == []
+    assert find_blocknumber(block_timestamp(latest_block) + 60) == latest_block
+    assert find_blocknumber(block_timestamp(1) - 1) == 0
+    # The block after 42 was never queried so the known blocks are not enough
+    assert index.get_known_blocknumber(block_timestamp(42)) is None
+
+
+def test_blocknumber_by_time_uses_block_time_index(ethereum_manager):
+    """Test that the manager searches the block of a timestamp through the block
+    time index when connected to a node and asks etherscan otherwise"""
+    ethereum_manager.web3 = Web3(HTTPProvider('http://localhost:8545'))
+    ethereum_manager.connected = True
+    latest_block = 10000000
+
+    def block_timestamp(number):
+        return 1438269973 + number * 15
+
+    def mock_query_rpc_batch(calls):
+        results = []
+        for method, params in calls:
+            assert method == 'eth_getBlockByNumber'
+            results.append({'timestamp': hex(block_timestamp(int(params[0], 16)))})
+        return results
+
+    batch_patch = patch.object(
+        ethereum_manager,
+        'query_rpc_batch',
+        side_effect=mock_query_rpc_batch,
+    )
+    latest_patch = patch.object(
+        ethereum_manager,
+        '_get_latest_block',
+        return_value=(latest_block, block_timestamp(latest_block)),
+    )
+    with batch_patch, latest_patch:
+        assert ethereum_manager.get_blocknumber_by_time(block_timestamp(1234567) + 5) == 1234567
+
+    ethereum_manager.connected = False
+    etherscan_patch = patch.object(
+        ethereum_manager.etherscan,
+        'get_blocknumber_by_time',
+        return_value=42,
+    )
+    with etherscan_patch as etherscan_mock:
+        # The known blocks are enough to tell this one
+        assert ethereum_manager.get_blocknumber_by_time(block_timestamp(1234567) + 5) == 1234567
+        assert etherscan_mock.call_count == 0
+        assert ethereum_manager.get_blocknumber_by_time(block_timestamp(42) + 5) == 42
+        assert etherscan_mock.call_count == 1
+
+
+def test_get_logs_skips_malformed_logs(ethereum_manager):
+    """Test that a log with a malformed block number or index is skipped with an
+    error instead of failing the whole query"""
+
+    def mock_etherscan_get_logs(contract_address, topics, from_block, to_block):
+        return [{
+            'address': contract_address,
+            'topics': topics,
+            'data': '0x',
+            'blockNumber': block_number,
+            'timeStamp': '0x55ba467c',
+            'transactionIndex': '0x1',
+            'logIndex': log_index,
+        } for block_number, log_index in (('0x10', '0x0'), ('0xzz', '0x1'), ('0x12', 'foo'))]
+
+    get_logs_patch = patch.object(
+        ethereum_manager.etherscan,
+        'get_logs',
+        side_effect=mock_etherscan_get_logs,
+    )
+    with get_logs_patch:
+        logs = ethereum_manager.get_logs(
+            contract_address=MAKERDAO_POT_ADDRESS,
+            abi=MAKERDAO_POT_ABI,
+            event_name='LogNote',
+            argument_filters={'sig': '0x049878f3'},
+            from_block=1,
+            to_block=100,
+        )
+
+    assert [(entry['blockNumber'], entry['logIndex']) for entry in logs] == [(16, 0)]
+    errors = ethereum_manager.msg_aggregator.consume_errors()
+    assert len(errors) == 2
+    assert all('Skipping event' in error for error in errors)
+
+
+def test_get_logs_only_queries_new_blocks(ethereum_manager):
+    """Test that logs are stored with their queried block range and that later
+    queries of the same filter only query the blocks outside of that range"""
+    queried_ranges = []
+
+    def mock_etherscan_get_logs(contract_address, topics, from_block, to_block):
+        queried_ranges.append((from_block, to_block))
+        # One log every 1000 blocks, as etherscan returns them
+        return [{
+            'address': contract_address,
+            'topics': topics,
+            'data': '0x',
+            'blockNumber': hex(block_number),
+            'timeStamp': hex(1438269973 + block_number * 15),
+            'transactionIndex': '0x',
+            'logIndex': '0x1',
+        } for block_number in range(from_block + (-from_block % 1000), to_block + 1, 1000)]
+
+    latest_block = 10012
+    get_logs_patch = patch.object(
+        ethereum_manager.etherscan,
+        'get_logs',
+        side_effect=mock_etherscan_get_logs,
+    )
+    latest_patch = patch.object(
+        ethereum_manager.etherscan,
+        'get_latest_block_number',
+        side_effect=lambda: latest_block,
+    )
+
+    def get_logs(from_block, **kwargs):
+        return ethereum_manager.get_logs(
+            contract_address=MAKERDAO_POT_ADDRESS,
+            abi=MAKERDAO_POT_ABI,
+            event_name='LogNote',
+            argument_filters={'sig': '0x049878f3'},
+            from_block=from_block,
+            **kwargs,
+        )
+
+    with get_logs_patch, latest_patch:
+        logs = get_logs(from_block=5000)
+        # The latest blocks are queried separately since they are not stored
+        assert queried_ranges == [(5000, 10000), (10001, 10012)]
+        assert [entry['blockNumber'] for entry in logs] == [5000, 6000, 7000, 8000, 9000, 10000]
+        assert logs[0]['transactionIndex'] == 0
+        assert logs[0]['logIndex'] == 1
+
+        queried_ranges = []
+        latest_block = 12012
+        logs = get_logs(from_block=5000)
+        assert queried_ranges == [(10001, 12000), (12001, 12012)]
+        assert [entry['blockNumber'] for entry in logs] == list(range(5000, 12001, 1000))
+
+        # A range that is already stored is not queried again
+        queried_ranges = []
+        logs = get_logs(from_block=6000, to_block=8500)
+        assert queried_ranges == []
+        assert [entry['blockNumber'] for entry in logs] == [6000, 7000, 8000]
+
+        # Only the missing start of a range that extends the stored one is queried
+        logs = get_logs(from_block=3000, to_block=5500)
+        assert queried_ranges == [(3000, 4999)]
+        assert [entry['blockNumber'] for entry in logs] == [3000, 4000, 5000]
+
+
+def test_get_logs_adapts_block_windows(ethereum_manager):
+    """Test that windows with as many logs as etherscan returns are split so that no
+    logs are missed and that windows grow while they contain few logs"""
+    # One log every 100000 blocks and 2500 logs in the busy blocks 5000000-5000499
+    log_blocks = list(range(0, 10000000, 100000)) + [
+        block_number for block_number in range(5000000, 5000500) for _ in range(5)
+    ]
+    log_blocks.sort()
+    queried_windows = []
+
+    def mock_etherscan_get_logs(contract_address, topics, from_block, to_block):
+        queried_windows.append((from_block, to_block))
+        return [{
+            'address': contract_address,
+            'topics': topics,
+            'data': '0x',
+            'blockNumber': hex(block_number),
+            'transactionIndex': '0x',
+            'logIndex': '0x',
+        } for block_number in log_blocks if from_block <= block_number <= to_block][:1000]
+
+    get_logs_patch = patch.object(
+        ethereum_manager.etherscan,
+        'get_logs',
+        side_effect=mock_etherscan_get_logs,
+    )
+    with get_logs_patch:
+        logs = ethereum_manager.get_logs(
+            contract_address=MAKERDAO_POT_ADDRESS,
+            abi=MAKERDAO_POT_ABI,
+            event_name='LogNote',
+            argument_filters={'sig': '0x049878f3'},
+            from_block=0,
+            to_block=9999999,
+        )
+
+    assert [entry['blockNumber'] for entry in logs] == log_blocks
+    # Fixed windows of 300000 blocks would need 34 queries
+    assert len([x for x in queried_windows if x[1] - x[0] > 300000]) != 0
+    assert len(queried_windows) < 60
+
+
+def test_btc_balances_are_batched_and_fall_back_to_db(database):
+    """Test that BTC balances are queried in batches per endpoint and that the last
+    stored balances are used if the queries fail"""
+    base58_accounts = [UNIT_BTC_ADDRESS1, UNIT_BTC_ADDRESS2, UNIT_BTC_ADDRESS3]
+    bech32_accounts = [
+        'bc1qhkje0xfvhmgk6mvanxwy09n45df03tj3h3jtnf',
+        'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4',
+        'bc1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3qccfmv3',
+        'bc1zw508d6qejxtdg4y5r3zarvaryvg6kdaj',
+    ]
+    accounts = base58_accounts + bech32_accounts
+    satoshis = {account: (idx + 1) * 100000000 for idx, account in enumerate(accounts)}
+    urls = []
+
+    def mock_request_get(url, **kwargs):  # pylint: disable=unused-argument
+        urls.append(url)
+        if 'blockchain.info/multiaddr' in url:
+            addresses = url.split('active=')[-1].split('|')
+            return {'addresses': [
+                {'address': x, 'final_balance': satoshis[x]} for x in addresses
+            ]}
+
+        addresses = url.split('/')[-2].split(';')
+        entries = [{'address': x, 'balance': satoshis[x]} for x in addresses]
+        return entries if len(entries) != 1 else entries[0]
+
+    with patch('rotkehlchen.chain.bitcoin.request_get', side_effect=mock_request_get):
+        balances = get_bitcoin_addresses_balances(accounts, database)
+
+    expected_balances = {account: FVal(idx + 1) for idx, account in enumerate(accounts)}
+    assert balances == expected_balances
+    # One multiaddr query and two blockcypher batches
+    assert len(urls) == 1 + math.ceil(len(bech32_accounts) / BLOCKCYPHER_BATCH_MAX_ADDRESSES)
+
+    with patch('rotkehlchen.chain.bitcoin.request_get', side_effect=RemoteError('down')):
+        balances = get_bitcoin_addresses_balances(accounts, database)
+        assert balances == expected_balances
+
+        # Without a stored balance for every account of a batch the error is raised
+        with pytest.raises(RemoteError):
+            get_bitcoin_addresses_balances(
+                ['1H6ZZpRmMnrw8ytepV3BYwMjYYnEkWDqVP'] + base58_accounts,
+                database,
+            )
+
+    def mock_request_get_missing_address(url, **kwargs):
+        response = mock_request_get(url, **kwargs)
+        if 'blockchain.info/multiaddr' in url:
+            response['addresses'] = response['addresses'][1:]
+        return response
+
+    # An account missing from the response is not taken as having zero balance
+    # but makes the batch fall back to the stored balances
+    patch_request_get = patch(
+        'rotkehlchen.chain.bitcoin.request_get',
+        side_effect=mock_request_get_missing_address,
+    )
+    with patch_request_get:
+        balances = get_bitcoin_addresses_balances(accounts, database)
+    assert balances == expected_balances
@@ -1,7 +1,10 @@
+import random
+from decimal import ROUND_HALF_EVEN, Decimal, localcontext
+
 import pytest
 
 from rotkehlchen.errors import ConversionError
-from rotkehlchen.fval import FVal
+from rotkehlchen.fval import FixedVal, FVal
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads
 
 
@@ -182,3 +185,76 @@ def test_initialize_with_bool_fails():
     with pytest.raises(ValueError):
         FVal(True)
         FVal(False)
+
+
+def _random_fval(rng: random.Random) -> FVal:
+    decimals = rng.randint(0, 18)
+    value = FVal(rng.randint(-10 ** 12, 10 ** 12)) / FVal(10 ** decimals)
+    return value
+
+
+def test_fixedval_conversions():
+    for value, scaled, converted_back in (
+            ('0', 0, '0'),
+            ('1.5', 1500000000000000000, '1.5'),
+            ('-2.25', -2250000000000000000, '-2.25'),
+            ('0.000000000000000001', 1, '0.000000000000000001'),
+            # anything after the 18th decimal is rounded half even
+            ('0.0000000000000000005', 0, '0'),
+            ('0.0000000000000000015', 2, '0.000000000000000002'),
+            ('-0.0000000000000000025', -2, '-0.000000000000000002'),
+            (
+                '5006337207657766294397.5',
+                50063372076577662943975 * 10 ** 17,
+                '5006337207657766294397.5',
+            ),
+    ):
+        fixed = FixedVal.from_fval(FVal(value))
+        assert fixed.scaled == scaled
+        assert fixed.to_fval() == FVal(converted_back)
+
+    assert str(FixedVal.from_fval(FVal('12.5000'))) == '12.5'
+    assert str(FixedVal.from_fval(FVal('-3'))) == '-3'
+
+    with pytest.raises(ValueError):
+        FixedVal.from_fval(FVal('NaN'))
+    with pytest.raises(ValueError):
+        FixedVal.from_fval(FVal('Infinity'))
+
+
+def test_fixedval_matches_fval():
+    """FixedVal results should be the Decimal results rounded half even to 18 decimals
+
+    FVal keeps 28 significant digits, which can be less than the digits of values with
+    18 decimals, so the Decimal reference is computed at a precision that fits both.
+    """
+    rng = random.Random(1337)
+    fixed_point = Decimal('1E-18')
+    for _ in range(2000):
+        a = _random_fval(rng)
+        b = _random_fval(rng)
+        fixed_a = FixedVal.from_fval(a)
+        fixed_b = FixedVal.from_fval(b)
+
+        assert fixed_a.to_fval() == a
+        assert (-fixed_a).to_fval() == -a
+        assert abs(fixed_a).to_fval() == abs(a)
+        assert (fixed_a < fixed_b) == (a < b)
+        assert (fixed_a <= fixed_b) == (a <= b)
+        assert (fixed_a > fixed_b) == (a > b)
+        assert (fixed_a >= fixed_b) == (a >= b)
+        assert (fixed_a == fixed_b) == (a == b)
+        assert bool(fixed_a) == (a != 0)
+
+        with localcontext() as context:
+            context.prec = 100
+            assert (fixed_a + fixed_b).to_fval() == FVal(a.num + b.num)
+            assert (fixed_a - fixed_b).to_fval() == FVal(a.num - b.num)
+            product = (a.num * b.num).quantize(fixed_point, rounding=ROUND_HALF_EVEN)
+            assert (fixed_a * fixed_b).to_fval() == FVal(product)
+            if b != 0:
+                quotient = (a.num / b.num).quantize(fixed_point, rounding=ROUND_HALF_EVEN)
+                assert (fixed_a / fixed_b).to_fval() == FVal(quotient)
+
+    with pytest.raises(ZeroDivisionError):
+        _ = FixedVal.from_fval(FVal(1)) / FixedVal()
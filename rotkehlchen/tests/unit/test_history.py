@@ -1,3 +1,7 @@
+from unittest.mock import patch
+
+import gevent
+
 from rotkehlchen.constants.assets import A_ETH
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
@@ -5,6 +9,31 @@ from rotkehlchen.history import limit_trade_list_to_period
 from rotkehlchen.typing import Location, TradeType
 
 
+class MockHistoryExchange():
+    """An exchange whose history query takes `delay` seconds to return its trades"""
+
+    def __init__(self, delay, trades, error=None):
+        self.delay = delay
+        self.trades = trades
+        self.error = error
+
+    def query_history_with_callbacks(
+            self,
+            start_ts,
+            end_ts,
+            success_callback,
+            fail_callback,
+            query_pool,
+    ):
+        # pylint: disable=unused-argument
+        greenlet = query_pool.spawn(gevent.sleep, self.delay)
+        greenlet.join()
+        if self.error:
+            fail_callback(self.error)
+        else:
+            success_callback(self.trades, [], [], None)
+
+
 def test_limit_trade_list_to_period():
     trade1 = Trade(
         timestamp=1459427707,
@@ -57,3 +86,41 @@ def test_limit_trade_list_to_period():
     assert limit_trade_list_to_period(full_list, 1459427707, 1459427707) == [trade1]
     assert limit_trade_list_to_period(full_list, 1469427707, 1469427707) == [trade2]
     assert limit_trade_list_to_period(full_list, 1479427707, 1479427707) == [trade3]
+
+
+def make_trade(timestamp, location, link):
+    return Trade(
+        timestamp=timestamp,
+        location=location,
+        pair='ETH_BTC',
+        trade_type=TradeType.BUY,
+        amount=FVal(1),
+        rate=FVal(1),
+        fee=FVal('0.1'),
+        fee_currency=A_ETH,
+        link=link,
+    )
+
+
+def test_get_history_merges_exchanges_deterministically(trades_historian):
+    """Test that concurrently queried exchange histories are merged in exchange order
+
+    The slowest exchange comes first and trades of different exchanges share
+    timestamps, so the result would differ if the histories were merged in the
+    order the queries finished."""
+    kraken_trades = [make_trade(1, Location.KRAKEN, 'k1'), make_trade(2, Location.KRAKEN, 'k2')]
+    polo_trades = [make_trade(1, Location.POLONIEX, 'p1'), make_trade(2, Location.POLONIEX, 'p2')]
+    trades_historian.exchange_manager.connected_exchanges = {
+        'kraken': MockHistoryExchange(delay=0.3, trades=kraken_trades),
+        'bittrex': MockHistoryExchange(delay=0.2, trades=[], error='bittrex error'),
+        'poloniex': MockHistoryExchange(delay=0, trades=polo_trades),
+        'binance': MockHistoryExchange(delay=0.1, trades=[], error='binance error'),
+    }
+    trades_historian.history_query_concurrency = 2
+
+    with patch('rotkehlchen.history.query_ethereum_transactions', return_value=[]):
+        result = trades_historian.get_history(start_ts=0, end_ts=10, has_premium=False)
+
+    empty_or_error, history, _, _, _ = result
+    assert empty_or_error == '\nbittrex error\nbinance error'
+    assert [x.link for x in history] == ['k1', 'p1', 'k2', 'p2']
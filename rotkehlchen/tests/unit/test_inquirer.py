@@ -1,14 +1,17 @@
 import os
 from unittest.mock import patch
 
+import gevent
 import pytest
-import requests
 
-from rotkehlchen.constants.assets import A_CNY, A_EUR, A_GBP, A_JPY, A_USD
+from rotkehlchen.constants import ZERO
+from rotkehlchen.constants.assets import A_BTC, A_CNY, A_DAI, A_ETH, A_EUR, A_GBP, A_JPY, A_USD
+from rotkehlchen.errors import RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import _query_currency_converterapi, _query_exchanges_rateapi
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.utils.misc import timestamp_to_date, ts_now
+from rotkehlchen.utils.network import get_shared_session
 
 
 @pytest.mark.skipif(
@@ -32,7 +35,7 @@ def test_query_realtime_price_apis(inquirer):
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 def test_switching_to_backup_api(inquirer):
     count = 0
-    original_get = requests.get
+    original_get = get_shared_session().get
 
     def mock_exchanges_rateapi_fail(url, timeout):  # pylint: disable=unused-argument
         nonlocal count
@@ -41,7 +44,7 @@ def test_switching_to_backup_api(inquirer):
             return MockResponse(501, '{"msg": "some error")')
         return original_get(url)
 
-    with patch('requests.get', side_effect=mock_exchanges_rateapi_fail):
+    with patch.object(get_shared_session(), 'get', side_effect=mock_exchanges_rateapi_fail):
         result = inquirer.query_fiat_pair(A_USD, A_EUR)
         assert result and isinstance(result, FVal)
         assert count > 1, 'requests.get should have been called more than once'
@@ -52,7 +55,7 @@ def test_caching(inquirer):
     def mock_currency_converter_api(url, timeout):  # pylint: disable=unused-argument
         return MockResponse(200, '{"results": {"USD_EUR": {"val": 1.1543, "id": "USD_EUR"}}}')
 
-    with patch('requests.get', side_effect=mock_currency_converter_api):
+    with patch.object(get_shared_session(), 'get', side_effect=mock_currency_converter_api):
         result = inquirer.query_fiat_pair(A_USD, A_EUR)
         assert result == FVal('1.1543')
 
@@ -74,10 +77,165 @@ def test_fallback_to_cached_values_within_a_month(inquirer):  # pylint: disable=
     date = timestamp_to_date(now - 86400 * 31, formatstr='%Y-%m-%d')
     inquirer._save_forex_rate(date, A_EUR, A_CNY, FVal('7.719'))
 
-    with patch('requests.get', side_effect=mock_api_remote_fail):
+    with patch.object(get_shared_session(), 'get', side_effect=mock_api_remote_fail):
         # We fail to find a response but then go back 15 days and find the cached response
         result = inquirer.query_fiat_pair(A_EUR, A_JPY)
         assert result == eurjpy_val
         # The cached response for EUR CNY is too old so we will fail here
         with pytest.raises(ValueError):
             result = inquirer.query_fiat_pair(A_EUR, A_CNY)
+
+
+def test_find_usd_price_cache(inquirer):
+    """Test that current prices are cached, expire after the TTL and failures are not cached"""
+    queried_assets = []
+    failing_assets = {A_DAI}
+
+    def mock_query_endpoint_pricemulti(from_assets, to_asset):
+        assert to_asset == A_USD
+        queried_assets.extend(from_assets)
+        return {asset: FVal(10) for asset in from_assets if asset not in failing_assets}, {}
+
+    with patch.object(
+            inquirer._cryptocompare,
+            'query_endpoint_pricemulti',
+            side_effect=mock_query_endpoint_pricemulti,
+    ):
+        assert inquirer.find_usd_price(A_ETH) == FVal(10)
+        assert inquirer.find_usd_price(A_ETH) == FVal(10)
+        assert inquirer.find_usd_price(A_BTC) == FVal(10)
+        assert queried_assets == [A_ETH, A_BTC]
+
+        assert inquirer.find_usd_price(A_DAI) == ZERO
+        assert inquirer.find_usd_price(A_DAI) == ZERO
+        assert queried_assets == [A_ETH, A_BTC, A_DAI, A_DAI]
+
+        now = ts_now()
+        with patch('rotkehlchen.inquirer.ts_now', return_value=now + 3600):
+            assert inquirer.find_usd_price(A_ETH) == FVal(10)
+        assert queried_assets == [A_ETH, A_BTC, A_DAI, A_DAI, A_ETH]
+
+    stats = inquirer.get_price_cache_stats()
+    assert stats.hits == 1
+    assert stats.misses == 5
+    assert stats.deduplicated == 0
+    assert stats.entries == 2
+
+
+def test_find_usd_price_single_flight(inquirer):
+    """Test that concurrent queries for the same asset result in a single remote query"""
+    query_count = 0
+
+    def mock_query_endpoint_pricemulti(from_assets, to_asset):  # pylint: disable=unused-argument
+        nonlocal query_count
+        query_count += 1
+        gevent.sleep(0.1)
+        if A_DAI in from_assets:
+            return {}, {A_DAI: 'cryptocompare is down'}
+        return {asset: FVal(10) for asset in from_assets}, {}
+
+    with patch.object(
+            inquirer._cryptocompare,
+            'query_endpoint_pricemulti',
+            side_effect=mock_query_endpoint_pricemulti,
+    ):
+        greenlets = [gevent.spawn(inquirer.find_usd_price, A_ETH) for _ in range(5)]
+        gevent.joinall(greenlets)
+        assert all(greenlet.get() == FVal(10) for greenlet in greenlets)
+        assert query_count == 1
+
+        # A failed query's error reaches all the greenlets that waited for it
+        greenlets = [gevent.spawn(inquirer.find_usd_price, A_DAI) for _ in range(3)]
+        gevent.joinall(greenlets)
+        assert all(isinstance(greenlet.exception, RemoteError) for greenlet in greenlets)
+        assert query_count == 2
+
+    stats = inquirer.get_price_cache_stats()
+    assert stats.misses == 2
+    assert stats.deduplicated == 6
+
+
+def test_find_usd_price_waiters_never_block(inquirer):
+    """Test that the greenlets waiting for an in flight price query get an error
+    if the query fails with any exception or its greenlet is killed"""
+
+    def mock_query_endpoint_pricemulti(from_assets, to_asset):  # pylint: disable=unused-argument
+        gevent.sleep(0.1)
+        if A_DAI in from_assets:
+            raise RuntimeError('unexpected error')
+        return {asset: FVal(10) for asset in from_assets}, {}
+
+    with patch.object(
+            inquirer._cryptocompare,
+            'query_endpoint_pricemulti',
+            side_effect=mock_query_endpoint_pricemulti,
+    ):
+        greenlets = [gevent.spawn(inquirer.find_usd_price, A_DAI) for _ in range(3)]
+        gevent.joinall(greenlets, timeout=5)
+        assert all(isinstance(greenlet.exception, RuntimeError) for greenlet in greenlets)
+
+        query_greenlet = gevent.spawn(inquirer.find_usd_price, A_ETH)
+        gevent.sleep(0)
+        waiters = [gevent.spawn(inquirer.find_usd_price, A_ETH) for _ in range(2)]
+        gevent.sleep(0)
+        query_greenlet.kill()
+        gevent.joinall(waiters, timeout=5)
+        assert all(isinstance(waiter.exception, RemoteError) for waiter in waiters)
+
+
+def test_find_usd_prices_batches_queries(inquirer):
+    """Test that only the prices that are not cached or in flight are queried in one go"""
+    queries = []
+
+    def mock_query_endpoint_pricemulti(from_assets, to_asset):  # pylint: disable=unused-argument
+        queries.append(list(from_assets))
+        gevent.sleep(0.1)
+        prices = {asset: FVal(len(queries)) for asset in from_assets if asset != A_DAI}
+        return prices, {}
+
+    with patch.object(
+            inquirer._cryptocompare,
+            'query_endpoint_pricemulti',
+            side_effect=mock_query_endpoint_pricemulti,
+    ):
+        assert inquirer.find_usd_price(A_EUR) == FVal(1)
+        # BTC is queried by another greenlet while the batch is being put together
+        btc_greenlet = gevent.spawn(inquirer.find_usd_price, A_BTC)
+        gevent.sleep(0)
+        prices, errors = inquirer.find_usd_prices([A_EUR, A_ETH, A_BTC, A_DAI, A_ETH])
+        assert btc_greenlet.get() == FVal(2)
+
+    assert prices == {A_EUR: FVal(1), A_ETH: FVal(3), A_BTC: FVal(2), A_DAI: ZERO}
+    assert errors == {}
+    assert queries == [[A_EUR], [A_BTC], [A_ETH, A_DAI]]
+    stats = inquirer.get_price_cache_stats()
+    assert stats.hits == 1
+    assert stats.misses == 4
+    assert stats.deduplicated == 1
+
+
+def test_find_usd_prices_failures_are_per_asset(inquirer):
+    """Test that the assets whose price query fails don't fail the others"""
+
+    def mock_query_endpoint_pricemulti(from_assets, to_asset):  # pylint: disable=unused-argument
+        gevent.sleep(0.1)
+        return (
+            {asset: FVal(10) for asset in from_assets if asset != A_DAI},
+            {asset: 'cryptocompare is down' for asset in from_assets if asset == A_DAI},
+        )
+
+    with patch.object(
+            inquirer._cryptocompare,
+            'query_endpoint_pricemulti',
+            side_effect=mock_query_endpoint_pricemulti,
+    ):
+        # DAI is queried by another greenlet while the batch is being put together
+        dai_greenlet = gevent.spawn(inquirer.find_usd_price, A_DAI)
+        gevent.sleep(0)
+        prices, errors = inquirer.find_usd_prices([A_ETH, A_DAI, A_BTC])
+        gevent.joinall([dai_greenlet])
+
+    assert prices == {A_ETH: FVal(10), A_BTC: FVal(10)}
+    assert errors == {A_DAI: 'cryptocompare is down'}
+    assert isinstance(dai_greenlet.exception, RemoteError)
+    assert A_DAI not in inquirer._cached_current_price
@@ -0,0 +1,156 @@
+import os
+import struct
+
+import pytest
+
+from rotkehlchen.errors import DeserializationError
+from rotkehlchen.externalapis.price_history_store import (
+    PRICE_HISTORY_MAGIC,
+    PRICE_HISTORY_VERSION,
+    PriceHistoryEntry,
+    PriceHistoryStore,
+    extend_price_history_file,
+    write_price_history_file,
+)
+from rotkehlchen.fval import FVal
+
+START_TS = 1438387200
+
+
+def _make_entries(count):
+    return [
+        PriceHistoryEntry(
+            time=START_TS + i * 3600,
+            low=FVal('0.00001234') * (i + 1),
+            high=FVal(10.5) + i,
+        ) for i in range(count)
+    ]
+
+
+def test_price_history_store_roundtrip(tmpdir):
+    filepath = os.path.join(tmpdir, 'price_history_ETH_BTC.bin')
+    entries = _make_entries(50)
+    # A missing price and a value with more digits than the coefficient holds
+    entries[3] = PriceHistoryEntry(time=entries[3].time, low=None, high=FVal(1))
+    entries[4] = PriceHistoryEntry(
+        time=entries[4].time,
+        low=FVal('1234567890.123456789012345'),
+        high=FVal(2),
+    )
+    write_price_history_file(filepath, entries, start_time=0, end_time=START_TS + 50 * 3600)
+
+    store = PriceHistoryStore(filepath)
+    assert len(store) == 50
+    assert store.start_time == 0
+    assert store.end_time == START_TS + 50 * 3600
+    for idx, entry in enumerate(store):
+        if idx == 4:
+            assert entry.low.is_close(entries[4].low)
+            assert entry.high == FVal(2)
+            continue
+
+        assert entry == entries[idx]
+        # representation is also kept so that exports look the same
+        assert str(entry.high) == str(entries[idx].high)
+
+    assert store[3].low is None
+    assert store[-1] == entries[-1]
+    assert store[1:3] == entries[1:3]
+    with pytest.raises(IndexError):
+        store[50]  # pylint: disable=pointless-statement
+    store.close()
+
+
+def test_price_history_store_closest_index(tmpdir):
+    filepath = os.path.join(tmpdir, 'price_history_ETH_BTC.bin')
+    write_price_history_file(filepath, _make_entries(10), start_time=0, end_time=START_TS)
+
+    store = PriceHistoryStore(filepath)
+    assert store.closest_index(START_TS - 1) is None
+    assert store.closest_index(START_TS) == 0
+    assert store.closest_index(START_TS + 3600 * 2 + 1799) == 2
+    assert store.closest_index(START_TS + 3600 * 2 + 1801) == 3
+    assert store.closest_index(START_TS + 3600 * 100) == 9
+    store.close()
+
+
+def test_price_history_store_invalid_file(tmpdir):
+    filepath = os.path.join(tmpdir, 'price_history_ETH_BTC.bin')
+    with open(filepath, 'wb') as f:
+        f.write(b'{"start_time": 0, "end_time": 1, "data": []}')
+
+    with pytest.raises(DeserializationError):
+        PriceHistoryStore(filepath)
+
+    write_price_history_file(filepath, _make_entries(10), start_time=0, end_time=START_TS)
+    with open(filepath, 'ab') as f:
+        f.write(b'garbage')
+
+    with pytest.raises(DeserializationError):
+        PriceHistoryStore(filepath)
+
+
+def test_price_history_store_extend(tmpdir):
+    filepath = os.path.join(tmpdir, 'price_history_ETH_BTC.bin')
+    entries = _make_entries(10)
+    write_price_history_file(filepath, entries[:5], start_time=0, end_time=START_TS)
+    capacity = PriceHistoryStore(filepath).capacity
+
+    # The first new entry replaces the last stored one since they have the same time
+    replacement = PriceHistoryEntry(time=entries[4].time, low=FVal(1), high=FVal(2))
+    extend_price_history_file(filepath, [replacement] + entries[5:], end_time=START_TS + 1)
+    store = PriceHistoryStore(filepath)
+    assert store.capacity == capacity
+    assert store.end_time == START_TS + 1
+    assert list(store) == entries[:4] + [replacement] + entries[5:]
+    store.close()
+
+    # If there is no spare capacity left the file is rewritten with a bigger one
+    more_entries = [
+        PriceHistoryEntry(time=START_TS + i * 3600, low=FVal(i), high=FVal(i))
+        for i in range(10, capacity + 10)
+    ]
+    extend_price_history_file(filepath, more_entries, end_time=START_TS + 2)
+    store = PriceHistoryStore(filepath)
+    assert store.capacity > capacity
+    assert store.end_time == START_TS + 2
+    assert len(store) == capacity + 10
+    assert store[-1] == more_entries[-1]
+    assert store[9] == entries[9]
+    store.close()
+
+
+def test_price_history_store_version_1_file(tmpdir):
+    """Files of the first version had no capacity in the header and no spare
+    capacity. They should still be read and get rewritten when extended"""
+    filepath = os.path.join(tmpdir, 'price_history_ETH_BTC.bin')
+    entries = _make_entries(10)
+    write_price_history_file(filepath, entries[:5], start_time=0, end_time=START_TS)
+    store = PriceHistoryStore(filepath)
+    columns = [
+        store._mmap[offset:offset + 5 * size]
+        for offset, size in (
+            (store._times_offset, 8),
+            (store._lows_offset, 10),
+            (store._highs_offset, 10),
+        )
+    ]
+    store.close()
+    with open(filepath, 'wb') as f:
+        f.write(struct.pack('<4sHqqI', PRICE_HISTORY_MAGIC, 1, 0, START_TS, 5))
+        for column in columns:
+            f.write(column)
+
+    store = PriceHistoryStore(filepath)
+    assert store.version == 1
+    assert store.capacity == 5
+    assert list(store) == entries[:5]
+    store.close()
+
+    extend_price_history_file(filepath, entries[5:], end_time=START_TS + 1)
+    store = PriceHistoryStore(filepath)
+    assert store.version == PRICE_HISTORY_VERSION
+    assert store.capacity > 10
+    assert store.end_time == START_TS + 1
+    assert list(store) == entries
+    store.close()
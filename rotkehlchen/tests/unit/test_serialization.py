@@ -4,7 +4,11 @@ from rotkehlchen.balances.manual import ManuallyTrackedBalance, add_manually_tra
 from rotkehlchen.constants.assets import A_BTC, A_ETH
 from rotkehlchen.errors import DeserializationError
 from rotkehlchen.fval import FVal
-from rotkehlchen.serialization.deserialize import deserialize_location, deserialize_trade_type
+from rotkehlchen.serialization.deserialize import (
+    deserialize_int_from_hex,
+    deserialize_location,
+    deserialize_trade_type,
+)
 from rotkehlchen.typing import Location, TradeType
 from rotkehlchen.utils.serialization import (
     pretty_json_dumps,
@@ -79,6 +83,17 @@ def test_deserialize_trade_type():
         deserialize_trade_type(1)
 
 
+def test_deserialize_int_from_hex():
+    assert deserialize_int_from_hex('0x1a', location='test') == 26
+    assert deserialize_int_from_hex('0x', location='test') == 0
+
+    with pytest.raises(DeserializationError):
+        deserialize_int_from_hex('0xfoo', location='test')
+
+    with pytest.raises(DeserializationError):
+        deserialize_int_from_hex(None, location='test')
+
+
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 def test_deserialize_location(database):
     balances = []
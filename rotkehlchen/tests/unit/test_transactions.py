@@ -0,0 +1,91 @@
+from rotkehlchen.fval import FVal
+from rotkehlchen.tests.utils.factories import make_ethereum_address
+from rotkehlchen.transactions import query_ethereum_transactions
+from rotkehlchen.typing import (
+    BlockchainAccountData,
+    EthereumTransaction,
+    SupportedBlockchain,
+    Timestamp,
+)
+
+
+def make_transaction(block_number, from_address, to_address, internal=False):
+    return EthereumTransaction(
+        tx_hash=block_number.to_bytes(32, byteorder='big'),
+        timestamp=Timestamp(1500000000 + block_number * 15),
+        block_number=block_number,
+        from_address=from_address,
+        to_address=to_address,
+        value=FVal(1),
+        gas=FVal(21000),
+        gas_price=FVal(1000000000),
+        gas_used=FVal(21000),
+        input_data=b'',
+        nonce=-1 if internal else block_number,
+    )
+
+
+class MockEtherscan():
+    """Yields the transactions of its chain that are in the requested blocks"""
+
+    def __init__(self):
+        self.transactions = []
+        self.queries = []
+
+    def get_transactions(self, account, internal, from_block=None, to_block=None):
+        self.queries.append((account, internal, from_block))
+        transactions = [
+            tx for tx in self.transactions if
+            (tx.nonce == -1) == internal and
+            account in (tx.from_address, tx.to_address) and
+            (from_block is None or tx.block_number >= from_block)
+        ]
+        # One block per batch
+        for block_number in sorted({tx.block_number for tx in transactions}):
+            yield [tx for tx in transactions if tx.block_number == block_number]
+
+
+def test_query_ethereum_transactions_only_queries_new_blocks(database):
+    address1 = make_ethereum_address()
+    address2 = make_ethereum_address()
+    other = make_ethereum_address()
+    database.add_blockchain_accounts(
+        SupportedBlockchain.ETHEREUM,
+        [BlockchainAccountData(address=address1), BlockchainAccountData(address=address2)],
+    )
+    etherscan = MockEtherscan()
+    etherscan.transactions = [
+        make_transaction(100, address1, other),
+        make_transaction(101, other, address2),
+        make_transaction(102, other, address1, internal=True),
+    ]
+    transactions = query_ethereum_transactions(database=database, etherscan=etherscan)
+    assert transactions == etherscan.transactions
+    assert sorted(etherscan.queries, key=str) == sorted([
+        (address1, False, None),
+        (address1, True, None),
+        (address2, False, None),
+        (address2, True, None),
+    ], key=str)
+
+    # Only the blocks after the last synced block of each account are queried
+    etherscan.transactions.append(make_transaction(110, address1, address2))
+    etherscan.queries = []
+    transactions = query_ethereum_transactions(database=database, etherscan=etherscan)
+    assert sorted(etherscan.queries, key=str) == sorted([
+        (address1, False, 101),
+        (address1, True, 103),
+        (address2, False, 102),
+        (address2, True, None),
+    ], key=str)
+    # The transaction between both accounts is returned once
+    assert transactions == etherscan.transactions
+
+    # Filtering by time is done on the transactions in the DB
+    transactions = query_ethereum_transactions(
+        database=database,
+        etherscan=etherscan,
+        from_ts=Timestamp(1500000000 + 101 * 15),
+        to_ts=Timestamp(1500000000 + 102 * 15),
+    )
+    assert transactions == etherscan.transactions[1:3]
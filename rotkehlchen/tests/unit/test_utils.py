@@ -8,7 +8,7 @@ from rotkehlchen.errors import ConversionError, UnprocessableTradePair
 from rotkehlchen.exchanges.data_structures import invert_pair
 from rotkehlchen.fval import FVal
 from rotkehlchen.serialization.serialize import process_result
-from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.tests.utils.mock import MockClock, MockResponse, patch_ratelimit_clock
 from rotkehlchen.utils.interfaces import CacheableObject, cache_response_timewise
 from rotkehlchen.utils.misc import (
     combine_dicts,
@@ -16,6 +16,8 @@ from rotkehlchen.utils.misc import (
     convert_to_int,
     iso8601ts_to_timestamp,
 )
+from rotkehlchen.utils.network import create_session, get_http_adapter, get_shared_session
+from rotkehlchen.utils.ratelimit import TokenBucket, get_rate_limit_stats, get_rate_limiter
 from rotkehlchen.utils.version_check import check_if_version_up_to_date
 
 
@@ -242,3 +244,59 @@ def test_convert_to_int():
     assert convert_to_int(b'5.44', accept_only_exact=False) == 5
     assert convert_to_int(b'5.65', accept_only_exact=False) == 5
     assert convert_to_int(b'4', accept_only_exact=False) == 4
+
+
+def test_token_bucket():
+    clock = MockClock()
+    with patch_ratelimit_clock(clock):
+        bucket = TokenBucket(capacity=10, refill_rate=20)
+        # A full bucket serves requests without waiting
+        assert bucket.acquire(4) == 0
+        assert bucket.acquire(6) == 0
+        assert bucket.tokens == 0
+        # An empty one waits until enough tokens have been refilled
+        waited = bucket.acquire(5)
+        assert waited == pytest.approx(0.25)
+        assert clock.now == pytest.approx(0.25)
+        assert bucket.tokens == pytest.approx(0)
+        # Requests heavier than the whole bucket only wait for a full bucket
+        waited = bucket.acquire(100)
+        assert waited == pytest.approx(0.5)
+
+    stats = bucket.stats()
+    assert stats.requests == 4
+    assert stats.max_wait_seconds == pytest.approx(0.5)
+
+
+def test_token_bucket_rate_limited():
+    clock = MockClock()
+    with patch_ratelimit_clock(clock):
+        bucket = TokenBucket(capacity=10, refill_rate=20)
+        bucket.rate_limited(0.3)
+        assert bucket.refill_rate == 10
+        assert bucket.tokens == 0
+        # All requests wait for the backoff, even if the bucket would have tokens by then
+        waited = bucket.acquire()
+        assert waited == pytest.approx(0.3)
+        # and the rate slowly grows back to the starting one
+        assert 10 < bucket.refill_rate < 20
+
+    stats = bucket.stats()
+    assert stats.requests == 1
+    assert stats.rate_limited == 1
+    assert stats.max_wait_seconds == pytest.approx(0.3)
+
+
+def test_get_rate_limiter_is_shared():
+    limiter = get_rate_limiter('etherscan')
+    assert get_rate_limiter('etherscan') is limiter
+    assert get_rate_limiter('cryptocompare') is not limiter
+    assert 'etherscan' in get_rate_limit_stats()
+
+
+def test_sessions_share_connection_pools():
+    session = create_session()
+    assert session is not get_shared_session()
+    assert get_shared_session() is get_shared_session()
+    assert session.get_adapter('https://api.etherscan.io') is get_http_adapter()
+    assert get_shared_session().get_adapter('http://localhost:8545') is get_http_adapter()
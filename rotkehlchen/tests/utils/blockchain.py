@@ -8,9 +8,12 @@ from typing import Any, Dict, List
 from unittest.mock import patch
 
 import gevent
+from eth_utils.address import to_checksum_address
+from web3 import Web3
 from web3.middleware import geth_poa_middleware
 
 from rotkehlchen.assets.asset import EthereumToken
+from rotkehlchen.constants.ethereum import BALANCE_CHECKER_ADDRESS
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.crypto import address_encoder, privatekey_to_address
 from rotkehlchen.externalapis.alethio import Alethio
@@ -22,6 +25,7 @@ from rotkehlchen.tests.utils.genesis import GENESIS_STUB
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.typing import BTCAddress, ChecksumEthAddress
 from rotkehlchen.utils.misc import from_wei, satoshis_to_btc
+from rotkehlchen.utils.network import get_shared_session
 
 logger = logging.getLogger(__name__)
 
@@ -339,6 +343,29 @@ def assert_eth_balances_result(
             assert FVal(totals[symbol]['usd_value']) > ZERO
 
 
+def mock_balance_checker_call(
+        eth_map: Dict[ChecksumEthAddress, Dict[str, Any]],
+        input_data: str,
+) -> str:
+    """Returns the output of a balances call to the balance checker contract
+    with the given input data, as a local chain with the contract would"""
+    web3 = Web3()
+    accounts, token_addresses = web3.codec.decode_abi(
+        ['address[]', 'address[]'],
+        bytes.fromhex(input_data[10:]),
+    )
+    values = []
+    for account in accounts:
+        for token_address in token_addresses:
+            token_address = to_checksum_address(token_address)
+            msg = 'token address missing from test mapping'
+            assert token_address in CONTRACT_ADDRESS_TO_TOKEN, msg
+            token = CONTRACT_ADDRESS_TO_TOKEN[token_address]
+            values.append(int(eth_map[to_checksum_address(account)].get(token.identifier, 0)))
+
+    return '0x' + web3.codec.encode_abi(['uint256[]'], [values]).hex()
+
+
 def mock_etherscan_balances_query(
         eth_map: Dict[ChecksumEthAddress, Dict[str, Any]],
         etherscan: Etherscan,
@@ -379,6 +406,11 @@ def mock_etherscan_balances_query(
             value = eth_map[account].get(token.identifier, 0)
             response = f'{{"status":"1","message":"OK","result":"{value}"}}'
 
+        elif f'api?module=proxy&action=eth_call&to={BALANCE_CHECKER_ADDRESS}' in url:
+            input_data = url.split('&data=')[1].split('&')[0]
+            result = mock_balance_checker_call(eth_map=eth_map, input_data=input_data)
+            response = f'{{"jsonrpc":"2.0","id":1,"result":"{result}"}}'
+
         else:
             return original_requests_get(url, *args, **kwargs)
 
@@ -426,16 +458,27 @@ def mock_bitcoin_balances_query(
 ):
 
     def mock_requests_get(url, *args, **kwargs):
-        if 'blockchain.info' in url:
-            queried_addr = url.split('/')[-1]
-            response = btc_map.get(queried_addr, '0')
+        if 'blockchain.info/multiaddr' in url:
+            queried_addresses = url.split('active=')[-1].split('|')
+            response = json.dumps({'addresses': [
+                {'address': x, 'final_balance': int(btc_map.get(x, '0'))}
+                for x in queried_addresses
+            ]})
+        elif 'api.blockcypher.com' in url:
+            queried_addresses = url.split('/')[-2].split(';')
+            lowercased_map = {k.lower(): v for k, v in btc_map.items()}
+            entries = [
+                {'address': x, 'balance': int(lowercased_map.get(x, '0'))}
+                for x in queried_addresses
+            ]
+            response = json.dumps(entries if len(entries) != 1 else entries[0])
 
         else:
             return original_requests_get(url, *args, **kwargs)
 
         return MockResponse(200, response)
 
-    return patch('rotkehlchen.utils.misc.requests.get', wraps=mock_requests_get)
+    return patch.object(get_shared_session(), 'get', wraps=mock_requests_get)
 
 
 def compare_account_data(expected: List[Dict], got: List[Dict]) -> None:
@@ -15,6 +15,25 @@ from rotkehlchen.typing import (
 )
 
 
+class QueryCountingConnection():
+    """Wraps a DB connection and counts the cursors and statements it is asked for"""
+
+    def __init__(self, conn: Any) -> None:
+        self.conn = conn
+        self.queries = 0
+
+    def cursor(self) -> Any:
+        self.queries += 1
+        return self.conn.cursor()
+
+    def execute(self, *args: Any) -> Any:
+        self.queries += 1
+        return self.conn.execute(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.conn, name)
+
+
 def maybe_include_etherscan_key(db: DBHandler, include_etherscan_key: bool) -> None:
     if not include_etherscan_key:
         return
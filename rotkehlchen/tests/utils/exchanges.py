@@ -17,6 +17,7 @@ from rotkehlchen.tests.utils.kraken import MockKraken
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.typing import ApiKey, ApiSecret
 from rotkehlchen.user_messages import MessagesAggregator
+from rotkehlchen.utils.ratelimit import TokenBucket
 
 POLONIEX_MOCK_DEPOSIT_WITHDRAWALS_RESPONSE = """{
   "withdrawals": [
@@ -210,6 +211,8 @@ def create_test_binance(
 
     binance._symbols_to_pair = create_binance_symbols_to_pair(json_data)
     binance.first_connection_made = True
+    # The mocked responses are not rate limited so don't wait for request weight
+    binance.request_weight_bucket = TokenBucket(capacity=10**9, refill_rate=10**9)
     return binance
 
 
@@ -928,3 +928,5 @@ def maybe_mock_price_queries(historian, should_mock_price_queries: bool, mocked_
         return price
 
     historian.query_historical_price = mock_historical_price_query
+    # All prices are mocked so there is nothing to prefetch
+    historian.prefetch_historical_prices = lambda queries: None
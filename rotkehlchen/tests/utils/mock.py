@@ -1,4 +1,6 @@
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from unittest.mock import patch
 
 from hexbytes import HexBytes
 
@@ -38,3 +40,26 @@ class MockWeb3():
 
     def isConnected(self) -> bool:  # noqa: N802 pylint: disable=no-self-use
         return True
+
+
+class MockClock():
+    """A monotonic clock that only advances when something sleeps on it"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        # Like a real sleep it takes some time even if asked to sleep for almost
+        # nothing, or waiting for tiny rounding leftovers would never advance the clock
+        self.now += max(seconds, 1e-6)
+
+
+@contextmanager
+def patch_ratelimit_clock(clock: MockClock) -> Iterator[None]:
+    """Makes the rate limiters read and wait on the given clock instead of real time"""
+    with patch('rotkehlchen.utils.ratelimit.time', new=clock):
+        with patch('rotkehlchen.utils.ratelimit.gevent', new=clock):
+            yield
@@ -1,16 +1,57 @@
 import logging
 from typing import List, Optional
 
+from gevent.pool import Pool
+
 from rotkehlchen.chain.ethereum.manager import EthereumManager
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.externalapis.etherscan import Etherscan
 from rotkehlchen.logging import RotkehlchenLogsAdapter
-from rotkehlchen.typing import EthereumTransaction, Timestamp
+from rotkehlchen.typing import ChecksumEthAddress, EthereumTransaction, Timestamp
 from rotkehlchen.utils.misc import ts_now
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# How many accounts are queried for transactions at the same time
+TRANSACTIONS_QUERY_CONCURRENCY = 4
+
+
+def _sync_account_transactions(
+        database: DBHandler,
+        etherscan: Etherscan,
+        address: ChecksumEthAddress,
+) -> None:
+    """Queries etherscan for the normal and the internal transactions of an account
+    that are in blocks after the last synced block of each and saves them in the DB
+
+    Each batch of transactions is saved as it arrives, along with its last block.
+
+    May raise:
+    - RemoteError if etherscan is used and there is a problem with reaching it or
+    with parsing the response.
+    """
+    for internal in (False, True):
+        last_block = database.get_ethereum_transactions_last_block(address, internal)
+        batches = etherscan.get_transactions(
+            account=address,
+            internal=internal,
+            from_block=None if last_block is None else last_block + 1,
+        )
+        for new_transactions in batches:
+            if len(new_transactions) == 0:
+                continue
+
+            database.add_ethereum_transactions(
+                ethereum_transactions=new_transactions,
+                from_etherscan=True,
+            )
+            database.update_ethereum_transactions_last_block(
+                address=address,
+                internal=internal,
+                block_number=max(tx.block_number for tx in new_transactions),
+            )
+
 
 def query_ethereum_transactions(
         database: DBHandler,
@@ -21,43 +62,26 @@ def query_ethereum_transactions(
     """Queries for all transactions (normal AND internal) of all ethereum accounts.
     Returns a list of all transactions of all accounts sorted by time.
 
+    For each account the last block up to which its normal and internal transactions
+    are in the DB is remembered, so only transactions of newer blocks are queried
+    from etherscan. The accounts are queried at the same time.
+
     May raise:
     - RemoteError if etherscan is used and there is a problem with reaching it or
     with parsing the response.
     """
-    transactions: List[EthereumTransaction] = []
-
-    accounts = database.get_blockchain_accounts()
-    for address in accounts.eth:
-        # If we already have any transactions in the DB for this from_address
-        # from to_ts and on then that means the range has already been queried
-        if to_ts:
-            existing_txs = database.get_ethereum_transactions(from_ts=to_ts, address=address)
-            if len(existing_txs) > 0:
-                # So just query the DB only here
-                transactions.extend(
-                    database.get_ethereum_transactions(
-                        from_ts=from_ts, to_ts=to_ts, address=address,
-                    ),
-                )
-                continue
-
-        # else we have to query etherscan for this address
-        # TODO: Can we somehow shorten the query here by providing a block range?
-        # Note: If we do, we then need to retrieve the rest of the transactions
-        # from the DB.
-        new_transactions = etherscan.get_transactions(account=address, internal=False)
-        new_transactions.extend(etherscan.get_transactions(account=address, internal=True))
-
-        # and finally also save the transactions in the DB
-        database.add_ethereum_transactions(
-            ethereum_transactions=new_transactions,
-            from_etherscan=True,
-        )
-        transactions.extend(new_transactions)
-
-    transactions.sort(key=lambda tx: tx.timestamp)
-    return transactions
+    accounts = database.get_blockchain_accounts().eth
+    pool = Pool(TRANSACTIONS_QUERY_CONCURRENCY)
+    for address in accounts:
+        pool.spawn(_sync_account_transactions, database, etherscan, address)
+    pool.join(raise_error=True)
+
+    # A single query so that transactions between two of the accounts are returned once
+    return database.get_ethereum_transactions(
+        from_ts=from_ts,
+        to_ts=to_ts,
+        addresses=list(accounts),
+    )
 
 
 class EthereumAnalyzer():
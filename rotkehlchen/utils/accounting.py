@@ -1,7 +1,7 @@
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 from rotkehlchen.assets.asset import Asset
-from rotkehlchen.constants.assets import A_ETH
+from rotkehlchen.constants.assets import A_BTC, A_ETH
 from rotkehlchen.exchanges.data_structures import (
     AssetMovement,
     Loan,
@@ -10,7 +10,7 @@ from rotkehlchen.exchanges.data_structures import (
     trade_get_assets,
 )
 from rotkehlchen.transactions import EthereumTransaction
-from rotkehlchen.typing import Timestamp
+from rotkehlchen.typing import Timestamp, TradeType
 
 TaxableAction = Union[Trade, AssetMovement, EthereumTransaction, MarginPosition, Loan]
 
@@ -59,3 +59,28 @@ def action_get_assets(
         return action.currency, None
 
     raise AssertionError(f'TaxableAction of unknown type {type(action)} encountered')
+
+
+def action_get_priced_assets(action: TaxableAction) -> List[Asset]:
+    """Returns the assets whose price in the profit currency may be needed at the
+    time of the action in order to process it
+
+    May raise:
+    - UnknownAsset/UnsupportedAsset/DeserializationError if a trade's pair can't be read
+    """
+    if isinstance(action, Trade):
+        base, quote = trade_get_assets(action)
+        assets = [base, quote, action.fee_currency]
+        if action.trade_type == TradeType.SETTLEMENT_BUY:
+            assets.append(A_BTC)
+        return assets
+    elif isinstance(action, AssetMovement):
+        return [action.fee_asset]
+    elif isinstance(action, EthereumTransaction):
+        return [A_ETH]
+    elif isinstance(action, MarginPosition):
+        return [action.pl_currency]
+    elif isinstance(action, Loan):
+        return [action.currency]
+
+    raise AssertionError(f'TaxableAction of unknown type {type(action)} encountered')
@@ -7,13 +7,13 @@ import re
 import sys
 import time
 from http import HTTPStatus
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import urlparse
 
-import gevent
 import requests
 from rlp.sedes import big_endian_int
 
-from rotkehlchen.constants import ALL_REMOTES_TIMEOUT, ZERO
+from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.timing import QUERY_RETRY_TIMES
 from rotkehlchen.errors import (
     ConversionError,
@@ -24,8 +24,10 @@ from rotkehlchen.errors import (
 )
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
-from rotkehlchen.typing import Fee, FilePath, Timestamp, TimestampMS
-from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads
+from rotkehlchen.typing import Fee, Timestamp, TimestampMS
+from rotkehlchen.utils.network import get_shared_session
+from rotkehlchen.utils.ratelimit import get_rate_limiter
+from rotkehlchen.utils.serialization import rlk_jsonloads
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -146,6 +148,7 @@ def retry_calls(
         backoff_in_seconds: Union[int, float],
         method_name: str,
         function: Callable[..., Any],
+        tokens: float = 1,
         **kwargs: Any,
 ) -> Any:
     """Calls a function that deals with external apis for a given number of times
@@ -155,22 +158,27 @@ def retry_calls(
 
     Can also handle 429 errors with a specific backoff in seconds if required.
 
+    The calls go through the rate limiter of the given location, so all calls
+    to the same location back off together. Each call costs `tokens` of it.
+
     - Raises RemoteError if there is something wrong with contacting the remote
     """
+    limiter = get_rate_limiter(location)
     tries = times
     while True:
+        limiter.acquire(tokens)
         try:
             result = function(**kwargs)
 
             if handle_429:
                 if result.status_code == HTTPStatus.TOO_MANY_REQUESTS and tries != 0:
-                    gevent.sleep(backoff_in_seconds)
+                    limiter.rate_limited(backoff_in_seconds)
                     continue
             return result
 
         except (requests.exceptions.ConnectionError, RecoverableRequestError) as e:
             if isinstance(e, RecoverableRequestError):
-                time.sleep(5)
+                limiter.rate_limited(5)
 
             tries -= 1
             if tries == 0:
@@ -185,11 +193,14 @@ def retry_calls(
 
 def request_get(
         url: str,
-        timeout: int = ALL_REMOTES_TIMEOUT,
+        timeout: Optional[int] = None,
         handle_429: bool = False,
         backoff_in_seconds: Union[int, float] = 0,
 ) -> Union[Dict, List]:
-    """
+    """Queries the given url over the process wide pool of kept alive connections
+
+    If no timeout is given the default timeout of the connection pools is used.
+
     May raise:
     - UnableToDecryptRemoteData from request_get
     - Remote error if the get request fails
@@ -198,11 +209,11 @@ def request_get(
     # Not all requests would need repeated attempts
     response = retry_calls(
         times=QUERY_RETRY_TIMES,
-        location='',
+        location=urlparse(url).netloc,
         handle_429=handle_429,
         backoff_in_seconds=backoff_in_seconds,
         method_name=url,
-        function=requests.get,
+        function=get_shared_session().get,
         # function's arguments
         url=url,
         timeout=timeout,
@@ -218,7 +229,7 @@ def request_get(
 
 def request_get_direct(
         url: str,
-        timeout: int = ALL_REMOTES_TIMEOUT,
+        timeout: Optional[int] = None,
         handle_429: bool = False,
         backoff_in_seconds: Union[int, float] = 0,
 ) -> str:
@@ -233,7 +244,7 @@ def request_get_direct(
 
 def request_get_dict(
         url: str,
-        timeout: int = ALL_REMOTES_TIMEOUT,
+        timeout: Optional[int] = None,
         handle_429: bool = False,
         backoff_in_seconds: Union[int, float] = 0,
 ) -> Dict:
@@ -328,26 +339,6 @@ def get_system_spec() -> Dict[str, str]:
     return system_spec
 
 
-def write_history_data_in_file(
-        data: List[Dict[str, Any]],
-        filepath: FilePath,
-        start_ts: Timestamp,
-        end_ts: Timestamp,
-) -> None:
-    log.info(
-        'Writing history file',
-        filepath=filepath,
-        start_time=start_ts,
-        end_time=end_ts,
-    )
-    with open(filepath, 'w') as outfile:
-        history_dict: Dict[str, Any] = {}
-        history_dict['data'] = data
-        history_dict['start_time'] = start_ts
-        history_dict['end_time'] = end_ts
-        outfile.write(rlk_jsondumps(history_dict))
-
-
 def hex_or_bytes_to_int(value: Union[bytes, str]) -> int:
     """Turns a bytes/HexBytes or a hexstring into an int
 
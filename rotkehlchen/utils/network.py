@@ -0,0 +1,110 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rotkehlchen.constants.timing import ALL_REMOTES_TIMEOUT
+
+# For how many hosts a pool of kept alive connections is kept around
+HTTP_POOL_HOSTS = 32
+# How many kept alive connections each host's pool holds. This is sized for the
+# number of greenlets that query the same host at the same time.
+HTTP_POOL_CONNECTIONS_PER_HOST = 16
+
+
+class ConnectionPoolStats(NamedTuple):
+    requests: int
+    # How many new connections had to be opened for the requests
+    connections: int
+    # How many requests went over an already open connection
+    reused: int
+
+    def serialize(self) -> Dict[str, int]:
+        return self._asdict()  # pylint: disable=no-member
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter whose per host connection pools are shared by all sessions it's mounted on
+
+    Requests that are sent without a timeout get the adapter's default timeout.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        super().__init__(
+            pool_connections=HTTP_POOL_HOSTS,
+            pool_maxsize=HTTP_POOL_CONNECTIONS_PER_HOST,
+        )
+        self.timeout = timeout
+
+    def send(  # pylint: disable=arguments-differ
+            self,
+            request: requests.PreparedRequest,
+            **kwargs: Any,
+    ) -> requests.Response:
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+    def connection_stats(self) -> Dict[str, ConnectionPoolStats]:
+        stats: Dict[str, ConnectionPoolStats] = {}
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            previous = stats.get(pool.host, ConnectionPoolStats(0, 0, 0))
+            requests_num = previous.requests + pool.num_requests
+            connections = previous.connections + pool.num_connections
+            stats[pool.host] = ConnectionPoolStats(
+                requests=requests_num,
+                connections=connections,
+                reused=max(0, requests_num - connections),
+            )
+
+        return stats
+
+
+_adapter: Optional[PooledHTTPAdapter] = None
+_shared_session: Optional[requests.Session] = None
+
+
+def get_http_adapter() -> PooledHTTPAdapter:
+    """Returns the process wide adapter that holds the pools of kept alive connections"""
+    global _adapter  # pylint: disable=global-statement
+    if _adapter is None:
+        _adapter = PooledHTTPAdapter(timeout=ALL_REMOTES_TIMEOUT)
+
+    return _adapter
+
+
+def set_http_timeout(timeout: float) -> None:
+    """Sets the timeout of all requests that are made without an explicit one"""
+    get_http_adapter().timeout = timeout
+
+
+def create_session() -> requests.Session:
+    """Creates a session that uses the process wide connection pools
+
+    Clients that keep their own state in the session, like authentication
+    headers, should create their own with this.
+    """
+    session = requests.session()
+    adapter = get_http_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """Returns the process wide session for requests that need no session state"""
+    global _shared_session  # pylint: disable=global-statement
+    if _shared_session is None:
+        _shared_session = create_session()
+
+    return _shared_session
+
+
+def get_connection_stats() -> Dict[str, ConnectionPoolStats]:
+    """Returns the request and connection statistics of each host queried so far"""
+    return get_http_adapter().connection_stats()
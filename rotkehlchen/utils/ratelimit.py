@@ -0,0 +1,168 @@
+import logging
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import gevent
+from gevent.lock import Semaphore
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Burst capacity and refill rate per second of the requests (or request weight)
+# each remote service allows. These are the starting limits. They are lowered
+# when a service responds that we are rate limited and slowly grow back after that.
+SERVICE_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    'alethio': (10, 5),
+    # The free blockcypher tier allows 3 requests per second
+    'api.blockcypher.com': (3, 3),
+    # Binance counts request weight, 1200 per minute per IP. The burst plus a
+    # minute of refill has to stay under that
+    'binance': (100, 18),
+    'cryptocompare': (20, 10),
+    'etherscan': (5, 5),
+    'gemini': (10, 5),
+    # Kraken counts private calls with a decaying counter that starts at 15 and
+    # goes down by 1 every 3 seconds for the starter tier
+    'kraken': (15, 0.33),
+    # Kraken limits public calls separately, per IP
+    'kraken_public': (5, 1),
+    'poloniex': (6, 6),
+}
+DEFAULT_RATE_LIMIT = (10, 10)
+# The learned rate of a service never goes below this fraction of its starting rate
+MIN_RATE_FRACTION = 0.05
+# After being rate limited this fraction of the starting rate is restored per second
+RATE_RECOVERY_PER_SECOND = 0.01
+
+
+class RateLimitStats(NamedTuple):
+    requests: int
+    # How many times the service responded that we are rate limited
+    rate_limited: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+    # The currently learned refill rate per second
+    rate: float
+
+    def serialize(self) -> Dict[str, Any]:
+        return self._asdict()  # pylint: disable=no-member
+
+
+class TokenBucket():
+    """A token bucket for keeping the requests to a remote service under its rate limit
+
+    The bucket holds up to `capacity` tokens and is refilled with `refill_rate`
+    tokens per second. Each request takes as many tokens as its weight and waits
+    until enough tokens are available. Waiting requests are served in order.
+
+    When the service responds that we are rate limited the bucket is emptied, all
+    requests are paused for the given backoff and the refill rate is halved. The
+    refill rate then slowly grows back to the starting rate.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float, service: str = '') -> None:
+        self.service = service
+        self.capacity = capacity
+        self.max_refill_rate = refill_rate
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = Semaphore()
+
+        self.requests = 0
+        self.rate_limited_count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+        if self.refill_rate < self.max_refill_rate:
+            self.refill_rate = min(
+                self.max_refill_rate,
+                self.refill_rate + elapsed * self.max_refill_rate * RATE_RECOVERY_PER_SECOND,
+            )
+        self.last_refill = now
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Take the given amount of tokens from the bucket, waiting for them if needed
+
+        Returns the number of seconds that were spent waiting
+        """
+        tokens = min(tokens, self.capacity)
+        start = time.monotonic()
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    gevent.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill()
+                if self.tokens >= tokens:
+                    break
+
+                gevent.sleep((tokens - self.tokens) / self.refill_rate)
+
+            self.tokens -= tokens
+
+        waited = time.monotonic() - start
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def rate_limited(self, backoff: Optional[float] = None) -> None:
+        """Registers that the service responded that we are rate limited
+
+        All requests waiting on the bucket are paused for `backoff` seconds, or
+        until a token would be refilled with the lowered rate if no backoff is given.
+        """
+        self.rate_limited_count += 1
+        self.refill_rate = max(
+            self.refill_rate / 2,
+            self.max_refill_rate * MIN_RATE_FRACTION,
+        )
+        self.tokens = 0
+        self.last_refill = time.monotonic()
+        if backoff is None:
+            backoff = 1 / self.refill_rate
+        self.blocked_until = max(self.blocked_until, time.monotonic() + backoff)
+        log.debug(
+            'Got rate limited. Lowering the request rate',
+            service=self.service,
+            rate=self.refill_rate,
+            backoff=backoff,
+        )
+
+    def stats(self) -> RateLimitStats:
+        return RateLimitStats(
+            requests=self.requests,
+            rate_limited=self.rate_limited_count,
+            total_wait_seconds=round(self.total_wait, 3),
+            max_wait_seconds=round(self.max_wait, 3),
+            rate=round(self.refill_rate, 3),
+        )
+
+
+_service_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(service: str) -> TokenBucket:
+    """Returns the token bucket shared by all clients of the given remote service"""
+    bucket = _service_buckets.get(service)
+    if bucket is None:
+        capacity, refill_rate = SERVICE_RATE_LIMITS.get(service, DEFAULT_RATE_LIMIT)
+        bucket = TokenBucket(capacity=capacity, refill_rate=refill_rate, service=service)
+        _service_buckets[service] = bucket
+
+    return bucket
+
+
+def get_rate_limit_stats() -> Dict[str, RateLimitStats]:
+    """Returns the request and wait time statistics of every service queried so far"""
+    return {service: bucket.stats() for service, bucket in _service_buckets.items()}